@@ -0,0 +1,475 @@
+"""
+Deterministic fake Jira Cloud for local benchmarks.
+
+Serves the endpoints used by the report code (search/jql, issue worklogs,
+/user, /group/member, /project, /project/search, /worklog/updated,
+/worklog/list, /worklog/deleted) from a synthetic dataset generated from a
+seed, with configurable latency, rate limiting (429 + Retry-After) and
+error injection (503).
+
+Run standalone:
+    python benchmark/jira_stub.py --port 8765 --issues 2000 --latency-ms 20
+Traffic counters: GET /_stats, reset with POST /_reset.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# 資料集使用的時區（worklog started 帶 +0800）
+TZ = timezone(timedelta(hours=8))
+# search/jql 每頁最多回傳的 issue 數（含 worklog 欄位時 Jira 會縮減頁數）
+SEARCH_PAGE_LIMIT = 100
+# search/jql 內嵌的 worklog 筆數上限
+EMBEDDED_WORKLOGS = 20
+WORKLOG_PAGE_LIMIT = 5000
+WORKLOG_UPDATED_PAGE = 1000
+
+
+@dataclass
+class StubConfig:
+    seed: int = 1
+    projects: int = 6
+    issues: int = 240
+    users: int = 15
+    # 每個 issue 的 worklog 數上限（分布偏向少量）
+    max_worklogs_per_issue: int = 60
+    start_date: str = "2024-01-01"
+    # issue 建立日期分布的天數；worklog 落在建立後 400 天內
+    days: int = 240
+    groups: list = field(default_factory=lambda: ["AWS-TW", "GCP-TW", "Data", "PMO", "TWO1", "TWO2", "SA", "PM", "SRE"])
+    latency_ms: float = 3.0
+    jitter_ms: float = 0.0
+    # 每秒可處理的請求數（0 = 不限流），超過時回傳 429
+    rate_limit: float = 0.0
+    rate_burst: int = 50
+    # 回傳 503 的請求比例
+    error_rate: float = 0.0
+
+
+class Dataset:
+    """
+    Synthetic projects, issues, worklogs and group memberships, fully
+    determined by the config's seed.
+    """
+
+    def __init__(self, config: StubConfig) -> None:
+        rng = random.Random(config.seed)
+        base = datetime.strptime(config.start_date, "%Y-%m-%d").replace(tzinfo=TZ)
+        self.projects = [f"P{i}" for i in range(config.projects)]
+        self.categories = {key: ("Delivery" if i % 2 == 0 else "Internal") for i, key in enumerate(self.projects)}
+        self.users = [f"acc-{i}" for i in range(config.users)]
+        self.members = {
+            group: [user for j, user in enumerate(self.users) if (j + k) % 3 == 0]
+            for k, group in enumerate(config.groups)
+        }
+
+        self.issues = []
+        self.worklogs = {}
+        self.worklogs_by_id = {}
+        self.issues_by_id = {}
+        worklog_id = 1
+        for n in range(config.issues):
+            project = self.projects[n % len(self.projects)]
+            created = base + timedelta(minutes=int(n * config.days * 1440 / max(config.issues, 1)))
+            issue = {"id": str(10000 + n), "key": f"{project}-{n}", "project": project, "created": created}
+            issue_worklogs = []
+            for _ in range(int(config.max_worklogs_per_issue * rng.random() ** 3)):
+                started = created + timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 23))
+                issue_worklogs.append({
+                    "id": str(worklog_id),
+                    "issueId": issue["id"],
+                    "author": rng.choice(self.users),
+                    "started": started,
+                    "seconds": rng.choice([900, 1800, 3600, 7200, 14400]),
+                    "updated": int(started.timestamp() * 1000) + worklog_id,
+                })
+                worklog_id += 1
+            issue["updated"] = max([w["updated"] for w in issue_worklogs], default=int(created.timestamp() * 1000))
+            self.issues.append(issue)
+            self.issues_by_id[issue["id"]] = issue
+            self.worklogs[issue["key"]] = issue_worklogs
+            self.worklogs_by_id.update((w["id"], w) for w in issue_worklogs)
+        self.updated_order = sorted(self.worklogs_by_id.values(), key=lambda w: w["updated"])
+
+    def search(self, jql: str) -> list:
+        """
+        The JQL subset the report code sends, ordered by created, key.
+        """
+        issues = self.issues
+        match = re.search(r'worklogDate >= "([\d-]+)"(?: AND worklogDate < "([\d-]+)")?', jql)
+        if match:
+            lower, upper = match.group(1), match.group(2) or "9999-12-31"
+            issues = [i for i in issues if any(lower <= day(w) < upper for w in self.worklogs[i["key"]])]
+        match = re.search(r'project\s*=\s*"([^"]+)"', jql)
+        if match:
+            issues = [i for i in issues if i["project"] == match.group(1)]
+        for op, value in re.findall(r'created (>=|<) "([^"]+)"', jql):
+            bound = datetime.strptime(value, "%Y/%m/%d %H:%M").replace(tzinfo=TZ)
+            issues = [i for i in issues if (i["created"] >= bound if op == ">=" else i["created"] < bound)]
+        match = re.search(r"id in \(([\d,]+)\)", jql)
+        if match:
+            ids = set(match.group(1).split(","))
+            issues = [i for i in issues if i["id"] in ids]
+        match = re.search(r'updated >= "-(\d+)m"', jql)
+        if match:
+            cutoff = time.time() * 1000 - int(match.group(1)) * 60000
+            issues = [i for i in issues if i["updated"] >= cutoff]
+        match = re.search(r'updated >= "(\d{4}/\d{2}/\d{2} \d{2}:\d{2})"', jql)
+        if match:
+            cutoff = datetime.strptime(match.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=TZ).timestamp() * 1000
+            issues = [i for i in issues if i["updated"] >= cutoff]
+        return sorted(issues, key=lambda i: (i["created"], i["key"]), reverse="created DESC" in jql)
+
+
+def day(worklog: dict) -> str:
+    return worklog["started"].strftime("%Y-%m-%d")
+
+
+def format_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000%z")
+
+
+def worklog_json(worklog: dict) -> dict:
+    return {
+        "id": worklog["id"],
+        "issueId": worklog["issueId"],
+        "author": {"accountId": worklog["author"], "displayName": worklog["author"].upper()},
+        "started": format_time(worklog["started"]),
+        "timeSpentSeconds": worklog["seconds"],
+        "updated": format_time(worklog["started"]),
+    }
+
+
+def issue_json(issue: dict, dataset: Dataset, fields: str) -> dict:
+    project = issue["project"]
+    data = {
+        "summary": f"summary {issue['key']}",
+        "project": {"key": project},
+        "created": format_time(issue["created"]),
+        "updated": format_time(datetime.fromtimestamp(issue["updated"] / 1000, TZ)),
+        "customfield_10001": {"name": f"team-{project}"},
+        "customfield_10035": {"value": "Open"},
+        "customfield_10142": None,
+        "customfield_10139": {"value": "Dev"},
+    }
+    if "worklog" in fields.split(","):
+        worklogs = dataset.worklogs[issue["key"]]
+        data["worklog"] = {
+            "startAt": 0,
+            "maxResults": EMBEDDED_WORKLOGS,
+            "total": len(worklogs),
+            "worklogs": [worklog_json(w) for w in worklogs[:EMBEDDED_WORKLOGS]],
+        }
+    return {"id": issue["id"], "key": issue["key"], "fields": data}
+
+
+def project_json(dataset: Dataset, key: str) -> dict:
+    return {"key": key, "name": f"Project {key}", "projectCategory": {"id": key[1:], "name": dataset.categories[key]}}
+
+
+class StubStats:
+    """
+    Request / byte counters; control endpoints (/_stats, /_reset) are not
+    counted.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.by_endpoint = {}
+            self.by_status = {}
+
+    def record(self, endpoint: str, status: int, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "by_endpoint": dict(self.by_endpoint),
+                "by_status": dict(self.by_status),
+            }
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        (allowed, seconds until a token is available, tokens left).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True, 0.0, self.tokens
+            return False, (1 - self.tokens) / self.rate, self.tokens
+
+
+class JiraStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig) -> None:
+        super().__init__(address, JiraStubHandler)
+        self.config = config
+        self.dataset = Dataset(config)
+        self.stats = StubStats()
+        self.bucket = TokenBucket(config.rate_limit, config.rate_burst) if config.rate_limit > 0 else None
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+
+    def random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+
+class JiraStubHandler(BaseHTTPRequestHandler):
+    server: JiraStubServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.handle_request("GET")
+
+    def do_POST(self) -> None:
+        self.handle_request("POST")
+
+    def handle_request(self, method: str) -> None:
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+
+        if url.path == "/_stats":
+            return self.send(self.server.stats.snapshot())
+        if url.path == "/_reset":
+            self.server.stats.reset()
+            return self.send({"ok": True})
+
+        config = self.server.config
+        if config.latency_ms or config.jitter_ms:
+            time.sleep((config.latency_ms + config.jitter_ms * self.server.random()) / 1000)
+
+        endpoint = endpoint_name(url.path)
+        headers = {}
+        if self.server.bucket is not None:
+            allowed, wait, tokens = self.server.bucket.take()
+            if not allowed:
+                headers["Retry-After"] = str(max(1, math.ceil(wait)))
+                return self.send({"errorMessages": ["Rate limit exceeded"]}, 429, headers, endpoint, len(body))
+            if tokens < config.rate_burst * 0.2:
+                headers["X-RateLimit-NearLimit"] = "true"
+        if config.error_rate and self.server.random() < config.error_rate:
+            return self.send({"errorMessages": ["Injected error"]}, 503, headers, endpoint, len(body))
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        query_lists = parse_qs(url.query)
+        try:
+            result = self.route(method, url.path, query, query_lists, json.loads(body) if body else {})
+        except KeyError as e:
+            result = ({"errorMessages": [f"Not found: {e}"]}, 404)
+        payload, status = result if isinstance(result, tuple) else (result, 200)
+        self.send(payload, status, headers, endpoint, len(body))
+
+    def route(self, method: str, path: str, query: dict, query_lists: dict, body: dict):
+        dataset = self.server.dataset
+        if method == "POST":
+            if path == "/rest/api/3/worklog/list":
+                ids = [str(i) for i in body.get("ids", [])[:1000]]
+                return [worklog_json(dataset.worklogs_by_id[i]) for i in ids if i in dataset.worklogs_by_id]
+            return {"errorMessages": [path]}, 404
+
+        if path == "/rest/api/3/search/jql":
+            issues = dataset.search(query["jql"])
+            page_size = min(int(query.get("maxResults", 50)), SEARCH_PAGE_LIMIT)
+            start = int(query.get("nextPageToken", 0))
+            result = {
+                "issues": [issue_json(i, dataset, query.get("fields", "")) for i in issues[start:start + page_size]]
+            }
+            if start + page_size < len(issues):
+                result["nextPageToken"] = str(start + page_size)
+            return result
+
+        match = re.match(r"/rest/api/3/issue/([^/]+)/worklog$", path)
+        if match:
+            key = match.group(1)
+            if key not in dataset.worklogs:
+                key = dataset.issues_by_id[key]["key"]
+            worklogs = dataset.worklogs[key]
+            if "startedAfter" in query:
+                worklogs = [w for w in worklogs if w["started"].timestamp() * 1000 >= int(query["startedAfter"])]
+            if "startedBefore" in query:
+                worklogs = [w for w in worklogs if w["started"].timestamp() * 1000 <= int(query["startedBefore"])]
+            start = int(query.get("startAt", 0))
+            page_size = min(int(query.get("maxResults", WORKLOG_PAGE_LIMIT)), WORKLOG_PAGE_LIMIT)
+            return {
+                "startAt": start,
+                "maxResults": page_size,
+                "total": len(worklogs),
+                "worklogs": [worklog_json(w) for w in worklogs[start:start + page_size]],
+            }
+
+        if path == "/rest/api/3/user":
+            account_id = query["accountId"]
+            groups = [name for name, members in dataset.members.items() if account_id in members]
+            return {"accountId": account_id, "groups": {"items": [{"name": name} for name in groups]}}
+
+        if path == "/rest/api/3/group/member":
+            if query["groupname"] not in dataset.members:
+                return {"errorMessages": ["Group not found"]}, 404
+            members = dataset.members[query["groupname"]]
+            start, page_size = int(query.get("startAt", 0)), int(query.get("maxResults", 50))
+            return {
+                "startAt": start,
+                "maxResults": page_size,
+                "total": len(members),
+                "isLast": start + page_size >= len(members),
+                "values": [{"accountId": a} for a in members[start:start + page_size]],
+            }
+
+        if path == "/rest/api/3/project/search":
+            keys = query_lists.get("keys", dataset.projects)
+            selected = [key for key in dataset.projects if key in keys]
+            start, page_size = int(query.get("startAt", 0)), int(query.get("maxResults", 50))
+            return {
+                "startAt": start,
+                "maxResults": page_size,
+                "isLast": start + page_size >= len(selected),
+                "values": [project_json(dataset, key) for key in selected[start:start + page_size]],
+            }
+
+        match = re.match(r"/rest/api/[23]/project/([^/]+)$", path)
+        if match:
+            if match.group(1) not in dataset.categories:
+                return {"errorMessages": ["No project could be found"]}, 404
+            return project_json(dataset, match.group(1))
+
+        if path == "/rest/api/3/worklog/updated":
+            since = int(query.get("since", 0))
+            values = [w for w in dataset.updated_order if w["updated"] >= since][:WORKLOG_UPDATED_PAGE]
+            until = values[-1]["updated"] if values else since
+            result = {
+                "values": [
+                    {"worklogId": int(w["id"]), "issueId": int(w["issueId"]), "updatedTime": w["updated"]}
+                    for w in values
+                ],
+                "since": since,
+                "until": until,
+                "lastPage": len(values) < WORKLOG_UPDATED_PAGE,
+            }
+            if not result["lastPage"]:
+                result["nextPage"] = f"http://{self.headers['Host']}/rest/api/3/worklog/updated?since={until + 1}"
+            return result
+
+        if path == "/rest/api/3/worklog/deleted":
+            since = int(query.get("since", 0))
+            return {"values": [], "since": since, "until": since, "lastPage": True}
+
+        return {"errorMessages": [path]}, 404
+
+    def send(self, payload, status: int = 200, headers: dict = None, endpoint: str = None, bytes_in: int = 0) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        if endpoint is not None:
+            self.server.stats.record(endpoint, status, bytes_in + len(self.path), len(data))
+
+
+def endpoint_name(path: str) -> str:
+    """
+    Path with issue keys / IDs replaced, for per-endpoint counters.
+    """
+    path = re.sub(r"/issue/[^/]+/", "/issue/{key}/", path)
+    return re.sub(r"/project/(?!search)[^/]+$", "/project/{key}", path)
+
+
+def start_stub(config: StubConfig, port: int = 0) -> JiraStubServer:
+    """
+    Start the stub in a background thread; the bound port is
+    server.server_address[1].
+    """
+    server = JiraStubServer(("127.0.0.1", port), config)
+    threading.Thread(target=server.serve_forever, name="jira-stub", daemon=True).start()
+    return server
+
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(
+        seed=args.seed,
+        projects=args.projects,
+        issues=args.issues,
+        users=args.users,
+        max_worklogs_per_issue=args.max_worklogs,
+        start_date=args.start_date,
+        days=args.days,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        rate_burst=args.rate_burst,
+        error_rate=args.error_rate,
+    )
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = StubConfig()
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--issues", type=int, default=defaults.issues)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--max-worklogs", type=int, default=defaults.max_worklogs_per_issue)
+    parser.add_argument("--start-date", default=defaults.start_date)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--rate-limit", type=float, default=defaults.rate_limit, help="requests/s, 0 = unlimited")
+    parser.add_argument("--rate-burst", type=int, default=defaults.rate_burst)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="fraction answered with 503")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server = JiraStubServer(("127.0.0.1", args.port), config_from_args(args))
+    dataset = server.dataset
+    print(
+        f"[INFO] Jira stub on http://127.0.0.1:{args.port} "
+        f"({len(dataset.projects)} projects, {len(dataset.issues)} issues, {len(dataset.worklogs_by_id)} worklogs)"
+    )
+    server.serve_forever()
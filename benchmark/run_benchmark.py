@@ -0,0 +1,264 @@
+"""
+End-to-end benchmark of the report endpoints against the Jira stub.
+
+Every scenario runs in a fresh Python process (so peak RSS is its own)
+with GCS replaced by an in-memory bucket, and reports wall time, Jira HTTP
+calls, bytes transferred, peak RSS and the size of the uploaded files.
+
+    python benchmark/run_benchmark.py
+    python benchmark/run_benchmark.py --issues 5000 --latency-ms 30 --repeat 3 --output bench.json
+    JIRA_CONCURRENCY=16 python benchmark/run_benchmark.py --scenarios monthly
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jira_stub import add_stub_arguments, config_from_args, start_stub
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "BENCHMARK_RESULT "
+SCENARIOS = ["monthly", "project", "project_summary", "project_batch", "rollup", "backfill"]
+DEFAULT_SCENARIOS = ["monthly", "project"]
+
+
+# -------------------- 記憶體中的 GCS --------------------
+
+class MemoryWriter(io.BytesIO):
+    def __init__(self, blob) -> None:
+        super().__init__()
+        self.blob = blob
+
+    def close(self) -> None:
+        if not self.closed:
+            self.blob._store(self.getvalue())
+        super().close()
+
+
+class MemoryBlob:
+    def __init__(self, bucket, name: str) -> None:
+        self.bucket = bucket
+        self.name = name
+        self.metadata = None
+        self.content_type = None
+        self.content_encoding = None
+
+    def _store(self, data: bytes) -> None:
+        self.bucket.objects[self.name] = (data, self.metadata)
+
+    def upload_from_string(self, data, content_type=None) -> None:
+        self._store(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def upload_from_filename(self, filename: str, content_type=None) -> None:
+        with open(filename, "rb") as f:
+            self._store(f.read())
+
+    def open(self, mode: str = "rb", **kwargs):
+        return MemoryWriter(self)
+
+    def download_as_bytes(self) -> bytes:
+        return self.bucket.objects[self.name][0]
+
+    def exists(self) -> bool:
+        return self.name in self.bucket.objects
+
+    def reload(self) -> None:
+        pass
+
+    def delete(self) -> None:
+        self.bucket.objects.pop(self.name, None)
+
+
+class MemoryBucket:
+    def __init__(self) -> None:
+        self.objects = {}
+
+    def blob(self, name: str) -> MemoryBlob:
+        return MemoryBlob(self, name)
+
+    def get_blob(self, name: str):
+        if name not in self.objects:
+            return None
+        blob = MemoryBlob(self, name)
+        blob.metadata = self.objects[name][1]
+        return blob
+
+    def list_blobs(self, prefix: str = ""):
+        return [self.get_blob(name) for name in sorted(self.objects) if name.startswith(prefix)]
+
+
+class MemoryStorageClient:
+    buckets = {}
+
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def bucket(self, name: str) -> MemoryBucket:
+        return self.buckets.setdefault(name, MemoryBucket())
+
+
+# -------------------- 子程序：執行單一 scenario --------------------
+
+def run_scenario(scenario: str, args) -> dict:
+    from google.cloud import storage
+
+    storage.Client = MemoryStorageClient
+    sys.path.insert(0, REPO_ROOT)
+    import main
+
+    main.access_secret = lambda secret_name, version="latest": "benchmark"
+    runs = {
+        "monthly": lambda: main.post_monthlyReports(args.month_start, args.month_end, force=True),
+        "project": lambda: main.post_reportsByProjects(args.project_key),
+        "project_summary": lambda: main.post_reportsByProjects(args.project_key, summary_only=True),
+        "project_batch": lambda: main.get_projectBatchReports(category=args.category),
+        "rollup": lambda: main.get_monthlyRollup(args.month_start, args.month_end, force=True),
+        "backfill": lambda: main.get_monthlyBackfill(args.backfill_start, args.backfill_end, force=True),
+    }
+    started = time.perf_counter()
+    result = runs[scenario]()
+    wall = time.perf_counter() - started
+
+    bucket = MemoryStorageClient.buckets.get(os.environ["GCS_BUCKET"], MemoryBucket())
+    return {
+        "wall_seconds": round(wall, 3),
+        # Linux 的 ru_maxrss 單位為 KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "uploaded_files": len(bucket.objects),
+        "uploaded_bytes": sum(len(data) for data, _ in bucket.objects.values()),
+        "jira_session": main.get_jira_session().stats(),
+        "result": result,
+    }
+
+
+def child_main(args) -> None:
+    # 報表本身的 log 導向 stderr，stdout 只留下結果
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    result = run_scenario(args.child, args)
+    stdout.write(RESULT_PREFIX + json.dumps(result, default=str) + "\n")
+
+
+# -------------------- 主程序 --------------------
+
+def child_env(port: int, work_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        JIRA_DOMAIN=f"http://127.0.0.1:{port}",
+        GCS_BUCKET="benchmark-reports",
+        GCP_PROJECT_NUM="0",
+        JIRA_EMAIL_SECRET_NAME="benchmark-email",
+        JIRA_TOKEN_SECRET_NAME="benchmark-token",
+        # 每次執行使用新的鎖 / job / checkpoint 目錄，避免沿用前一次的結果
+        JIRA_LOCK_PATH=os.path.join(work_dir, "locks"),
+        JIRA_JOBS_PATH=os.path.join(work_dir, "jobs"),
+        JIRA_CHECKPOINT_PATH=os.path.join(work_dir, "checkpoints"),
+    )
+    # 預設不使用跨 request 快取，呼叫次數才可比較；可用環境變數覆寫
+    env.setdefault("JIRA_CACHE_PATH", "")
+    return env
+
+
+def run_once(server, scenario: str, args, argv: list) -> dict:
+    with tempfile.TemporaryDirectory(prefix="jira-bench-") as work_dir:
+        server.stats.reset()
+        command = [sys.executable, os.path.abspath(__file__), "--child", scenario, *argv]
+        completed = subprocess.run(
+            command,
+            env=child_env(server.server_address[1], work_dir),
+            stdout=subprocess.PIPE,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+            text=True,
+        )
+    lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"scenario {scenario} failed (exit code {completed.returncode}); rerun with --verbose")
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    stats = server.stats.snapshot()
+    result.update(
+        scenario=scenario,
+        http_calls=stats["requests"],
+        bytes_in=stats["bytes_in"],
+        bytes_out=stats["bytes_out"],
+        by_status=stats["by_status"],
+        by_endpoint=stats["by_endpoint"],
+    )
+    return result
+
+
+def print_table(results: list) -> None:
+    header = f"{'scenario':<16}{'wall s':>9}{'calls':>8}{'429':>6}{'5xx':>6}{'KB sent':>10}{'KB recv':>10}{'RSS MB':>9}{'out KB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        errors = sum(count for status, count in r["by_status"].items() if status.startswith("5"))
+        print(
+            f"{r['scenario']:<16}{r['wall_seconds']:>9.2f}{r['http_calls']:>8}{r['by_status'].get('429', 0):>6}"
+            f"{errors:>6}{r['bytes_in'] / 1024:>10.1f}{r['bytes_out'] / 1024:>10.1f}"
+            f"{r['peak_rss_mb']:>9.1f}{r['uploaded_bytes'] / 1024:>9.1f}"
+        )
+
+
+def parse_args(argv: list):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_stub_arguments(parser)
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help=f"comma separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--month-start", default="2024-06-01")
+    parser.add_argument("--month-end", default="2024-07-01")
+    parser.add_argument("--backfill-start", default="2024-02")
+    parser.add_argument("--backfill-end", default="2024-09")
+    parser.add_argument("--project-key", default="P1")
+    parser.add_argument("--category", default="Delivery")
+    parser.add_argument("--output", help="write all results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the report logs")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list) -> None:
+    args = parse_args(argv)
+    if args.child:
+        return child_main(args)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)}")
+
+    server = start_stub(config_from_args(args))
+    dataset = server.dataset
+    print(
+        f"[INFO] Jira stub: {len(dataset.projects)} projects, {len(dataset.issues)} issues, "
+        f"{len(dataset.worklogs_by_id)} worklogs, latency {args.latency_ms} ms"
+    )
+    results = []
+    try:
+        for scenario in scenarios:
+            for _ in range(args.repeat):
+                results.append(run_once(server, scenario, args, argv))
+    finally:
+        server.shutdown()
+
+    print_table(results)
+    if args.repeat > 1:
+        for scenario in scenarios:
+            walls = [r["wall_seconds"] for r in results if r["scenario"] == scenario]
+            print(f"[INFO] {scenario}: median wall {statistics.median(walls):.2f}s over {len(walls)} runs")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+        print(f"[SUCCESS] 結果已寫入 {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
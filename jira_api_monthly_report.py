@@ -1,12 +1,22 @@
-import requests
 from requests.auth import HTTPBasicAuth
-from datetime import datetime
-import logging
-import dateutil.parser
-from dateutil.parser import isoparse
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+from jira_http import JiraSession
+from jira_groups import GroupMembershipIndex
+from jira_cache import JiraCache
+from jira_projects import parse_project, search_projects
+from jira_search import (
+    SEARCH_MAX_RESULTS, DEFAULT_SEARCH_PARTITIONS, created_clause, get_created_boundaries, iter_partitioned_pages
+)
 
 
+# POST /worklog/list 每次最多接受 1000 個 ID
+WORKLOG_LIST_BATCH_SIZE = 1000
+
+# search/jql 解析 issue 時需要的欄位
+ISSUE_FIELDS = "summary,project,customfield_10001,customfield_10035,customfield_10142,customfield_10139"
+
 GROUPS = {
     "Executive Unit": [
         "AWS-TW","AWS-HK","GCP-TW","GWS-TW","Google-HK",
@@ -18,7 +28,9 @@ GROUPS = {
 
 class JiraMonthlyAPI:
 
-    def __init__(self, domain, email, token) -> None:
+    def __init__(
+        self, domain, email, token, session: JiraSession = None, cache: JiraCache = None
+    ) -> None:
         self.domain = domain
         self.email = email
         self.token = token
@@ -27,10 +39,13 @@ class JiraMonthlyAPI:
             "Content-Type": "application/json"
         }
         self.auth = HTTPBasicAuth(email, token)
+        self.session = session or JiraSession()
+        self.group_index = GroupMembershipIndex(self, GROUPS)
+        self.cache = cache
 
     def get_all_projects(self, raw: bool = False) -> list[dict]:
         url = f"{self.domain}/rest/api/3/project"
-        response = requests.get(url, headers=self.header, auth=self.auth)
+        response = self.session.get(url, headers=self.header, auth=self.auth)
         data = response.json()
         if raw:
             return data
@@ -53,7 +68,7 @@ class JiraMonthlyAPI:
 
         url = f"{self.domain}/rest/api/2/search"
         query = {"jql": f'project= "{project_id}"'}
-        response = requests.get(url, headers=self.header, params=query, auth=self.auth)
+        response = self.session.get(url, headers=self.header, params=query, auth=self.auth)
         data = response.json()
         if raw:
             return data
@@ -77,31 +92,41 @@ class JiraMonthlyAPI:
             parsed_list.append(parsed)
         return parsed_list
 
-    def get_worklog_from_issue_id(self, issue_id: str, raw: bool = False) -> list[dict]:
+    def get_worklog_from_issue_id(
+        self,
+        issue_id: str,
+        raw: bool = False,
+        start_date: str = None,
+        end_date: str = None,
+    ) -> list[dict]:
+          """
+          Get all worklogs of an issue (paginated).
+          When start_date/end_date are given, the window is sent to Jira as
+          startedAfter/startedBefore and worklogs outside
+          start_date <= started < end_date are dropped while parsing.
+          """
           worklogs = []
           start_at = 0
           max_results = 100
+          window = to_started_window(start_date, end_date)
+          lower_bound, upper_bound = to_date_bounds(start_date, end_date)
           while True:
               url = f"{self.domain}/rest/api/3/issue/{issue_id}/worklog"
-              query = {"startAt": start_at, "maxResults": max_results}
-              response = requests.get(url, headers=self.header, auth=self.auth, params=query)
+              query = {"startAt": start_at, "maxResults": max_results, **window}
+              response = self.session.get(url, headers=self.header, auth=self.auth, params=query)
               if response.status_code != 200:
                   print(f"[ERROR] /issue/{issue_id}/worklog：獲取失敗 ({response.status_code})")
-                  break
+                  # 重試用盡仍失敗時中止，避免報表少算工時
+                  raise RuntimeError(response.text)
               data = response.json()
-
-              batch = data.get("worklogs", [])
-              for worklog in batch:
-                  parsed = {
-                      "owner": worklog.get("author", {}).get("displayName"),
-                      "owner_id": worklog.get("author", {}).get("accountId"),
-                      "start_date": isoparse(worklog["started"]).date(),
-                      "time_spent_hr": worklog["timeSpentSeconds"] / 3600
-                  }
-                  worklogs.append(parsed)
+              if raw:
+                  worklogs.extend(data.get("worklogs", []))
+              else:
+                  batch = data.get("worklogs", [])
+                  worklogs.extend(parse_worklogs(batch, lower_bound, upper_bound))
 
               # 分頁判斷邏輯
-              if len(batch) < max_results:
+              if len(data.get("worklogs", [])) < max_results:
                   break
               start_at += max_results
 
@@ -111,31 +136,22 @@ class JiraMonthlyAPI:
         """
         Get user group information from user ID.
         The method extracts the user ID, executive unit, job level and job title.
-        The raw parameter can be set to True to return the raw json data.
+        Group memberships come from a GroupMembershipIndex built once from
+        /group/member, so this is a dictionary lookup after the first call.
+        The raw parameter can be set to True to return the raw /user json data.
         Returns a dictionary.
         """
-        url = f"{self.domain}/rest/api/3/user"
-
-        query = {"accountId": user_id, "expand": "groups,applicationRoles"}
-        response = requests.get(url, headers=self.header, params=query, auth=self.auth)
-        data = response.json()
         if raw:
-            return data
-
-        user_labels = {"user_id": user_id}
-        groups = GROUPS
-        
-        if "groups" in data and "items" in data["groups"]:
-            user_groups = [item["name"] for item in data["groups"]["items"]]
-            for category, names in groups.items():
-                for name in names:
-                    if name in user_groups:
-                        user_labels[category] = name
-        else:
-            logging.warning(f"No groups found for user ID: {user_id}")
-            user_labels["groups"] = None
-
-        return user_labels
+            url = f"{self.domain}/rest/api/3/user"
+            query = {"accountId": user_id, "expand": "groups,applicationRoles"}
+            response = self.session.get(url, headers=self.header, params=query, auth=self.auth)
+            return response.json()
+
+        if self.cache is None:
+            return self.group_index.get_user_labels(user_id)
+        return self.cache.get_or_load(
+            self.group_index.cache_namespace, user_id, lambda: self.group_index.get_user_labels(user_id)
+        )
    
     # ---------Extended functioanlities to get active issues ----------------
 
@@ -143,7 +159,7 @@ class JiraMonthlyAPI:
         self,
         start_date: str,
         end_date: str,
-        max_results: int = 50,
+        max_results: int = SEARCH_MAX_RESULTS,
         start_at: int = 0,
         raw: bool = False,
     ) -> list[dict]:
@@ -152,11 +168,36 @@ class JiraMonthlyAPI:
         Pagination considered.
         """
         issues = []
-        next_page_token = None
+        for page in self.iter_active_issue_pages(start_date, end_date, max_results, start_at, raw):
+            issues.extend(page)
+        return issues
+
+    def iter_active_issue_pages(
+        self,
+        start_date: str,
+        end_date: str,
+        max_results: int = SEARCH_MAX_RESULTS,
+        start_at: int = 0,
+        raw: bool = False,
+        created_range: tuple = (None, None),
+        next_page_token: str = None,
+        with_cursor: bool = False,
+    ):
+        """
+        Same as get_active_issues, but yields the issues one search/jql page
+        at a time so later stages can start before pagination finishes.
+        created_range restricts the search to one created window (see
+        iter_active_issue_pages_partitioned).
+        next_page_token starts from a cursor of an earlier search; with
+        with_cursor=True every page is yielded as (issues, next_page_token),
+        the token being None on the last page.
+        """
+        lower_bound, upper_bound = to_date_bounds(start_date, end_date)
+        jql_filter = active_issues_jql(start_date, end_date) + created_clause(*created_range)
         while True:
             query = {
-                "jql": f""" worklogDate >= "{start_date}" AND worklogDate < "{end_date}" ORDER BY created ASC, key ASC """,
-                "fields": "summary,project,worklog,customfield_10001,customfield_10035,customfield_10142,customfield_10139",
+                "jql": f""" {jql_filter} ORDER BY created ASC, key ASC """,
+                "fields": f"worklog,{ISSUE_FIELDS}",
                 "maxResults": max_results,
                 "startAt": start_at,
             }
@@ -164,7 +205,7 @@ class JiraMonthlyAPI:
                 query["nextPageToken"] = next_page_token
 
             url = f"{self.domain}/rest/api/3/search/jql"
-            response = requests.get(url, headers=self.header, auth=self.auth, params=query)
+            response = self.session.get(url, headers=self.header, auth=self.auth, params=query)
 
             if response.status_code != 200:
                 print(f"[ERROR] /search/jql：issues獲取失敗 ({response.status_code})")
@@ -175,187 +216,257 @@ class JiraMonthlyAPI:
             print(f"[DEBUG] next_page_token:{next_page_token}")
 
             if raw:
-                issues.extend(data["issues"])
+                parsed_list = data["issues"]
             else:
                 parsed_list = []
                 print(f"[INFO] 開始解析issues")
                 for issue in data["issues"]:
-                    parsed = {}
-                    parsed["issues_name"] = issue["fields"].get("summary")
-                    parsed["issues_key"] = issue.get("key")
-                    parsed["project_key"] = issue["fields"]["project"]["key"]
-                    if issue["fields"].get("customfield_10001"):
-                        parsed["issues_team"] = issue["fields"]["customfield_10001"]["name"]
-                    else:
-                        parsed["issues_team"] = None
-
-                    if issue["fields"].get("customfield_10035"):
-                        parsed["issues_status"] = issue["fields"]["customfield_10035"]["value"]
-                    else:
-                        parsed["issues_status"] = None
-
-                    # 抓取客製化欄位 10142 和 10139 的值
-                    parsed["customfield_10142"] = issue["fields"].get("customfield_10142")
-                    parsed["customfield_10139"] = safe_get_value(issue["fields"], "customfield_10139")
+                    parsed = parse_issue(issue)
+
+                    # 沿用 search 回傳的 worklog；若不完整則設為 None，之後再逐筆補抓
+                    parsed["worklogs"] = parse_embedded_worklogs(issue["fields"], lower_bound, upper_bound)
                     parsed_list.append(parsed)
-                issues.extend(parsed_list)
                 print(f"[INFO] 結束解析issues")
+            yield (parsed_list, next_page_token) if with_cursor else parsed_list
            
             # 分頁判斷邏輯
+            if not next_page_token:
+                break
+
+    def iter_active_issue_pages_partitioned(
+        self,
+        start_date: str,
+        end_date: str,
+        partitions: int = DEFAULT_SEARCH_PARTITIONS,
+        raw: bool = False,
+    ):
+        """
+        Parallel version of iter_active_issue_pages for very large ranges:
+        the search is split into created-date windows that are paged at the
+        same time, and the pages come out in created ASC, key ASC order.
+        """
+        boundaries = get_created_boundaries(self, active_issues_jql(start_date, end_date), partitions)
+        print(f"[INFO] search/jql 切成 {len(boundaries) + 1} 個 created 區間同時分頁")
+        return iter_partitioned_pages(
+            lambda lower, upper: self.iter_active_issue_pages(
+                start_date, end_date, raw=raw, created_range=(lower, upper)
+            ),
+            boundaries,
+        )
+
+    def get_issues_by_jql(self, jql: str, max_results: int = SEARCH_MAX_RESULTS) -> list[dict]:
+        """
+        Get all issues matching a JQL query (paginated).
+        Besides the usual report fields, each issue carries its numeric
+        issue_id and created timestamp.
+        """
+        issues = []
+        next_page_token = None
+        while True:
+            query = {
+                "jql": jql,
+                "fields": f"created,{ISSUE_FIELDS}",
+                "maxResults": max_results,
+            }
+            if next_page_token:
+                query["nextPageToken"] = next_page_token
+
+            url = f"{self.domain}/rest/api/3/search/jql"
+            response = self.session.get(url, headers=self.header, auth=self.auth, params=query)
+            if response.status_code != 200:
+                print(f"[ERROR] /search/jql：issues獲取失敗 ({response.status_code})")
+                raise PermissionError(response.text)
+
+            data = response.json()
+            for issue in data.get("issues", []):
+                issues.append({
+                    "issue_id": issue.get("id"),
+                    "created": issue["fields"].get("created"),
+                    **parse_issue(issue),
+                })
+
             next_page_token = data.get("nextPageToken")
             if not next_page_token:
                 break
 
         return issues
 
+    def get_issues_by_ids(self, issue_ids: list, chunk_size: int = 100) -> list[dict]:
+        """
+        Get issues by numeric ID, chunk_size IDs per JQL query.
+        """
+        issue_ids = list(issue_ids)
+        issues = []
+        for i in range(0, len(issue_ids), chunk_size):
+            chunk = issue_ids[i:i + chunk_size]
+            issues.extend(self.get_issues_by_jql(f"id in ({','.join(str(x) for x in chunk)})"))
+        return issues
+
     def get_project_info_by_key(self, project_key: str, raw: bool = False) -> dict:
         """
         Get project information by project key.
+        Parsed results are served from the shared cache when available.
         """
+        if not raw and self.cache is not None:
+            cached = self.cache.get("project", project_key)
+            if cached is not None:
+                return cached
+
         url = f"{self.domain}/rest/api/2/project/{project_key}"
-        response = requests.get(url, headers=self.header, auth=self.auth)
+        response = self.session.get(url, headers=self.header, auth=self.auth)
+        if response.status_code != 200:
+            # 查不到的 project 仍輸出報表（名稱留空），但不寫入快取，下次再查詢
+            print(f"[WARN] /project/{project_key}：project獲取失敗 ({response.status_code})")
+            if raw:
+                raise PermissionError(response.text)
+            return {"project_name": None, "project_key": project_key, "project_category": None}
         data = response.json()
         if raw:
             return data
-        project = {}
-        project["project_name"] = data.get("name")
-        project["project_key"] = data.get("key")
-        if data.get("projectCategory"):
-            project["project_category"] = data.get("projectCategory")["name"]
-        else:
-            project["project_category"] = None
+        project = parse_project(data)
+
+        if self.cache is not None:
+            self.cache.set("project", project_key, project)
         return project
 
-    def trace_project_info_by_issues(self, issues: list[dict]) -> list[dict]:
+    def get_projects_by_keys(self, project_keys: list, chunk_size: int = 50) -> dict:
         """
-        Get project information by issues.
+        Get project information for many keys at once (GET /project/search
+        with a keys filter, chunk_size keys per call).
+        Cached projects are not requested again.
+        Returns project_key -> project information.
         """
-        # group issues by projects into dictionary
-        project_grouping = {}
-        print(f"[INFO] 開始組合issues的project information")
-        for issue in issues:
-            project_key = issue["project_key"]
-            if project_key not in project_grouping:
-                project_grouping[project_key] = []
-            # pop project_key from issue
-            issue.pop("project_key")
-            project_grouping[project_key].append(issue)
-
-        projects = []
-        for project_key in project_grouping:
-            project = self.get_project_info_by_key(project_key)
-            project["issues"] = project_grouping[project_key]
-            projects.append(project)
-        return projects
+        return search_projects(self, keys=project_keys, max_results=chunk_size)
 
-    def get_worklogs_by_date_range(
-        self, start_date: str, end_date: str
-    ) -> list[dict]:
+    def get_worklogs_by_ids(self, worklog_ids: list, raw: bool = False) -> list[dict]:
         """
-        取得指定區間內的所有 worklog (使用 worklog/updated API)
-        調整重點：
-        1️⃣ 使用 /worklog/updated?since=start_date
-        2️⃣ 分頁抓所有 worklog IDs
-        3️⃣ 逐筆抓詳細資料
-        4️⃣ 篩選出 start_date <= worklog['started'] < end_date
+        Get up to WORKLOG_LIST_BATCH_SIZE worklogs in one call (POST /worklog/list).
         """
-        worklogs_all = []
-        since_timestamp = start_date + "T00:00:00.000+0000"
-        next_page = None
+        url = f"{self.domain}/rest/api/3/worklog/list"
+        payload = {"ids": list(worklog_ids)}
+        response = self.session.post(url, headers=self.header, auth=self.auth, json=payload)
+        if response.status_code != 200:
+            print(f"[ERROR] /worklog/list：{len(payload['ids'])} 筆 worklog 獲取失敗 ({response.status_code})")
+            raise RuntimeError(response.text)
+        data = response.json()
+        if raw:
+            return data
+        return [
+            {"issue_id": wl.get("issueId"), **parse_worklog(wl)}
+            for wl in data
+        ]
 
+    def get_updated_worklog_ids(self, since: int, on_ids=None) -> tuple[list, int]:
+        """
+        Get the IDs of all worklogs created or updated since a UNIX timestamp
+        in milliseconds (GET /worklog/updated, paginated).
+        on_ids(worklog_ids) is called with the IDs of every page as soon as
+        it arrives, e.g. to fetch their details while the next page loads.
+        Returns (worklog_ids, until), where until is the watermark to pass as
+        since on the next call.
+        """
+        return self._get_worklog_change_ids("updated", since, on_ids)
+
+    def get_deleted_worklog_ids(self, since: int) -> tuple[list, int]:
+        """
+        Same as get_updated_worklog_ids, for worklogs deleted since the
+        timestamp (GET /worklog/deleted).
+        """
+        return self._get_worklog_change_ids("deleted", since)
+
+    def _get_worklog_change_ids(self, change: str, since: int, on_ids=None) -> tuple[list, int]:
+        worklog_ids = []
+        until = since
+        url = f"{self.domain}/rest/api/3/worklog/{change}"
+        params = {"since": since}
         while True:
-            # ------------------ Step 1: GET /worklog/updated ------------------
-            url = f"{self.domain}/rest/api/3/worklog/updated"
-            params = {"since": since_timestamp}
-            if next_page:
-                url = next_page
-                params = None  # nextPage 已包含 query
-            response = requests.get(url, headers=self.header, auth=self.auth, params=params)
+            response = self.session.get(url, headers=self.header, auth=self.auth, params=params)
             if response.status_code != 200:
-                logging.warning(f"Failed to fetch updated worklogs: {response.text}")
-                break
+                print(f"[ERROR] /worklog/{change}：獲取失敗 ({response.status_code})")
+                raise RuntimeError(response.text)
             data = response.json()
+            page_ids = [w["worklogId"] for w in data.get("values", [])]
+            worklog_ids.extend(page_ids)
+            until = max(until, data.get("until") or until)
+            if on_ids is not None and page_ids:
+                on_ids(page_ids)
 
-            # ------------------ Step 2: 遍歷 worklog IDs ------------------
-            for w in data.get("values", []):
-                worklog_id = w["worklogId"]
-                issue_id = w["issueId"]
-
-                # ------------------ Step 3: 逐筆 GET /issue/{issueId}/worklog/{worklogId} ------------------
-                wl_url = f"{self.domain}/rest/api/3/issue/{issue_id}/worklog/{worklog_id}"
-                wl_resp = requests.get(wl_url, headers=self.header, auth=self.auth)
-                if wl_resp.status_code != 200:
-                    logging.warning(f"Failed to fetch worklog {worklog_id}: {wl_resp.text}")
-                    continue
-                wl_data = wl_resp.json()
-
-                # ------------------ Step 4: 篩選時間區間 ------------------
-                started = dateutil.parser.isoparse(wl_data["started"]).date()
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-                if start_dt <= started < end_dt:
-                    parsed = {
-                        "issue_id": issue_id,
-                        "worklog_id": worklog_id,
-                        "owner": wl_data.get("author", {}).get("displayName"),
-                        "owner_id": wl_data.get("author", {}).get("accountId"),
-                        "start_date": started,
-                        "time_spent_hr": wl_data.get("timeSpentSeconds", 0) / 3600,
-                    }
-                    worklogs_all.append(parsed)
-
-            # ------------------ Step 5: 分頁 ------------------
             next_page = data.get("nextPage")
-            if not next_page:
+            if data.get("lastPage", True) or not next_page:
                 break
+            url, params = next_page, None  # nextPage 已包含 query
+        return worklog_ids, until
 
-        return worklogs_all
+    def has_changes_since(self, since: int, start_date: str, end_date: str, index=None) -> bool:
+        """
+        Whether a report for start_date <= started < end_date may have
+        changed after a UNIX timestamp in milliseconds.
+        index (a ReportIndex of the existing report) narrows this down to
+        changes that touch the report: a worklog now in the period, or
+        updated / deleted while it was in the report, and an issue of the
+        period whose report fields differ. Without it, any deleted worklog
+        (Jira does not say which period it belonged to) or any update of an
+        issue with worklogs in the period counts as a change.
+        """
+        updated_ids, _ = self.get_updated_worklog_ids(since)
+        for i in range(0, len(updated_ids), WORKLOG_LIST_BATCH_SIZE):
+            for worklog in self.get_worklogs_by_ids(updated_ids[i:i + WORKLOG_LIST_BATCH_SIZE]):
+                if start_date <= started_date(worklog["started"]) < end_date:
+                    return True
+                # 原本在報表內、已改到區間外的 worklog
+                if index is not None and index.has_worklog(worklog["worklog_id"]):
+                    return True
+
+        deleted_ids, _ = self.get_deleted_worklog_ids(since)
+        if index is None and deleted_ids:
+            return True
+        if index is not None and any(index.has_worklog(worklog_id) for worklog_id in deleted_ids):
+            return True
+
+        # JQL 的絕對時間依使用者時區解讀，改用相對時間（分鐘）避免時區誤差
+        minutes = int((datetime.now(timezone.utc).timestamp() * 1000 - since) // 60000) + 1
+        jql = f'updated >= "-{minutes}m" AND worklogDate >= "{start_date}" AND worklogDate < "{end_date}"'
+        if index is not None:
+            # 只有報表中的 issue 欄位改變才需要重新產生
+            return any(index.issue_changed(issue) for issue in self.get_issues_by_jql(jql))
+        query = {"jql": jql, "fields": "updated", "maxResults": 1}
+        url = f"{self.domain}/rest/api/3/search/jql"
+        response = self.session.get(url, headers=self.header, auth=self.auth, params=query)
+        if response.status_code != 200:
+            print(f"[ERROR] /search/jql：issues獲取失敗 ({response.status_code})")
+            raise PermissionError(response.text)
+        return bool(response.json().get("issues"))
 
-def project_data_to_df(projects) -> pd.DataFrame:
-    """
-    將 Jira project + issues + worklogs 轉成 DataFrame。
-    自動整理欄位，生成 worklog_start_date 方便日期篩選。
-    """
-    if not projects:
-        return pd.DataFrame()  # 空 list 回傳空 DataFrame
-
-    # Step 1: 先 normalize project -> issues
-    df = pd.json_normalize(projects, record_path=['issues'], meta=['project_name', 'project_key', 'project_category'], errors='ignore')
-    
-    # Step 2: 將 worklogs explode
-    if 'worklogs' in df.columns:
-        df = df.explode('worklogs').reset_index(drop=True)
-        worklog_df = pd.json_normalize(df['worklogs']).add_prefix('worklog_')
-        df = pd.concat([df.drop(columns=['worklogs']), worklog_df], axis=1)
-    else:
-        df['worklog_owner_id'] = None
-        df['worklog_owner'] = None
-        df['worklog_start_date'] = pd.NaT
-        df['worklog_time_spent_hr'] = None
-
-    # Step 3: 改欄位名稱
-    df.rename(columns={
-        'customfield_10142': 'Parent_Key',
-        'customfield_10139': 'Worklog_Type',
-        'worklog_start_date': 'worklog_start_date',
-        'worklog_owner': 'worklog_owner',
-        'worklog_owner_id': 'worklog_owner_id',
-        'worklog_time_spent_hr': 'worklog_time_spent_hr'
-    }, inplace=True)
-
-    # Step 4: 確保 worklog_start_date 是 datetime
-    if 'worklog_start_date' in df.columns:
-        df['worklog_start_date'] = pd.to_datetime(df['worklog_start_date'], errors='coerce').dt.date
-    else:
-        df['worklog_start_date'] = pd.NaT
+    def get_worklogs_by_date_range(
+        self, start_date: str, end_date: str, max_workers: int = 4
+    ) -> list[dict]:
+        """
+        取得指定區間內的所有 worklog (使用 worklog/updated API)
+        調整重點：
+        1️⃣ 以 get_updated_worklog_ids 分頁取得 since=start_date 之後變更的 worklog IDs
+        2️⃣ 每頁的 ID 每 1000 筆以 POST /worklog/list 批次抓詳細資料，與下一頁 /worklog/updated 同時進行
+        3️⃣ 篩選出 start_date <= worklog['started'] < end_date
+        """
+        # /worklog/updated 的 since 參數為 UNIX 毫秒（往前放寬一天以涵蓋時區差）
+        since_timestamp = to_started_window(start_date)["startedAfter"]
+        batch_futures = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            def submit_batches(worklog_ids):
+                for i in range(0, len(worklog_ids), WORKLOG_LIST_BATCH_SIZE):
+                    batch_ids = worklog_ids[i:i + WORKLOG_LIST_BATCH_SIZE]
+                    batch_futures.append(executor.submit(self.get_worklogs_by_ids, batch_ids))
 
-    # Step 5: 將 Parent_Key 與 Worklog_Type 移到最後
-    project_cols = [c for c in df.columns if c.startswith('project_')]
-    other_cols = [c for c in df.columns if c not in project_cols + ['Parent_Key', 'Worklog_Type']]
-    final_cols = project_cols + other_cols + ['Parent_Key', 'Worklog_Type']
-    df = df[[c for c in final_cols if c in df.columns]] 
+            self.get_updated_worklog_ids(since_timestamp, on_ids=submit_batches)
 
-    return df
+            worklogs_all = []
+            for future in batch_futures:
+                for parsed in future.result():
+                    if start_date <= started_date(parsed["started"]) < end_date:
+                        worklogs_all.append(parsed)
+
+        return worklogs_all
 
 def filter_df_by_date(df, lower_bound: datetime.date, upper_bound: datetime.date) -> pd.DataFrame:
     """
@@ -370,9 +481,11 @@ def filter_df_by_date(df, lower_bound: datetime.date, upper_bound: datetime.date
             df["worklog_start_date"] = pd.NaT
 
     df = df.dropna(subset=["worklog_start_date"])
+    # worklog_start_date 為 datetime64，直接以向量化方式比較
+    start_dates = pd.to_datetime(df["worklog_start_date"])
     filtered_df = df[
-        (df["worklog_start_date"] >= lower_bound)
-        & (df["worklog_start_date"] < upper_bound)
+        (start_dates >= pd.Timestamp(lower_bound))
+        & (start_dates < pd.Timestamp(upper_bound))
     ]
     return filtered_df
 
@@ -382,7 +495,13 @@ def user_data_to_df(user_data: list[dict]) -> pd.DataFrame:
     Formats the user data from dictionary to pandas DataFrame.
     """
     user_data = list(user_data.values())
+    if not user_data:
+        # 沒有任何 worklog 使用者時仍保留合併用的欄位
+        return pd.DataFrame(columns=["worklog_owner_id"], dtype="str")
     user_df = pd.json_normalize(user_data)
+    # 固定欄位順序（依 GROUPS 類別），不受第一位使用者有哪些群組影響
+    ordered_cols = [c for c in ["user_id", *GROUPS] if c in user_df.columns]
+    user_df = user_df[ordered_cols + [c for c in user_df.columns if c not in ordered_cols]]
     user_df.rename(
         {
             "user_id": "worklog_owner_id",
@@ -395,6 +514,125 @@ def user_data_to_df(user_data: list[dict]) -> pd.DataFrame:
     )
     return user_df
 
+def active_issues_jql(start_date: str, end_date: str) -> str:
+    """
+    JQL filter (without ORDER BY) for issues with worklogs in the report window.
+    """
+    return f'worklogDate >= "{start_date}" AND worklogDate < "{end_date}"'
+
+def parse_issue(issue: dict) -> dict:
+    """
+    Parse one raw search/jql issue into the flat record used by the reports.
+    """
+    parsed = {}
+    parsed["issues_name"] = issue["fields"].get("summary")
+    parsed["issues_key"] = issue.get("key")
+    parsed["project_key"] = issue["fields"]["project"]["key"]
+    if issue["fields"].get("customfield_10001"):
+        parsed["issues_team"] = issue["fields"]["customfield_10001"]["name"]
+    else:
+        parsed["issues_team"] = None
+
+    if issue["fields"].get("customfield_10035"):
+        parsed["issues_status"] = issue["fields"]["customfield_10035"]["value"]
+    else:
+        parsed["issues_status"] = None
+
+    # 抓取客製化欄位 10142 和 10139 的值
+    parsed["customfield_10142"] = issue["fields"].get("customfield_10142")
+    parsed["customfield_10139"] = safe_get_value(issue["fields"], "customfield_10139")
+    return parsed
+
+def parse_worklog(worklog: dict) -> dict:
+    """
+    Parse one raw Jira worklog into the flat record used by the reports.
+    """
+    return {
+        "worklog_id": worklog.get("id"),
+        "owner": worklog.get("author", {}).get("displayName"),
+        "owner_id": worklog.get("author", {}).get("accountId"),
+        # 保留原始字串，建立 DataFrame 時再以 started_to_datetime 一次轉換
+        "started": worklog["started"],
+        "time_spent_hr": worklog.get("timeSpentSeconds", 0) / 3600
+    }
+
+def parse_worklogs(batch: list[dict], lower_bound=None, upper_bound=None) -> list[dict]:
+    """
+    Parse raw worklogs, keeping only lower_bound <= start date < upper_bound
+    when the bounds are given.
+    """
+    lower = lower_bound.isoformat() if lower_bound else None
+    upper = upper_bound.isoformat() if upper_bound else None
+    parsed_list = []
+    for worklog in batch:
+        parsed = parse_worklog(worklog)
+        day = started_date(parsed["started"])
+        if lower and day < lower:
+            continue
+        if upper and day >= upper:
+            continue
+        parsed_list.append(parsed)
+    return parsed_list
+
+def started_date(started: str) -> str:
+    """
+    Local calendar date ("YYYY-MM-DD") of a Jira started timestamp such as
+    "2024-06-03T09:00:00.000+0800"; same as isoparse(started).date(), and
+    comparable with "YYYY-MM-DD" strings.
+    """
+    return started[:10]
+
+def started_to_datetime(started) -> pd.Series:
+    """
+    Vectorized conversion of Jira started strings to datetime64 in the
+    worklog's own local time (the offset is dropped, as .date() did).
+    Missing values become NaT.
+    """
+    started = pd.Series(started, dtype="str")
+    return pd.to_datetime(started.str.slice(0, 19), format="%Y-%m-%dT%H:%M:%S", errors="coerce")
+
+def parse_embedded_worklogs(fields: dict, lower_bound=None, upper_bound=None):
+    """
+    Parse the worklogs embedded in a search/jql issue.
+    Jira only embeds the first page (usually 20) of an issue's worklogs,
+    so None is returned when worklog.total is larger than maxResults and
+    the caller must fall back to get_worklog_from_issue_id.
+    """
+    worklog_field = fields.get("worklog")
+    if not worklog_field:
+        return None
+    batch = worklog_field.get("worklogs", [])
+    total = worklog_field.get("total", len(batch))
+    if total > worklog_field.get("maxResults", len(batch)) or total > len(batch):
+        return None
+    return parse_worklogs(batch, lower_bound, upper_bound)
+
+def to_date_bounds(start_date: str = None, end_date: str = None):
+    """
+    Convert "YYYY-MM-DD" strings to (lower_bound, upper_bound) dates.
+    Missing values stay None.
+    """
+    lower_bound = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    upper_bound = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    return lower_bound, upper_bound
+
+def to_started_window(start_date: str = None, end_date: str = None) -> dict:
+    """
+    Build the startedAfter/startedBefore query (UNIX milliseconds) for the
+    worklog endpoint.
+    The window is widened by one day on each side because Jira compares in
+    UTC while the report buckets worklogs by their local start date; the
+    exact cut is done by parse_worklogs.
+    """
+    window = {}
+    if start_date:
+        lower = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) - timedelta(days=1)
+        window["startedAfter"] = int(lower.timestamp() * 1000)
+    if end_date:
+        upper = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+        window["startedBefore"] = int(upper.timestamp() * 1000)
+    return window
+
 def safe_get_value(field_dict, key):
     value = field_dict.get(key)
     if isinstance(value, dict):
@@ -1,10 +1,15 @@
-import requests
 from requests.auth import HTTPBasicAuth
-from datetime import datetime
 import logging
 import dateutil.parser
 from dateutil.parser import isoparse
 import pandas as pd
+from jira_http import JiraSession
+from jira_groups import GroupMembershipIndex
+from jira_cache import JiraCache
+from jira_projects import parse_project, search_projects
+from jira_search import (
+    SEARCH_MAX_RESULTS, DEFAULT_SEARCH_PARTITIONS, created_clause, get_created_boundaries, iter_partitioned_pages
+)
 
 GROUPS = {
     "Executive Unit": [
@@ -39,53 +44,102 @@ class JiraProjectAPI:
     A environment file is required to store the email and token.
     """
 
-    def __init__(self, domain, email, token) -> None:
+    def __init__(
+        self, domain, email, token, session: JiraSession = None, cache: JiraCache = None
+    ) -> None:
         self.domain = domain
         self.email = email
         self.token = token
         self.header = {"Accept": "application/json"}
         self.auth = HTTPBasicAuth(email, token)
+        self.session = session or JiraSession()
+        self.group_index = GroupMembershipIndex(self, GROUPS)
+        self.cache = cache
 
 
     # GET PROJECT NAME
     def get_one_project(self, key: str,raw: bool = False,) -> list[dict]:
 
+        # 共用快取（與月報表的 project 資訊相同格式）
+        if not raw and self.cache is not None:
+            cached = self.cache.get("project", key)
+            if cached is not None:
+                return [cached]
+
         url = f"{self.domain}/rest/api/3/project/{key}"
-        response = requests.get(url, headers=self.header, auth=self.auth)
+        response = self.session.get(url, headers=self.header, auth=self.auth)
+        if response.status_code != 200:
+            print(f"[ERROR] /project/{key}：project獲取失敗 ({response.status_code})")
+            raise PermissionError(response.text)
         data = response.json()
         if raw:
             return data
         parsed_list = []
-        parsed = {}
-        parsed["project_name"] = data.get("name")
-        parsed["project_key"] = data.get("key")
-        if data.get("projectCategory"):
-            parsed["project_category"] = data.get("projectCategory")["name"]
-        else:
-            parsed["project_category"] = None
+        parsed = parse_project(data)
         parsed_list.append(parsed)
+
+        if self.cache is not None:
+            self.cache.set("project", key, parsed)
         return parsed_list
 
+    # GET PROJECTS（多個專案 / 專案類別）
+    def get_projects(self, keys: list = None, category: str = None, max_results: int = 50) -> list[dict]:
+        """
+        Get the basic information of several projects with paged
+        /project/search calls instead of one /project/{key} call each.
+        With keys, returns them in the given order (cached projects are not
+        requested again) and raises ValueError for keys Jira does not know.
+        With category (name or ID), returns every project in that category.
+        """
+        projects = search_projects(self, keys=keys, category=category, max_results=max_results)
+        if keys is None:
+            return list(projects.values())
+        unknown = [key for key in dict.fromkeys(keys) if key not in projects]
+        if unknown:
+            raise ValueError(f"Projects not found: {', '.join(unknown)}")
+        return [projects[key] for key in dict.fromkeys(keys)]
+
     # GET ISSUE
     def get_issue_from_project_id(
         self,
         project_id: str,
-        max_results: int = 50,
+        max_results: int = SEARCH_MAX_RESULTS,
         start_at: int = 0,
         raw: bool = False
     ) -> list[dict]:
         """
         Get all issues from a given Jira project (with pagination support).
         """
+        issues = []
+        for page in self.iter_issue_pages_from_project_id(project_id, max_results, start_at, raw):
+            issues.extend(page)
+
+        print(f"[SUCCESS] 專案 {project_id} 總共取得 {len(issues)} 筆 Issues")
+        return issues
+
+    def iter_issue_pages_from_project_id(
+        self,
+        project_id: str,
+        max_results: int = SEARCH_MAX_RESULTS,
+        start_at: int = 0,
+        raw: bool = False,
+        created_range: tuple = (None, None),
+    ):
+        """
+        Same as get_issue_from_project_id, but yields the issues one
+        search/jql page at a time.
+        created_range restricts the search to one created window (see
+        iter_issue_pages_from_project_id_partitioned).
+        """
         print(f"[INFO] 開始取得專案 {project_id} 的 Issues（含分頁）")
 
-        issues = []
         next_page_token = None
+        jql_filter = f'project="{project_id}"' + created_clause(*created_range)
 
         while True:
             # Step 1️⃣ 組合查詢參數
             query = {
-                "jql": f'project="{project_id}" ORDER BY created ASC, key ASC',
+                "jql": f'{jql_filter} ORDER BY created ASC, key ASC',
                 # "fields": "summary,assignee,customfield_10001,customfield_10039",
                 "fields": "summary,assignee,customfield_10001,customfield_10035,customfield_10142,customfield_10139",
                 "maxResults": max_results,
@@ -97,7 +151,7 @@ class JiraProjectAPI:
             url = f"{self.domain}/rest/api/3/search/jql"
 
             # Step 2️⃣ 發送請求
-            response = requests.get(url, headers=self.header, auth=self.auth, params=query)
+            response = self.session.get(url, headers=self.header, auth=self.auth, params=query)
             if response.status_code != 200:
                 print(f"[ERROR] /search/jql：issues獲取失敗 ({response.status_code})")
                 raise PermissionError(response.text)
@@ -108,10 +162,10 @@ class JiraProjectAPI:
 
             # Step 3️⃣ 若使用 raw 模式，直接返回原始 JSON
             if raw:
-                issues.extend(data.get("issues", []))
+                yield data.get("issues", [])
             else:
                 parsed_list = []
-                print(f"[INFO] 開始解析 Issues（目前 startAt={start_at}）")
+                print(f"[INFO] 開始解析 Issues")
 
                 for issue in data.get("issues", []):
 
@@ -140,23 +194,42 @@ class JiraProjectAPI:
 
                     parsed_list.append(parsed)
 
-                issues.extend(parsed_list)
                 print(f"[INFO] 結束解析 Issues，本頁共 {len(parsed_list)} 筆")
+                yield parsed_list
 
             # Step 4️⃣ 檢查是否有下一頁
             if not next_page_token:
                 print(f"[INFO] 已到最後一頁，結束分頁查詢")
                 break
 
-            start_at += max_results
-
-        print(f"[SUCCESS] 專案 {project_id} 總共取得 {len(issues)} 筆 Issues")
-        return issues
+    def iter_issue_pages_from_project_id_partitioned(
+        self,
+        project_id: str,
+        partitions: int = DEFAULT_SEARCH_PARTITIONS,
+        raw: bool = False
+    ):
+        """
+        Parallel version of iter_issue_pages_from_project_id for very large
+        projects: the search is split into created-date windows that are
+        paged at the same time, and the pages come out in created ASC,
+        key ASC order.
+        """
+        boundaries = get_created_boundaries(self, f'project="{project_id}"', partitions)
+        print(f"[INFO] 專案 {project_id} 的 search/jql 切成 {len(boundaries) + 1} 個 created 區間同時分頁")
+        return iter_partitioned_pages(
+            lambda lower, upper: self.iter_issue_pages_from_project_id(
+                project_id, raw=raw, created_range=(lower, upper)
+            ),
+            boundaries,
+        )
 
     global issue_id
     def get_worklog_from_issue_id(self, issue_id: str, raw: bool = False) -> list[dict]:
         url = f"{self.domain}/rest/api/3/issue/{issue_id}/worklog"
-        response = requests.get(url, headers=self.header, auth=self.auth)
+        response = self.session.get(url, headers=self.header, auth=self.auth)
+        if response.status_code != 200:
+            print(f"[ERROR] /issue/{issue_id}/worklog：獲取失敗 ({response.status_code})")
+            raise RuntimeError(response.text)
         data = response.json()
 
         if raw:
@@ -171,37 +244,29 @@ class JiraProjectAPI:
             else:
                 parsed["owner"] = None
                 parsed["owner_id"] = None
-            parsed["start_date"] = datetime.strptime(
-                worklog["started"], "%Y-%m-%dT%H:%M:%S.%f%z"
-            ).date()
+            # 保留原始字串，建立 DataFrame 時再一次轉換為 datetime64
+            parsed["started"] = worklog["started"]
             parsed["time_spent_hr"] = worklog["timeSpentSeconds"] / 3600
             parsed_list.append(parsed)
         return parsed_list
 
     def get_user_group_info_from_user_id(self, user_id: str, raw: bool = False) -> dict:
-
-
+        """
+        Get user group information from user ID, using the group membership
+        index (one /group/member crawl per configured group).
+        The raw parameter can be set to True to return the raw /user json data.
+        """
+        if raw:
             url = f"{self.domain}/rest/api/3/user"
-
             query = {"accountId": user_id, "expand": "groups,applicationRoles"}
-            response = requests.get(url, headers=self.header, params=query, auth=self.auth)
-            data = response.json()
-
-            if raw:
-                return data
-
-            user_labels = {"user_id": user_id}
-            if "groups" in data and "items" in data["groups"]:
-                user_groups = [item["name"] for item in data["groups"]["items"]]
-                for category, names in GROUPS.items():
-                    for name in names:
-                        if name in user_groups:
-                            user_labels[category] = name
-            else:
-                logging.warning(f"No groups found for user ID: {user_id}")
-                user_labels["groups"] = None
-
-            return user_labels
+            response = self.session.get(url, headers=self.header, params=query, auth=self.auth)
+            return response.json()
+
+        if self.cache is None:
+            return self.group_index.get_user_labels(user_id)
+        return self.cache.get_or_load(
+            self.group_index.cache_namespace, user_id, lambda: self.group_index.get_user_labels(user_id)
+        )
 
 def process_worklogs(issue, user_data, Jira):
     for worklog in issue["worklogs"]:
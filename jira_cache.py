@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CACHE_TTL = 6 * 3600
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at);
+"""
+
+
+class JiraCache:
+    """
+    Cross-request cache for Jira metadata (user group labels, projects).
+    Entries live in a SQLite file so every gunicorn worker on the instance
+    shares them; each entry expires after ttl seconds and the least
+    recently used entries are evicted beyond max_entries.
+    Cache failures are logged and treated as misses, never as report errors.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, namespace: str, name: str) -> None:
+        with self._stats_lock:
+            counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters[name] += 1
+
+    def get(self, namespace: str, key: str):
+        """
+        Returns the cached value, or None when missing or expired.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, now),
+            ).fetchone()
+            if row is not None:
+                with conn:
+                    conn.execute(
+                        "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key),
+                    )
+        except sqlite3.Error as e:
+            logging.warning(f"Cache read failed ({namespace}:{key}): {e}")
+            row = None
+
+        self._count(namespace, "hits" if row is not None else "misses")
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, namespace: str, key: str, value) -> None:
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), now + self.ttl, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logging.warning(f"Cache write failed ({namespace}:{key}): {e}")
+
+    def get_or_load(self, namespace: str, key: str, loader):
+        """
+        Returns the cached value, calling loader() and caching its result on a miss.
+        """
+        value = self.get(namespace, key)
+        if value is None:
+            value = loader()
+            self.set(namespace, key, value)
+        return value
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            """
+            DELETE FROM cache WHERE rowid IN (
+                SELECT rowid FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters of this worker per namespace, plus the number of
+        entries currently shared in the cache file.
+        """
+        with self._stats_lock:
+            namespaces = {name: dict(counters) for name, counters in self._stats.items()}
+        try:
+            entries = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "hits": sum(c["hits"] for c in namespaces.values()),
+            "misses": sum(c["misses"] for c in namespaces.values()),
+            "entries": entries,
+            "namespaces": namespaces,
+        }
@@ -0,0 +1,212 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+DEFAULT_CONCURRENCY = 8
+# 背景預先抓取的 search/jql 頁數上限
+DEFAULT_PREFETCH_PAGES = 4
+
+
+class WorklogFetcher:
+    """
+    Bounded-concurrency fan-out of worklog and user lookups.
+    Worklogs of many issues are fetched at once through a thread pool, and
+    every new worklog author is looked up exactly once while the remaining
+    worklog fetches are still running.
+    Results are written back in the original issue order, so the output
+    does not depend on which request finishes first.
+    """
+
+    def __init__(
+        self,
+        jira_api,
+        max_workers: int = DEFAULT_CONCURRENCY,
+        start_date: str = None,
+        end_date: str = None,
+    ) -> None:
+        self.jira_api = jira_api
+        self.max_workers = max(1, max_workers)
+        # 報表區間，傳給 get_worklog_from_issue_id 由 Jira 端先過濾
+        self.worklog_kwargs = {}
+        if start_date or end_date:
+            self.worklog_kwargs = {"start_date": start_date, "end_date": end_date}
+        # 使用者查詢實際送出的 Jira 請求數（含群組成員索引分頁與重試，快取命中為 0）
+        self.user_calls = 0
+        self._user_calls_lock = threading.Lock()
+
+    def fetch_pages(
+        self, pages, issue_key_field: str = "issues_key", on_page=None, on_issue_done=None, on_issue_ready=None
+    ) -> tuple[list, dict]:
+        """
+        Fill issue["worklogs"] for the issues of an iterator of issue pages
+        (e.g. one search/jql page at a time), starting to fetch worklogs as
+        soon as each page arrives. Issues that already carry a complete
+        "worklogs" list (e.g. embedded in the search/jql response) are not
+        fetched again; only their owners are looked up.
+        The next page is only pulled when fewer than 2 * max_workers worklog
+        fetches are in flight, so a slow fetch stage holds back the search
+        instead of piling up work in memory.
+        on_page(page) is called for every page before its issues are queued,
+        on_issue_done(issue) once the worklogs of an issue are available.
+        on_issue_ready(issue) is called in page order, as soon as an issue and
+        all issues before it have their worklogs; it may take the worklogs
+        out of the issue (e.g. into a WorklogTable) to free them early.
+        Returns (issues in page order, user_data); the Jira requests made
+        for the user lookups are added to user_calls.
+        """
+        issues = []
+        user_futures = {}
+        # 依 issue 順序記錄 worklog 使用者（dict 當作有序 set），確保輸出結果固定
+        user_order = {}
+        ready = 0
+        pending = {}
+        # 控制同時排隊的 worklog 請求數量，讓 user 查詢可以插隊執行
+        window = self.max_workers * 2
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+
+            def submit_users(issue):
+                for wl in issue["worklogs"]:
+                    user_id = wl.get("owner_id")
+                    if user_id and user_id not in user_futures:
+                        user_futures[user_id] = executor.submit(self.get_user, user_id)
+
+            def collect(done):
+                for future in done:
+                    issue = pending.pop(future)
+                    issue["worklogs"] = future.result()
+                    submit_users(issue)
+                    if on_issue_done is not None:
+                        on_issue_done(issue)
+                advance()
+
+            def advance():
+                nonlocal ready
+                while ready < len(issues) and issues[ready].get("worklogs") is not None:
+                    issue = issues[ready]
+                    for wl in issue["worklogs"]:
+                        if wl.get("owner_id"):
+                            user_order.setdefault(wl["owner_id"])
+                    ready += 1
+                    if on_issue_ready is not None:
+                        on_issue_ready(issue)
+
+            for page in pages:
+                if on_page is not None:
+                    on_page(page)
+                for issue in page:
+                    issues.append(issue)
+                    if issue.get("worklogs") is not None:
+                        submit_users(issue)
+                        if on_issue_done is not None:
+                            on_issue_done(issue)
+                        continue
+                    future = executor.submit(
+                        self.jira_api.get_worklog_from_issue_id, issue[issue_key_field], **self.worklog_kwargs
+                    )
+                    pending[future] = issue
+                    if len(pending) >= window:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                advance()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            user_data = {user_id: user_futures[user_id].result() for user_id in user_order}
+            return issues, user_data
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+    def get_user(self, user_id: str) -> dict:
+        """
+        get_user_group_info_from_user_id, counting the Jira requests it
+        sends into user_calls.
+        """
+        session = self.jira_api.session
+        before = session.thread_requests()
+        try:
+            return self.jira_api.get_user_group_info_from_user_id(user_id)
+        finally:
+            calls = session.thread_requests() - before
+            with self._user_calls_lock:
+                self.user_calls += calls
+
+
+def prefetch_pages(pages, max_pages: int = DEFAULT_PREFETCH_PAGES):
+    """
+    Run a page iterator (e.g. iter_active_issue_pages) in a background
+    thread so the next search pages are fetched while the current ones
+    are processed.
+    At most max_pages pages are buffered; errors from the iterator are
+    re-raised in the consumer.
+    """
+    buffer = queue.Queue(maxsize=max_pages)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(("page", page)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+
+    producer = threading.Thread(target=produce, name="jira-page-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, item = buffer.get()
+            if kind == "page":
+                yield item
+            elif kind == "error":
+                raise item
+            else:
+                return
+    finally:
+        stop.set()
+
+
+class ProjectInfoResolver:
+    """
+    Resolves project metadata in the background while issue pages are
+    still being fetched.
+    Every page's new project keys are sent as one bulk
+    get_projects_by_keys call on the given executor.
+    """
+
+    def __init__(self, jira_api, executor) -> None:
+        self.jira_api = jira_api
+        self.executor = executor
+        self._seen = set()
+        self._futures = []
+
+    def add_issues(self, issues: list[dict]) -> None:
+        new_keys = [
+            key for key in dict.fromkeys(issue["project_key"] for issue in issues) if key not in self._seen
+        ]
+        if new_keys:
+            self._seen.update(new_keys)
+            self._futures.append(self.executor.submit(self.jira_api.get_projects_by_keys, new_keys))
+
+    def result(self) -> dict:
+        """
+        Waits for all lookups and returns project_key -> project information.
+        """
+        project_info = {}
+        for future in self._futures:
+            project_info.update(future.result())
+        return project_info
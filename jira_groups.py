@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+
+# 群組成員名單的有效時間（秒），過期後重新向 Jira 取得
+DEFAULT_INDEX_MAX_AGE = 3600
+
+
+class GroupMembershipIndex:
+    """
+    accountId -> {category: group name} index built from /group/member.
+    Instead of one /user?expand=groups call per worklog author, every
+    configured group is paged once and each user lookup becomes a
+    dictionary hit, so API calls scale with the number of groups.
+    When a user belongs to several groups of one category, the last one
+    listed in the config wins, as with the per-user lookup.
+    """
+
+    def __init__(self, jira_api, groups: dict, max_age: float = DEFAULT_INDEX_MAX_AGE) -> None:
+        self.jira_api = jira_api
+        self.groups = groups
+        self.max_age = max_age
+        self._index = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def cache_namespace(self) -> str:
+        """
+        Cache namespace for user labels; differs per GROUPS config so that
+        the monthly and project reports never read each other's labels.
+        """
+        config = json.dumps(self.groups, ensure_ascii=False, sort_keys=True)
+        return f"user_groups:{hashlib.sha1(config.encode('utf-8')).hexdigest()[:12]}"
+
+    def get_user_labels(self, user_id: str) -> dict:
+        """
+        Returns {"user_id": ..., <category>: <group name>, ...} for the user.
+        """
+        index = self._get_index()
+        return {"user_id": user_id, **index.get(user_id, {})}
+
+    def _get_index(self) -> dict:
+        with self._lock:
+            if self._index is None or time.time() - self._built_at > self.max_age:
+                self._index = self._build_index()
+                self._built_at = time.time()
+            return self._index
+
+    def _build_index(self) -> dict:
+        index = {}
+        for category, names in self.groups.items():
+            for name in names:
+                for account_id in self.get_group_member_ids(name):
+                    index.setdefault(account_id, {})[category] = name
+        print(f"[INFO] 群組成員索引建立完成，共 {len(index)} 位使用者")
+        return index
+
+    def get_group_member_ids(self, group_name: str, max_results: int = 50) -> list[str]:
+        """
+        Get the account IDs of all members of a group (paginated).
+        """
+        api = self.jira_api
+        url = f"{api.domain}/rest/api/3/group/member"
+        member_ids = []
+        start_at = 0
+        while True:
+            query = {
+                "groupname": group_name,
+                "includeInactiveUsers": "true",
+                "startAt": start_at,
+                "maxResults": max_results,
+            }
+            response = api.session.get(url, headers=api.header, auth=api.auth, params=query)
+            if response.status_code == 404:
+                logging.warning(f"Group not found: {group_name}")
+                return member_ids
+            if response.status_code != 200:
+                print(f"[ERROR] /group/member：{group_name} 獲取失敗 ({response.status_code})")
+                raise RuntimeError(response.text)
+            data = response.json()
+
+            batch = data.get("values", [])
+            member_ids.extend(member["accountId"] for member in batch)
+
+            # 分頁判斷邏輯
+            if data.get("isLast", True) or not batch:
+                break
+            start_at += len(batch)
+        return member_ids
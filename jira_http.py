@@ -0,0 +1,97 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from jira_ratelimit import AdaptiveRateLimiter, DEFAULT_RATE_LIMIT, is_throttled
+
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+# 限流（429、帶 Retry-After 的 503）可重試的次數上限（依 Retry-After 等待後再試）
+MAX_THROTTLE_RETRIES = 10
+
+
+class JiraSession(requests.Session):
+    """
+    Shared HTTP transport for JiraMonthlyAPI and JiraProjectAPI.
+    Keeps a keep-alive connection pool to the Jira domain and asks Jira
+    for gzip responses.
+    Every request goes through an AdaptiveRateLimiter: 429 and 5xx answers
+    are retried after Retry-After / jittered backoff (up to
+    MAX_THROTTLE_RETRIES times when Jira throttles, max_retries times
+    otherwise), and connection errors are retried by urllib3.
+    One instance is meant to be created per worker and reused across requests.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+    ) -> None:
+        super().__init__()
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.limiter = AdaptiveRateLimiter(rate=rate_limit, max_concurrency=pool_size)
+        # urllib3 只負責連線 / 讀取錯誤；HTTP 狀態碼的重試由 limiter 處理
+        retry = Retry(
+            total=max_retries,
+            status=0,
+            backoff_factor=backoff_factor,
+            # /worklog/list 是唯讀查詢，雖然是 POST 也可以安全重試
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers.update({"Accept-Encoding": "gzip, deflate"})
+        # 每個執行緒各自累計送出的請求數（含重試），見 thread_requests
+        self._local = threading.local()
+
+    def request(self, method, url, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self._local.requests = getattr(self._local, "requests", 0) + 1
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            finally:
+                self.limiter.release()
+
+            delay = self.limiter.on_response(response, attempt)
+            if delay is None:
+                return response
+            max_attempts = MAX_THROTTLE_RETRIES if is_throttled(response) else self.max_retries
+            if attempt >= max_attempts:
+                print(f"[ERROR] {method} {url}：重試 {attempt} 次後仍失敗 ({response.status_code})")
+                return response
+
+            print(f"[WARN] {method} {url}：{response.status_code}，{delay:.1f} 秒後重試")
+            self.limiter.record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+    def thread_requests(self) -> int:
+        """
+        Number of requests (retries included) sent so far by the calling
+        thread; the difference around a call gives the Jira calls that call
+        made even while other threads share the session.
+        """
+        return getattr(self._local, "requests", 0)
+
+    def stats(self) -> dict:
+        """
+        Request / throttling counters of this worker (see AdaptiveRateLimiter.stats).
+        """
+        return self.limiter.stats()
@@ -0,0 +1,64 @@
+def parse_project(data: dict) -> dict:
+    """
+    Project information as used in the reports, from a Jira project JSON
+    (/project/{key} or a /project/search value).
+    """
+    project = {}
+    project["project_name"] = data.get("name")
+    project["project_key"] = data.get("key")
+    if data.get("projectCategory"):
+        project["project_category"] = data.get("projectCategory")["name"]
+    else:
+        project["project_category"] = None
+    return project
+
+
+def search_projects(jira_api, keys: list = None, category: str = None, max_results: int = 50) -> dict:
+    """
+    Get project information with paged GET /project/search calls
+    (expand=projectCategory), for JiraMonthlyAPI and JiraProjectAPI alike.
+    With keys, only those projects are requested (max_results keys per
+    call) and cached ones are served from jira_api.cache; without keys,
+    every project is listed and those in category (name or ID) are kept.
+    Returns project_key -> project information; keys Jira does not know
+    are left out.
+    """
+    cache = jira_api.cache
+    projects = {}
+    missing_keys = []
+    for key in dict.fromkeys(keys or []):
+        cached = cache.get("project", key) if cache is not None else None
+        if cached is not None:
+            projects[key] = cached
+        else:
+            missing_keys.append(key)
+
+    url = f"{jira_api.domain}/rest/api/3/project/search"
+    # keys 分批查詢；category 則逐頁列出所有專案再依類別篩選
+    chunks = [missing_keys[i:i + max_results] for i in range(0, len(missing_keys), max_results)]
+    for chunk in chunks if keys is not None else [None]:
+        start_at = 0
+        while True:
+            query = {"startAt": start_at, "maxResults": max_results, "expand": "projectCategory"}
+            if chunk is not None:
+                query["keys"] = chunk
+            response = jira_api.session.get(url, headers=jira_api.header, auth=jira_api.auth, params=query)
+            if response.status_code != 200:
+                print(f"[ERROR] /project/search：project獲取失敗 ({response.status_code})")
+                raise PermissionError(response.text)
+            data = response.json()
+
+            for data_project in data.get("values", []):
+                project_category = data_project.get("projectCategory") or {}
+                if chunk is None and category not in (project_category.get("name"), project_category.get("id")):
+                    continue
+                project = parse_project(data_project)
+                projects[project["project_key"]] = project
+                if cache is not None:
+                    cache.set("project", project["project_key"], project)
+
+            # 分頁判斷邏輯
+            if data.get("isLast", True) or not data.get("values"):
+                break
+            start_at += len(data["values"])
+    return projects
@@ -0,0 +1,240 @@
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+# 0 = 不限速，直到 Jira 回應限流才開始控制速率
+DEFAULT_RATE_LIMIT = 0.0
+MIN_RATE_LIMIT = 0.5
+# 限流時降速的比例（multiplicative decrease）
+DECREASE_FACTOR = 0.5
+# 限流後每個成功回應增加的 req/s 與並行數（每秒 / 每個 window 約成長 1.5 倍），
+# 直到回到被限流時的 RECOVERY_RATIO；之後每秒 / 每個 window 只再增加約 1
+INCREASE_STEP = 0.5
+RECOVERY_RATIO = 0.9
+# 估計目前實際送出速率的時間窗（秒），第一次被限流時以此為起點降速
+RATE_WINDOW_SECONDS = 1.0
+# 一般退避等待的上限秒數
+MAX_BACKOFF_SECONDS = 60.0
+# X-RateLimit-Remaining 低於此比例時視為接近上限，提前降速
+NEAR_LIMIT_RATIO = 0.1
+
+
+class AdaptiveRateLimiter:
+    """
+    Shared client-side limiter for every Jira call of a worker.
+    Requests are not paced until Jira throttles (429, or 503 with
+    Retry-After): the rate then drops to half of what was actually being
+    sent, the number of requests in flight is halved (at most once per
+    RATE_WINDOW_SECONDS), and both grow back by INCREASE_STEP per
+    successful response up to RECOVERY_RATIO of where Jira throttled, then
+    by about one per second / per window. A X-RateLimit-NearLimit / X-RateLimit-Remaining
+    warning only stops the growth. rate caps the requests per second even
+    when Jira does not throttle (0 = no cap).
+    Retry-After / X-RateLimit-Reset pause every caller until Jira accepts
+    requests again; other 5xx answers are retried by their caller alone
+    with jittered exponential backoff and do not slow anyone down.
+    stats()["throttled_seconds"] is the time this worker was paused by
+    Jira, counted once however many threads were waiting.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, max_concurrency: int = 20) -> None:
+        self.max_rate = max(rate, MIN_RATE_LIMIT) if rate > 0 else None
+        self.max_concurrency = max(1, max_concurrency)
+        # None = 目前不限速
+        self.rate = self.max_rate
+        self.concurrency = float(self.max_concurrency)
+        self._tokens = self.rate or 0.0
+        self._last_refill = time.monotonic()
+        self._sent = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        # 上次被限流時的速率與並行數，快速回升到這裡為止
+        self._recovery_rate = 0.0
+        self._recovery_concurrency = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "requests": 0,
+            "throttled_responses": 0,
+            "server_errors": 0,
+            "retries": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    # -------------------- 取得 / 釋放 --------------------
+
+    def acquire(self) -> None:
+        """
+        Blocks until a concurrency slot and, when the rate is limited, a
+        token are available.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._in_flight >= int(self.concurrency):
+                    delay = None
+                elif self.rate is not None and self._tokens < 1:
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    if self.rate is not None:
+                        self._tokens -= 1
+                    self._in_flight += 1
+                    self._stats["requests"] += 1
+                    self._sent.append(now)
+                    # 順便移除時間窗外的紀錄
+                    self._sent_rate(now)
+                    return
+                self._cond.wait(timeout=delay)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _sent_rate(self, now: float) -> float:
+        while self._sent and self._sent[0] < now - RATE_WINDOW_SECONDS:
+            self._sent.popleft()
+        return len(self._sent) / RATE_WINDOW_SECONDS
+
+    # -------------------- 回應處理 --------------------
+
+    def on_response(self, response, attempt: int):
+        """
+        Adjust the limits from a response.
+        Returns the number of seconds to wait before retrying, or None when
+        the response should be returned to the caller.
+        """
+        status = response.status_code
+        with self._cond:
+            if is_throttled(response):
+                if status == 429:
+                    self._stats["throttled_responses"] += 1
+                else:
+                    self._stats["server_errors"] += 1
+                self._decrease()
+                delay = retry_after_seconds(response.headers)
+                if delay is None:
+                    delay = backoff_seconds(attempt)
+                # 所有呼叫端一起暫停，直到 Jira 允許的時間；暫停時間只計算一次
+                now = time.monotonic()
+                blocked_until = max(self._blocked_until, now + delay)
+                self._stats["throttled_seconds"] += blocked_until - max(self._blocked_until, now)
+                self._blocked_until = blocked_until
+                self._cond.notify_all()
+                return delay
+            if status >= 500:
+                # 偶發的伺服器錯誤只讓這個呼叫退避重試，不降速
+                self._stats["server_errors"] += 1
+                return backoff_seconds(attempt)
+
+            # 接近上限時只停止增加
+            if not is_near_limit(response.headers):
+                self._increase()
+            return None
+
+    def record_retry(self) -> None:
+        with self._cond:
+            self._stats["retries"] += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # 同時送出的請求會一起收到 429，一個時間窗內只降速一次
+        if now - self._last_decrease < RATE_WINDOW_SECONDS:
+            return
+        self._last_decrease = now
+        # 原本不限速時，以實際送出的速率為起點
+        current = self.rate if self.rate is not None else self._sent_rate(now)
+        self._recovery_rate = current * RECOVERY_RATIO
+        self._recovery_concurrency = self.concurrency * RECOVERY_RATIO
+        self.rate = max(MIN_RATE_LIMIT, current * DECREASE_FACTOR)
+        self.concurrency = max(1.0, self.concurrency * DECREASE_FACTOR)
+        self._tokens = min(self._tokens, max(self.rate, 1.0))
+
+    def _increase(self) -> None:
+        if self.concurrency < self._recovery_concurrency:
+            self.concurrency += INCREASE_STEP
+        else:
+            self.concurrency += 1 / self.concurrency
+        self.concurrency = min(self.max_concurrency, self.concurrency)
+        if self.rate is None:
+            return
+        self.rate += INCREASE_STEP if self.rate < self._recovery_rate else 1 / self.rate
+        now = time.monotonic()
+        if self.max_rate is not None:
+            self.rate = min(self.max_rate, self.rate)
+        elif now - self._blocked_until > RATE_WINDOW_SECONDS and self.rate > 2 * self._sent_rate(now) + 1:
+            # 暫停結束已超過一個時間窗，且速率上限遠高於實際送出的速率：恢復為不限速
+            self.rate = None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "throttled_seconds": round(self._stats["throttled_seconds"], 3),
+                "rate_limit": round(self.rate, 3) if self.rate is not None else None,
+                "concurrency_limit": int(self.concurrency),
+                "in_flight": self._in_flight,
+            }
+
+
+def is_throttled(response) -> bool:
+    """
+    429, or 503 with Retry-After: Jira asking every caller to slow down.
+    """
+    if response.status_code == 429:
+        return True
+    return response.status_code == 503 and "Retry-After" in response.headers
+
+
+def retry_after_seconds(headers):
+    """
+    Seconds to wait according to Retry-After (seconds or HTTP date) or
+    X-RateLimit-Reset (ISO timestamp); None when neither is present.
+    """
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+            return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+        except ValueError:
+            pass
+    return None
+
+
+def is_near_limit(headers) -> bool:
+    if headers.get("X-RateLimit-NearLimit", "").lower() == "true":
+        return True
+    try:
+        remaining = float(headers["X-RateLimit-Remaining"])
+        limit = float(headers["X-RateLimit-Limit"])
+    except (KeyError, ValueError):
+        return False
+    return limit > 0 and remaining / limit < NEAR_LIMIT_RATIO
+
+
+def backoff_seconds(attempt: int, base: float = 0.5) -> float:
+    """
+    Exponential backoff with full jitter.
+    """
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base * 2 ** attempt))
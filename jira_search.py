@@ -0,0 +1,132 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dateutil.parser import isoparse
+
+
+# search/jql 每頁筆數：取 API 允許的最大值，Jira 會依要求的欄位自動縮減
+SEARCH_MAX_RESULTS = 5000
+# 切成幾個 created 區間同時分頁查詢（1 = 不切割）
+DEFAULT_SEARCH_PARTITIONS = 1
+# 多專案報表同時分頁查詢的專案數
+DEFAULT_PROJECT_SEARCHES = 4
+# 每個來源最多先讀取幾頁等待輸出，避免較後面的來源把整個結果暫存在記憶體
+SEARCH_BUFFER_PAGES = 2
+
+
+def created_clause(lower: str = None, upper: str = None) -> str:
+    """
+    JQL fragment restricting created to [lower, upper); either side may be open.
+    """
+    clause = ""
+    if lower:
+        clause += f' AND created >= "{lower}"'
+    if upper:
+        clause += f' AND created < "{upper}"'
+    return clause
+
+
+def get_created_boundaries(jira_api, jql_filter: str, partitions: int) -> list[str]:
+    """
+    Split the created range of the issues matching jql_filter into
+    `partitions` equal time windows.
+    Returns the inner boundaries in JQL date format ("yyyy/MM/dd HH:mm");
+    the first window is open below and the last open above, so every issue
+    falls into exactly one window whatever timezone Jira applies.
+    """
+    if partitions <= 1:
+        return []
+    first = _get_edge_created(jira_api, jql_filter, "ASC")
+    last = _get_edge_created(jira_api, jql_filter, "DESC")
+    if not first or not last:
+        return []
+
+    lower, upper = isoparse(first), isoparse(last)
+    step = (upper - lower) / partitions
+    boundaries = []
+    for i in range(1, partitions):
+        boundary = (lower + step * i).strftime("%Y/%m/%d %H:%M")
+        if boundary not in boundaries:
+            boundaries.append(boundary)
+    return boundaries
+
+
+def _get_edge_created(jira_api, jql_filter: str, direction: str):
+    url = f"{jira_api.domain}/rest/api/3/search/jql"
+    query = {
+        "jql": f"{jql_filter} ORDER BY created {direction}",
+        "fields": "created",
+        "maxResults": 1,
+    }
+    response = jira_api.session.get(url, headers=jira_api.header, auth=jira_api.auth, params=query)
+    if response.status_code != 200:
+        print(f"[ERROR] /search/jql：created 範圍獲取失敗 ({response.status_code})")
+        raise PermissionError(response.text)
+    issues = response.json().get("issues", [])
+    return issues[0]["fields"].get("created") if issues else None
+
+
+def iter_partitioned_pages(make_pages, boundaries: list[str], max_workers: int = None):
+    """
+    Page every created window at the same time and yield the pages window
+    by window, so the merged stream keeps the ORDER BY created ASC, key ASC
+    order of a single search.
+    make_pages(lower, upper) must return the page iterator of one window.
+    Pages of later windows are buffered until earlier windows are done.
+    """
+    slices = list(zip([None, *boundaries], [*boundaries, None]))
+    return iter_pages_in_order(
+        [lambda lower=lower, upper=upper: make_pages(lower, upper) for lower, upper in slices], max_workers
+    )
+
+
+def iter_pages_in_order(page_sources: list, max_workers: int = None):
+    """
+    Run several page iterators at the same time and yield their pages
+    source by source, in the order of page_sources.
+    Each entry of page_sources is a callable returning one page iterator
+    (e.g. one project's search); at most max_workers of them are paged at
+    once, and up to SEARCH_BUFFER_PAGES pages of later sources are
+    buffered until earlier sources are done.
+    """
+    if not page_sources:
+        return
+    queues = [queue.Queue(maxsize=SEARCH_BUFFER_PAGES) for _ in page_sources]
+    stop = threading.Event()
+
+    def put(index, item) -> bool:
+        # 佇列已滿時等待輸出；呼叫端停止讀取後放棄
+        while not stop.is_set():
+            try:
+                queues[index].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(index, make_pages):
+        try:
+            for page in make_pages():
+                if not put(index, ("page", page)):
+                    return
+            put(index, ("done", None))
+        except BaseException as e:
+            put(index, ("error", e))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(page_sources), thread_name_prefix="jira-search")
+    try:
+        for index, make_pages in enumerate(page_sources):
+            executor.submit(run, index, make_pages)
+        for source_queue in queues:
+            while True:
+                kind, item = source_queue.get()
+                if kind == "page":
+                    yield item
+                elif kind == "error":
+                    raise item
+                else:
+                    break
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -3,13 +3,31 @@ from datetime import datetime
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, validator
 import pandas as pd
-from jira_api_monthly_report import JiraMonthlyAPI, GROUPS, project_data_to_df, filter_df_by_date, user_data_to_df
+from jira_api_monthly_report import JiraMonthlyAPI, GROUPS, filter_df_by_date, user_data_to_df
 from jira_api_project_report import JiraProjectAPI
+from jira_http import JiraSession, DEFAULT_POOL_SIZE, DEFAULT_MAX_RETRIES
+from jira_ratelimit import DEFAULT_RATE_LIMIT
+from jira_fetcher import WorklogFetcher, ProjectInfoResolver, prefetch_pages, DEFAULT_CONCURRENCY
+from worklog_store import WorklogStore
+from jira_cache import JiraCache, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_ENTRIES
+from jira_search import DEFAULT_SEARCH_PARTITIONS, DEFAULT_PROJECT_SEARCHES, iter_pages_in_order
+from report_jobs import ReportJobManager, ReportProgress, DEFAULT_JOB_WORKERS, open_job_store
+from single_flight import SingleFlight
+from report_reuse import (
+    find_reusable_report, report_metadata, current_watermark, ReportIndex, save_report_index, delete_old_report_indexes
+)
+from report_upload import upload_csv, csv_object_name, DEFAULT_UPLOAD_WORKERS
+from report_excel import upload_workbook, upload_workbooks
+from worklog_table import WorklogTable, group_rows_by_project
+from worklog_summary import OwnerMonthSummary, OwnerTeamRollup
+from run_checkpoint import (
+    RunCheckpoint, CheckpointedJiraAPI, CheckpointMismatchError, open_checkpoint_store, validate_run_id
+)
 from google.cloud import storage
 from google.cloud import secretmanager
 from datetime import date, datetime
 import calendar
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
 # 建立 FastAPI App
 app = FastAPI()
@@ -33,6 +51,150 @@ def access_secret(secret_name: str, version: str = "latest") -> str:
         print(f"Failed to access secret {secret_name}: {e}")
         raise
 
+# -----------------------------------
+# 共用 HTTP 連線池：每個 worker 只建立一次
+#     環境變數：
+#         JIRA_POOL_SIZE : 連線池大小（預設 20）
+#         JIRA_MAX_RETRIES : 暫時性錯誤的重試次數（預設 3）
+#         JIRA_RATE_LIMIT : 每秒最多送出的請求數，0 為不限速；遇到 429 會自動降速（預設 0）
+# -----------------------------------
+jira_session = None
+def get_jira_session() -> JiraSession:
+    global jira_session
+    if jira_session is None:
+        pool_size = int(os.environ.get("JIRA_POOL_SIZE", DEFAULT_POOL_SIZE))
+        max_retries = int(os.environ.get("JIRA_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        rate_limit = float(os.environ.get("JIRA_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+        jira_session = JiraSession(pool_size=pool_size, max_retries=max_retries, rate_limit=rate_limit)
+        print(
+            f"[INFO] Jira HTTP session initialized "
+            f"(pool_size={pool_size}, max_retries={max_retries}, rate_limit={rate_limit})"
+        )
+    return jira_session
+
+# -----------------------------------
+# 同時對 Jira 發出的請求數量
+#     環境變數：
+#         JIRA_CONCURRENCY : worklog / user 並行抓取數量（預設 8）
+# -----------------------------------
+def get_jira_concurrency() -> int:
+    return int(os.environ.get("JIRA_CONCURRENCY", DEFAULT_CONCURRENCY))
+
+# -----------------------------------
+# search/jql 切割查詢
+#     環境變數：
+#         JIRA_SEARCH_PARTITIONS : 依 created 切成幾個區間同時分頁（預設 1，不切割）
+# -----------------------------------
+def get_search_partitions() -> int:
+    return int(os.environ.get("JIRA_SEARCH_PARTITIONS", DEFAULT_SEARCH_PARTITIONS))
+
+# -----------------------------------
+# 月報表 CSV 是否以 gzip 壓縮上傳
+#     環境變數：
+#         JIRA_CSV_GZIP : true 時上傳 jiraReport_*.csv.gz（Content-Encoding: gzip，預設 false）
+# -----------------------------------
+def get_csv_gzip() -> bool:
+    return os.environ.get("JIRA_CSV_GZIP", "false").lower() in ("1", "true", "yes")
+
+# -----------------------------------
+# 跨 request / 跨 worker 共用的 Jira 快取（user 群組、project 資訊）
+#     環境變數：
+#         JIRA_CACHE_PATH : SQLite 快取檔路徑（預設 /tmp/jira_cache.sqlite，設為空字串則停用）
+#         JIRA_CACHE_TTL : 快取有效秒數（預設 21600）
+#         JIRA_CACHE_MAX_ENTRIES : 快取筆數上限（預設 10000）
+# -----------------------------------
+jira_cache = None
+def get_jira_cache():
+    global jira_cache
+    path = os.environ.get("JIRA_CACHE_PATH", "/tmp/jira_cache.sqlite")
+    if not path:
+        return None
+    if jira_cache is None:
+        ttl = float(os.environ.get("JIRA_CACHE_TTL", DEFAULT_CACHE_TTL))
+        max_entries = int(os.environ.get("JIRA_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES))
+        jira_cache = JiraCache(path, ttl=ttl, max_entries=max_entries)
+        print(f"[INFO] Jira cache initialized: {path} (ttl={ttl}, max_entries={max_entries})")
+    return jira_cache
+
+# -----------------------------------
+# 本地 worklog store（選用）
+#     環境變數：
+#         JIRA_STORE_PATH : SQLite 檔案路徑，設定後月報表改由 store 增量同步產生
+# -----------------------------------
+worklog_store = None
+def get_worklog_store():
+    global worklog_store
+    path = os.environ.get("JIRA_STORE_PATH")
+    if not path:
+        return None
+    if worklog_store is None:
+        worklog_store = WorklogStore(path)
+        print(f"[INFO] Worklog store initialized: {path}")
+    return worklog_store
+
+# -----------------------------------
+# 背景報表 job（POST 建立，GET /jobs/{job_id} 查詢進度）
+#     環境變數：
+#         JIRA_JOBS_PATH : job 狀態檔目錄，或 gs://bucket/prefix 讓多個 instance 共用（預設 /tmp/jira_jobs）
+#         JIRA_JOB_WORKERS : 每個 worker 同時執行的報表 job 數量（預設 2）
+# -----------------------------------
+job_manager = None
+def get_job_manager() -> ReportJobManager:
+    global job_manager
+    if job_manager is None:
+        path = os.environ.get("JIRA_JOBS_PATH", "/tmp/jira_jobs")
+        max_workers = int(os.environ.get("JIRA_JOB_WORKERS", DEFAULT_JOB_WORKERS))
+        job_manager = ReportJobManager(
+            open_job_store(path), max_workers=max_workers, count_calls=lambda: get_jira_session().stats()["requests"]
+        )
+        print(f"[INFO] Report job manager initialized: {path} (max_workers={max_workers})")
+    return job_manager
+
+# -----------------------------------
+# 相同報表同時被要求時只產生一次（同一 instance 的所有 worker 共用）
+#     環境變數：
+#         JIRA_LOCK_PATH : 報表鎖與結果檔目錄（預設 /tmp/jira_locks）
+# -----------------------------------
+single_flight = None
+def get_single_flight() -> SingleFlight:
+    global single_flight
+    if single_flight is None:
+        path = os.environ.get("JIRA_LOCK_PATH", "/tmp/jira_locks")
+        single_flight = SingleFlight(path)
+        print(f"[INFO] Report single-flight initialized: {path}")
+    return single_flight
+
+# -----------------------------------
+# 可續跑的報表 run（指定 run_id 時，進度寫入 checkpoint，失敗後以相同 run_id 重試即從中斷處繼續）
+#     環境變數：
+#         JIRA_CHECKPOINT_PATH : checkpoint 目錄，或 gs://bucket/prefix 存到 GCS（預設 /tmp/jira_checkpoints）
+# -----------------------------------
+checkpoint_store = None
+def get_checkpoint(run_id: str, params: dict, state: dict = None):
+    global checkpoint_store
+    if not run_id:
+        return None
+    if checkpoint_store is None:
+        path = os.environ.get("JIRA_CHECKPOINT_PATH", "/tmp/jira_checkpoints")
+        checkpoint_store = open_checkpoint_store(path)
+        print(f"[INFO] Run checkpoint store initialized: {path}")
+    return RunCheckpoint(checkpoint_store, run_id, params, state)
+
+def check_run_id(run_id: str) -> None:
+    if run_id is None:
+        return
+    try:
+        validate_run_id(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def check_date_range(start_date: str, end_date: str) -> None:
+    try:
+        datetime.strptime(start_date, "%Y-%m-%d")
+        datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
 # -----------------------------------
 # JIRA API & 初始化
 # -----------------------------------
@@ -69,11 +231,13 @@ def init_jira_api(api_type: str):
     jira_token = access_secret(f"projects/{project_id}/secrets/{token_secret}")
     print(f"[INFO] jira_token :{jira_token} ")
 
-    # 動態建立不同的 Jira API 類別
+    # 動態建立不同的 Jira API 類別（共用同一個連線池）
+    session = get_jira_session()
+    cache = get_jira_cache()
     if api_type == "monthly":
-        api_instance = JiraMonthlyAPI(domain, jira_email, jira_token)
+        api_instance = JiraMonthlyAPI(domain, jira_email, jira_token, session=session, cache=cache)
     elif api_type == "project":
-        api_instance = JiraProjectAPI(domain, jira_email, jira_token)
+        api_instance = JiraProjectAPI(domain, jira_email, jira_token, session=session, cache=cache)
     else:
         raise ValueError(f"Unknown api_type: {api_type}")
 
@@ -82,33 +246,65 @@ def init_jira_api(api_type: str):
     return api_instance
 
 # -----------------------------------
-# 月報表生成函數
+# 月報表資料：直接向 Jira 爬取
 # -----------------------------------
-def generate_report(start_date: str, end_date: str):
-    jira_api = init_jira_api("monthly")
-    print(f"Fetching issues from {start_date} to {end_date}")
+def build_report_df_from_jira(
+    jira_api,
+    start_date: str,
+    end_date: str,
+    progress: ReportProgress,
+    group_projects: bool = True,
+    checkpoint: RunCheckpoint = None,
+) -> pd.DataFrame:
+    print(f"Step 1~3: 串流處理 issues → worklogs / user info（同時在背景批次取得 project 資訊）")
+    progress.stage("fetching_issues")
+    fetcher = WorklogFetcher(
+        CheckpointedJiraAPI(jira_api, checkpoint) if checkpoint is not None else jira_api,
+        max_workers=get_jira_concurrency(),
+        start_date=start_date,
+        end_date=end_date,
+    )
+    # worklog 依 issue 順序直接寫入欄位式的 table，不保留巢狀的 dict
+    table = WorklogTable(
+        issue_columns=["issues_name", "issues_key", "issues_team", "issues_status"],
+        extra_columns={"customfield_10142": "Parent_Key", "customfield_10139": "Worklog_Type"},
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        project_resolver = ProjectInfoResolver(jira_api, executor)
+        partitions = get_search_partitions()
+        if checkpoint is not None:
+            # 續跑需要接續 search 的 cursor，因此不切割查詢
+            pages = prefetch_pages(checkpoint.iter_pages(
+                lambda next_page_token: jira_api.iter_active_issue_pages(
+                    start_date, end_date, next_page_token=next_page_token, with_cursor=True
+                )
+            ))
+        elif partitions > 1:
+            pages = jira_api.iter_active_issue_pages_partitioned(start_date, end_date, partitions)
+        else:
+            pages = prefetch_pages(jira_api.iter_active_issue_pages(start_date, end_date))
+        try:
+            issues, user_data = fetcher.fetch_pages(
+                pages,
+                on_page=project_resolver.add_issues,
+                on_issue_done=lambda issue: progress.add_issues(),
+                on_issue_ready=lambda issue: table.append_issue(issue, issue.pop("worklogs")),
+            )
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()
+        project_info = project_resolver.result()
+    print(f"[INFO] 總共取得 {len(issues)} 筆 active issues，{len(user_data)} 位 worklog 使用者")
 
-    print(f"Step 1: 取得 issues")
-    issues = jira_api.get_active_issues(start_date, end_date)
-    print(f"[INFO] 總共取得 {len(issues)} 筆 active issues")
-
-    print(f"Step 2: issues 轉成 projects 結構")
-    projects = jira_api.trace_project_info_by_issues(issues)
-    print(f"[INFO] 對應到 {len(projects)} 個 project")
-
-    
-    print(f"Step 3: 逐一補上每個 issue 的 worklogs 與 user info")
-    user_data = {}
-    for project in projects:
-        for issue in project["issues"]:
-            issue["worklogs"] = jira_api.get_worklog_from_issue_id(issue["issues_key"])
-            for wl in issue["worklogs"]:
-                user_id = wl.get("owner_id")
-                if user_id and user_id not in user_data:
-                    user_data[user_id] = jira_api.get_user_group_info_from_user_id(user_id)
+    # 背景批次查詢沒有取得的 project 才逐一查詢
+    for project_key in table.project_keys():
+        if project_key not in project_info:
+            project_info[project_key] = jira_api.get_project_info_by_key(project_key)
+    print(f"[INFO] 對應到 {len(table.project_keys())} 個 project")
 
     print(f"Step 4: 轉換為 DataFrame")
-    df = project_data_to_df(projects)
+    progress.stage("building_dataframe")
+    df = table.to_frame(project_info, group_projects)
     user_df = user_data_to_df(user_data)
     df = pd.merge(df, user_df, on="worklog_owner_id", how="left")
     print(f"[INFO] 最終資料筆數含 worklogs：{len(df)}")
@@ -118,13 +314,315 @@ def generate_report(start_date: str, end_date: str):
     end = datetime.strptime(end_date, "%Y-%m-%d").date()
     filtered_df = filter_df_by_date(df, start, end)
     print(f"[INFO] 過濾後筆數：{len(filtered_df)}")
+    return filtered_df
+
+# -----------------------------------
+# 月報表資料：由本地 worklog store 增量同步後查詢
+# -----------------------------------
+def build_report_df_from_store(
+    jira_api, store: WorklogStore, start_date: str, end_date: str, progress: ReportProgress, sync: bool = True
+) -> pd.DataFrame:
+    # 先檢查日期格式，格式錯誤時拋出 ValueError
+    datetime.strptime(start_date, "%Y-%m-%d")
+    datetime.strptime(end_date, "%Y-%m-%d")
+
+    if sync:
+        print(f"Step 1: 增量同步 worklog store")
+        progress.stage("syncing_store")
+        sync_stats = store.sync(jira_api, start_date, max_workers=get_jira_concurrency())
+        progress.add_issues(sync_stats["issues_refreshed"])
+
+    print(f"Step 2: 由 store 查詢區間內的 worklogs")
+    progress.stage("building_dataframe")
+    df = store.get_report_df(start_date, end_date)
+    print(f"[INFO] 區間內 worklog 筆數：{len(df)}")
+
+    print(f"Step 3: 補上 user info")
+    progress.stage("fetching_users")
+    user_data = store.get_user_data(jira_api, df["worklog_owner_id"], max_workers=get_jira_concurrency())
+    user_df = user_data_to_df(user_data)
+    df = pd.merge(df, user_df, on="worklog_owner_id", how="left")
+    print(f"[INFO] 共 {len(user_data)} 位 worklog 使用者")
+    return df
+
+# -----------------------------------
+# 上傳月報表 CSV（jiraReport_{start}_{end}.csv）
+#     報表內容索引（worklog ID、issue 欄位）一併存入 GCS，之後 Jira 有異動時只有影響到報表才重新產生
+# -----------------------------------
+def upload_monthly_csv(bucket, start_date: str, end_date: str, df: pd.DataFrame, watermark: int, compress: bool) -> str:
+    filename = csv_object_name(f"jiraReport_{start_date}_{end_date}.csv", compress=compress)
+    index_name = save_report_index(bucket, filename, ReportIndex.from_frame(df), watermark)
+    upload_csv(
+        bucket,
+        f"jiraReport_{start_date}_{end_date}.csv",
+        df.drop(columns=["worklog_id"]),
+        metadata=report_metadata(len(df), watermark, index_name),
+        compress=compress,
+    )
+    delete_old_report_indexes(bucket, filename, keep=index_name)
+    return filename
+
+# -----------------------------------
+# 月報表生成函數
+#     相同區間的報表同時被要求時，共用同一次產生的結果
+#     已結束的區間若 GCS 上已有報表且 Jira 無異動，直接沿用（force=True 強制重新產生）
+# -----------------------------------
+def generate_report(
+    start_date: str, end_date: str, progress: ReportProgress = None, force: bool = False, run_id: str = None
+):
+    progress = progress or ReportProgress()
+    return get_single_flight().do(
+        "monthly",
+        {"start_date": start_date, "end_date": end_date, "force": force},
+        lambda: build_report(start_date, end_date, progress, force, run_id),
+        on_wait=lambda: progress.stage("waiting_for_identical_report"),
+    )
+
+def build_report(
+    start_date: str, end_date: str, progress: ReportProgress, force: bool = False, run_id: str = None
+):
+    jira_api = init_jira_api("monthly")
+    filename = csv_object_name(f"jiraReport_{start_date}_{end_date}.csv", compress=get_csv_gzip())
+    client = storage.Client()
+    bucket = client.bucket(GCS_BUCKET)
+
+    if not force:
+        progress.stage("checking_existing_report")
+        metadata = find_reusable_report(bucket, filename, jira_api, start_date, end_date)
+        if metadata is not None:
+            return {
+                "message": "Report reused",
+                "filename": filename,
+                "generated_at": metadata.get("generated_at"),
+                "row_count": int(metadata.get("row_count", 0)),
+            }
+
+    store = get_worklog_store()
+    # store 本身即為增量同步，只有直接抓取 Jira 時才需要 checkpoint
+    checkpoint = None
+    if store is None:
+        checkpoint = get_checkpoint(run_id, {"report": "monthly", "start_date": start_date, "end_date": end_date})
+
+    # 在抓取資料前記錄時間點，產生期間的異動也會讓下次重新產生；續跑時沿用第一次執行的時間點
+    watermark = current_watermark() if checkpoint is None else int(checkpoint.started_at * 1000)
+    print(f"Fetching issues from {start_date} to {end_date}")
+
+    if store is not None:
+        filtered_df = build_report_df_from_store(jira_api, store, start_date, end_date, progress)
+    else:
+        filtered_df = build_report_df_from_jira(jira_api, start_date, end_date, progress, checkpoint=checkpoint)
 
     print(f"Step 6: 輸出檔案並存入GCS")
-    filename = f"jiraReport_{start_date}_{end_date}.csv"
+    progress.stage("uploading")
+    upload_monthly_csv(bucket, start_date, end_date, filtered_df, watermark, get_csv_gzip())
+    print(f"[SUCCESS] 輸出檔案")
+    if checkpoint is not None:
+        checkpoint.delete()
+
+    return {"message": "Report generated", "filename": filename}
+
+# -----------------------------------
+# 多個月份的月報表一次重新產生（backfill）
+#     整個區間只抓取一次 Jira，再依月份切開，各月份平行上傳
+#     輸出與逐月呼叫 /reports/monthly 相同的 jiraReport_{start}_{end}.csv
+# -----------------------------------
+def month_ranges(start_month: str, end_month: str) -> list[tuple[str, str]]:
+    """
+    [(first day, first day of next month), ...] for every month from
+    start_month to end_month ("YYYY-MM", both included).
+    """
+    try:
+        first = datetime.strptime(start_month, "%Y-%m").date()
+        last = datetime.strptime(end_month, "%Y-%m").date()
+    except ValueError:
+        raise ValueError("Invalid month format")
+    if first > last:
+        raise ValueError("start_month must not be after end_month")
+    ranges = []
+    while first <= last:
+        next_first = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        ranges.append((first.strftime("%Y-%m-%d"), next_first.strftime("%Y-%m-%d")))
+        first = next_first
+    return ranges
+
+def generate_backfill_report(
+    start_month: str, end_month: str, progress: ReportProgress = None, force: bool = False, run_id: str = None
+):
+    progress = progress or ReportProgress()
+    return get_single_flight().do(
+        "monthly_backfill",
+        {"start_month": start_month, "end_month": end_month, "force": force},
+        lambda: build_backfill_report(start_month, end_month, progress, force, run_id),
+        on_wait=lambda: progress.stage("waiting_for_identical_report"),
+    )
+
+def build_backfill_report(
+    start_month: str, end_month: str, progress: ReportProgress, force: bool = False, run_id: str = None
+):
+    months = month_ranges(start_month, end_month)
+    jira_api = init_jira_api("monthly")
     client = storage.Client()
     bucket = client.bucket(GCS_BUCKET)
-    blob = bucket.blob(filename)
-    blob.upload_from_string(filtered_df.to_csv(index=False, encoding="utf-8-sig"), content_type="text/csv; charset=utf-8")
+    compress = get_csv_gzip()
+
+    # 已結束且 Jira 無異動的月份沿用既有報表，其餘月份才重新產生
+    reports = {}
+    pending = []
+    if not force:
+        progress.stage("checking_existing_report")
+    for start_date, end_date in months:
+        filename = csv_object_name(f"jiraReport_{start_date}_{end_date}.csv", compress=compress)
+        metadata = None if force else find_reusable_report(bucket, filename, jira_api, start_date, end_date)
+        if metadata is not None:
+            reports[start_date] = {
+                "message": "Report reused",
+                "filename": filename,
+                "generated_at": metadata.get("generated_at"),
+                "row_count": int(metadata.get("row_count", 0)),
+            }
+        else:
+            pending.append((start_date, end_date))
+
+    checkpoint = None
+    if pending:
+        # 只抓取一次涵蓋所有需重新產生月份的區間
+        crawl_start, crawl_end = pending[0][0], pending[-1][1]
+        store = get_worklog_store()
+        if store is None:
+            checkpoint = get_checkpoint(
+                run_id,
+                {"report": "monthly_backfill", "start_month": start_month, "end_month": end_month},
+                state={"start_date": crawl_start, "end_date": crawl_end},
+            )
+        if checkpoint is not None:
+            # 續跑時沿用第一次執行的抓取區間（之前已上傳的月份可能已改為沿用）
+            saved = checkpoint.state
+            if not saved["start_date"] <= crawl_start or not crawl_end <= saved["end_date"]:
+                raise CheckpointMismatchError(
+                    f"run_id {run_id} covers {saved['start_date']} ~ {saved['end_date']}, "
+                    f"but {crawl_start} ~ {crawl_end} must be regenerated; use a new run_id"
+                )
+            crawl_start, crawl_end = saved["start_date"], saved["end_date"]
+        watermark = current_watermark() if checkpoint is None else int(checkpoint.started_at * 1000)
+        print(f"Backfilling {len(pending)} months, fetching issues from {crawl_start} to {crawl_end}")
+
+        if store is not None:
+            print(f"Step 1: 增量同步 worklog store")
+            progress.stage("syncing_store")
+            sync_stats = store.sync(jira_api, crawl_start, max_workers=get_jira_concurrency())
+            progress.add_issues(sync_stats["issues_refreshed"])
+        else:
+            # 先不依 project 分組，切成各月份後再分組，順序才會與單月報表相同
+            full_df = build_report_df_from_jira(
+                jira_api, crawl_start, crawl_end, progress, group_projects=False, checkpoint=checkpoint
+            )
+
+        print(f"Step 6: 依月份切分並平行上傳")
+        progress.stage("uploading")
+        with ThreadPoolExecutor(max_workers=DEFAULT_UPLOAD_WORKERS) as executor:
+            uploads = {}
+            for start_date, end_date in pending:
+                if store is not None:
+                    month_df = build_report_df_from_store(jira_api, store, start_date, end_date, progress, sync=False)
+                else:
+                    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+                    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+                    month_df = group_rows_by_project(filter_df_by_date(full_df, start, end))
+                print(f"[INFO] {start_date} ~ {end_date}：{len(month_df)} 筆")
+                uploads[start_date] = (
+                    executor.submit(upload_monthly_csv, bucket, start_date, end_date, month_df, watermark, compress),
+                    len(month_df),
+                )
+            for start_date, (future, row_count) in uploads.items():
+                reports[start_date] = {"message": "Report generated", "filename": future.result(), "row_count": row_count}
+        print(f"[SUCCESS] 輸出 {len(pending)} 個月份的檔案")
+        if checkpoint is not None:
+            checkpoint.delete()
+
+    return {
+        "message": "Backfill completed",
+        "months_generated": len(pending),
+        "months_reused": len(months) - len(pending),
+        "reports": [reports[start_date] for start_date, _ in months],
+    }
+
+# -----------------------------------
+# 月工時彙總（每位成員 x issue team）生成函數
+#     不建立逐筆 worklog 的 DataFrame，worklog 在抓取時即累計
+# -----------------------------------
+def generate_rollup_report(start_date: str, end_date: str, progress: ReportProgress = None, force: bool = False):
+    progress = progress or ReportProgress()
+    return get_single_flight().do(
+        "monthly_rollup",
+        {"start_date": start_date, "end_date": end_date, "force": force},
+        lambda: build_rollup_report(start_date, end_date, progress, force),
+        on_wait=lambda: progress.stage("waiting_for_identical_report"),
+    )
+
+def build_rollup_report(start_date: str, end_date: str, progress: ReportProgress, force: bool = False):
+    # 驗證日期格式
+    datetime.strptime(start_date, "%Y-%m-%d")
+    datetime.strptime(end_date, "%Y-%m-%d")
+    jira_api = init_jira_api("monthly")
+    filename = csv_object_name(f"jiraReport_{start_date}_{end_date}_rollup.csv", compress=get_csv_gzip())
+    client = storage.Client()
+    bucket = client.bucket(GCS_BUCKET)
+
+    if not force:
+        progress.stage("checking_existing_report")
+        metadata = find_reusable_report(bucket, filename, jira_api, start_date, end_date)
+        if metadata is not None:
+            return {
+                "message": "Report reused",
+                "filename": filename,
+                "generated_at": metadata.get("generated_at"),
+                "row_count": int(metadata.get("row_count", 0)),
+            }
+
+    watermark = current_watermark()
+    print(f"Fetching worklog rollup from {start_date} to {end_date}")
+
+    print(f"Step 1~3: 串流處理 issues → worklogs / user info（同時累計每人每個 team 的工時）")
+    progress.stage("fetching_issues")
+    fetcher = WorklogFetcher(
+        jira_api, max_workers=get_jira_concurrency(), start_date=start_date, end_date=end_date
+    )
+    rollup = OwnerTeamRollup()
+    index = ReportIndex()
+
+    def add_issue(issue):
+        worklogs = issue.pop("worklogs")
+        index.add_issue(issue, worklogs)
+        rollup.add_issue(issue, worklogs)
+
+    partitions = get_search_partitions()
+    if partitions > 1:
+        pages = jira_api.iter_active_issue_pages_partitioned(start_date, end_date, partitions)
+    else:
+        pages = prefetch_pages(jira_api.iter_active_issue_pages(start_date, end_date))
+    issues, user_data = fetcher.fetch_pages(
+        pages,
+        on_issue_done=lambda issue: progress.add_issues(),
+        on_issue_ready=add_issue,
+    )
+    print(f"[INFO] 總共取得 {len(issues)} 筆 active issues，{len(user_data)} 位 worklog 使用者")
+
+    print(f"Step 4: 建立彙總表")
+    progress.stage("building_dataframe")
+    rollup_df = rollup.to_frame(user_data)
+    print(f"[INFO] 彙總筆數：{len(rollup_df)}")
+
+    print(f"Step 5: 輸出檔案並存入GCS")
+    progress.stage("uploading")
+    index_name = save_report_index(bucket, filename, index, watermark)
+    upload_csv(
+        bucket,
+        f"jiraReport_{start_date}_{end_date}_rollup.csv",
+        rollup_df,
+        metadata=report_metadata(len(rollup_df), watermark, index_name),
+        compress=get_csv_gzip(),
+    )
+    delete_old_report_indexes(bucket, filename, keep=index_name)
     print(f"[SUCCESS] 輸出檔案")
 
     return {"message": "Report generated", "filename": filename}
@@ -132,29 +630,30 @@ def generate_report(start_date: str, end_date: str):
 # -----------------------------------
 # GET API: 每個月自動匯出月報表
 # -----------------------------------
+def previous_month_range() -> tuple[str, str]:
+    # 今天
+    today = date.today()
+
+    # 上個月的年份和月份
+    year = today.year
+    month = today.month - 1
+    if month == 0:  # 如果今天是 1 月，上一個月是去年 12 月
+        month = 12
+        year -= 1
+
+    # 上個月的第一天
+    first_day = date(year, month, 1)
+
+    # 這個月的第一天
+    last_day = date(today.year, today.month, 1)
+
+    return first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d")
+
 @app.get("/reports/monthly/auto")
-def get_monthlyReportsAuto():
+def get_monthlyReportsAuto(force: bool = False):
     try:
-        # 今天
-        today = date.today()
-
-        # 上個月的年份和月份
-        year = today.year
-        month = today.month - 1
-        if month == 0:  # 如果今天是 1 月，上一個月是去年 12 月
-            month = 12
-            year -= 1
-
-        # 上個月的第一天
-        first_day = date(year, month, 1)
-
-        # 這個月的第一天
-        last_day = date(today.year, today.month, 1)
-
-        start_date = first_day.strftime("%Y-%m-%d")
-        end_date = last_day.strftime("%Y-%m-%d")
-        
-        return generate_report(start_date, end_date)
+        start_date, end_date = previous_month_range()
+        return generate_report(start_date, end_date, force=force)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -163,13 +662,52 @@ def get_monthlyReportsAuto():
 #     參數：
 #         start_date (str): 起始日期(如：2025-09-01)
 #         end_date (str): 結束日期(如：2025-09-01)
+#         force (bool): 忽略 GCS 上既有的報表，強制重新產生
+#         run_id (str): 指定後進度寫入 checkpoint，中斷後以相同 run_id 重試即從中斷處繼續
 # -----------------------------------
 @app.get("/reports/monthly")
-def post_monthlyReports(start_date: str, end_date: str):
+def post_monthlyReports(start_date: str, end_date: str, force: bool = False, run_id: str = None):
+    check_date_range(start_date, end_date)
+    check_run_id(run_id)
     try:
-        return generate_report(start_date, end_date)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format")
+        return generate_report(start_date, end_date, force=force, run_id=run_id)
+    except CheckpointMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# -----------------------------------
+# GET API: 一次重新產生多個月份的月報表
+#     參數：
+#         start_month (str): 起始月份 (YYYY-MM)
+#         end_month (str): 結束月份 (YYYY-MM，含)
+#         run_id (str): 同 /reports/monthly，中斷後以相同 run_id 重試即從中斷處繼續
+# -----------------------------------
+@app.get("/reports/monthly/backfill")
+def get_monthlyBackfill(start_month: str, end_month: str, force: bool = False, run_id: str = None):
+    try:
+        month_ranges(start_month, end_month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    check_run_id(run_id)
+    try:
+        return generate_backfill_report(start_month, end_month, force=force, run_id=run_id)
+    except CheckpointMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# -----------------------------------
+# GET API: 指定日期區間匯出每位成員 x issue team 的工時彙總
+#     參數：
+#         start_date (str): 起始日期 (YYYY-MM-DD)
+#         end_date (str): 結束日期 (YYYY-MM-DD)
+# -----------------------------------
+@app.get("/reports/monthly/rollup")
+def get_monthlyRollup(start_date: str, end_date: str, force: bool = False):
+    check_date_range(start_date, end_date)
+    try:
+        return generate_rollup_report(start_date, end_date, force=force)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -177,128 +715,379 @@ def post_monthlyReports(start_date: str, end_date: str):
 # POST API: 依照「專案」匯出報表
 #     參數：
 #         project_key (str): JIRA 專案代碼
+#         summary_only (bool): 只輸出 Worklogs_Summary
 # -----------------------------------
 @app.get("/reports/projects")
-def post_reportsByProjects(project_key): 
+def post_reportsByProjects(project_key, summary_only: bool = False): 
+    return generate_project_report(project_key, summary_only=summary_only)
+
+# -----------------------------------
+# GET API: 一次匯出多個專案的報表
+#     參數：
+#         project_keys (str): 以逗號分隔的 JIRA 專案代碼（與 category 擇一）
+#         category (str): 專案類別名稱或 ID
+#         combined (bool): 所有專案輸出成單一活頁簿
+#         summary_only (bool): 只輸出 Worklogs_Summary
+# -----------------------------------
+@app.get("/reports/projects/batch")
+def get_projectBatchReports(
+    project_keys: str = None, category: str = None, combined: bool = False, summary_only: bool = False
+):
+    keys = [key.strip() for key in project_keys.split(",") if key.strip()] if project_keys else None
+    try:
+        return generate_project_batch_report(keys, category, combined, summary_only)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# -----------------------------------
+# 專案報表的工作表（Worklogs_Detail、Worklogs_Summary）
+#     table 為 None 時只輸出 Worklogs_Summary
+# -----------------------------------
+def project_report_sheets(summary: OwnerMonthSummary, table, user_data: dict, project_info: dict) -> dict:
+    print("Step 4: 統計每位 worklog_owner 的總工時")
+    summary_df = summary.to_frame()
+    if summary_df.empty:
+        print("[WARN] 無 Worklog 資料，建立空的 Summary_ByMonth")
+    else:
+        print(f"[INFO] Summary_ByMonth 建立完成，共 {len(summary_df)} 位成員")
+    if table is None:
+        return {"Worklogs_Summary": summary_df}
+
+    print("Step 5~6: 轉換明細資料為 DataFrame 並附加使用者群組資訊")
+    # 每位使用者只查詢一次（在 Step 3 串流中並行完成），再依 worklog_owner_id 合併
+    df = table.to_frame(project_info)
+    df = pd.merge(df, user_data_to_df(user_data), on="worklog_owner_id", how="left")
+    print(f"[INFO] 使用者群組資訊已附加到每筆 Worklog（共查詢 {len(user_data)} 位使用者）")
+
+    # 移除多餘欄位（群組欄位已由 user_data_to_df 改名）
+    df = df.drop(columns=['worklog_owner_id', 'worklog_id'])
+
+    # 將 project 欄位移到最前面
+    project_cols = [c for c in df.columns if c.startswith('project_')]
+    other_cols = [c for c in df.columns if c not in project_cols]
+    return {"Worklogs_Detail": df[project_cols + other_cols], "Worklogs_Summary": summary_df}
+
+# -----------------------------------
+# 專案報表生成函數
+#     相同專案的報表同時被要求時，共用同一次產生的結果
+#     summary_only=True 時只輸出 Worklogs_Summary，不保留明細資料
+# -----------------------------------
+def generate_project_report(project_key: str, progress: ReportProgress = None, summary_only: bool = False):
+    progress = progress or ReportProgress()
+    return get_single_flight().do(
+        "project",
+        {"project_key": project_key, "summary_only": summary_only},
+        lambda: build_project_report(project_key, progress, summary_only),
+        on_wait=lambda: progress.stage("waiting_for_identical_report"),
+    )
+
+def build_project_report(project_key: str, progress: ReportProgress, summary_only: bool = False):
     jira_api = init_jira_api("project")
     print(f"Fetching information By {project_key}")
 
     print(f"Step 1: 取得專案基本資訊")
+    progress.stage("fetching_project")
     project = jira_api.get_one_project(project_key)[0]
     project_name = project['project_name']
     project_id = project['project_key']
     print(f"[INFO] 專案名稱：{project_name}, 專案 ID：{project_id}")
 
-    print("Step 2: 取得該專案的所有 Issues")
-    issues = jira_api.get_issue_from_project_id(project_id)
-    project['issues'] = issues
-    print(f"[INFO] 已取得 {len(issues)} 筆 issue")
-
-    print("Step 3: 取得每個 Issue 的 Worklogs")
-    worklogs = []
-    if 'issues' in project:
-        for issue in project['issues']:
-            issue_id = issue['issues_key']
-            worklogs = jira_api.get_worklog_from_issue_id(issue_id)
-            issue['worklogs'] = worklogs
-    # print(f"issues:{issues}")
-    print(f"[INFO] 所有 Issue 的 Worklogs 已載入完成")
-
-    print("Step 4: 轉換每個 Worklog 的使用者 ID 為群組資訊")
-    for issue in project['issues']:
-        if 'worklogs' in issue:
-            for worklog in issue['worklogs']:
-                user_id = worklog['owner_id']
-                groups = jira_api.get_user_group_info_from_user_id(user_id)
-                worklog['groups'] = groups
-    print("[INFO] 使用者群組資訊已附加到每筆 Worklog")
-
-    print("Step 5: 準備轉換資料為 DataFrame 結構")
-    # Step 1: 先 normalize project -> issues
-    df = pd.json_normalize(project, record_path=['issues'], meta=['project_name', 'project_key', 'project_category'], errors='ignore')
-    # Step 2: 將 worklogs explode
-    if 'worklogs' in df.columns:
-        df = df.explode('worklogs').reset_index(drop=True)
-        worklog_df = pd.json_normalize(df['worklogs']).add_prefix('worklog_')
-        df = pd.concat([df.drop(columns=['worklogs']), worklog_df], axis=1)
+    print("Step 2~3: 串流取得該專案的 Issues 與每個 Issue 的 Worklogs（同時累計每人每月工時）")
+    progress.stage("fetching_issues")
+    fetcher = WorklogFetcher(jira_api, max_workers=get_jira_concurrency())
+    summary = OwnerMonthSummary()
+    # 沒有 worklog 的 issue 也保留一列
+    table = None if summary_only else WorklogTable(
+        issue_columns=["issues_name", "issues_key", "issues_team", "issues_status"], keep_empty_issues=True
+    )
+
+    def on_issue_ready(issue):
+        worklogs = issue.pop("worklogs")
+        summary.add_issue(issue, worklogs)
+        if table is not None:
+            table.append_issue(issue, worklogs, project_key=project_id)
+
+    partitions = get_search_partitions()
+    if partitions > 1:
+        pages = jira_api.iter_issue_pages_from_project_id_partitioned(project_id, partitions)
     else:
-        df['worklog_owner'] = None
-        df['worklog_start_date'] = pd.NaT
-        df['worklog_time_spent_hr'] = None
-
-    print("Step 6: [開始] 統計每位 worklog_owner 的總工時")
-    if not df.empty:
-        df['worklog_month'] = pd.to_datetime(df['worklog_start_date']).dt.strftime('%Y-%m')
-
-        # 建立依月份彙總的樞紐表
-        summary_df = (
-            df.pivot_table(
-                index='worklog_owner',
-                columns='worklog_month',
-                values='worklog_time_spent_hr',
-                aggfunc='sum',
-                fill_value=0
-            )
-            .reset_index()
-        )
+        pages = prefetch_pages(jira_api.iter_issue_pages_from_project_id(project_id))
+    issues, user_data = fetcher.fetch_pages(
+        pages, on_issue_done=lambda issue: progress.add_issues(), on_issue_ready=on_issue_ready
+    )
+    print(f"[INFO] 已取得 {len(issues)} 筆 issue，所有 Issue 的 Worklogs 已載入完成")
+    print(f"[INFO] {len(user_data)} 位 worklog 使用者，使用者查詢共送出 {fetcher.user_calls} 次 Jira 請求")
 
-        # 加上總工時欄位
-        summary_df['total_time_spent_hr'] = summary_df.iloc[:, 1:].sum(axis=1)
+    progress.stage("building_dataframe")
+    sheets = project_report_sheets(summary, table, user_data, {project_id: project})
 
-        # 按總工時排序
-        summary_df = summary_df.sort_values(by='total_time_spent_hr', ascending=False)
+    print("Step 7: 輸出檔案並存入GCS")
+    progress.stage("uploading")
+    filename = f"jiraReport_{project_name}_summary.xlsx" if summary_only else f"jiraReport_{project_name}.xlsx"
+    client = storage.Client()
+    bucket = client.bucket(GCS_BUCKET)
+    # 以 constant_memory 模式寫入暫存檔後上傳；超過 Excel 列數上限時自動分頁
+    upload_workbook(bucket, filename, sheets)
+    print(f"[SUCCESS] 輸出檔案")
+    return {"message": "Report generated", "filename": filename, "user_calls": fetcher.user_calls}
 
-        print(f"[INFO] Summary_ByMonth 建立完成，共 {len(summary_df)} 位成員")
+# -----------------------------------
+# 多專案報表生成函數
+#     以 project_keys 或 category 指定專案，所有專案共用同一個連線池、
+#     使用者群組索引與 worklog 抓取執行緒，每位使用者只查詢一次
+#     combined=True 時輸出單一活頁簿，否則每個專案各一個
+# -----------------------------------
+def generate_project_batch_report(
+    project_keys: list = None,
+    category: str = None,
+    combined: bool = False,
+    summary_only: bool = False,
+    progress: ReportProgress = None,
+):
+    progress = progress or ReportProgress()
+    return get_single_flight().do(
+        "project_batch",
+        {"project_keys": project_keys, "category": category, "combined": combined, "summary_only": summary_only},
+        lambda: build_project_batch_report(project_keys, category, combined, summary_only, progress),
+        on_wait=lambda: progress.stage("waiting_for_identical_report"),
+    )
 
+def build_project_batch_report(
+    project_keys: list, category: str, combined: bool, summary_only: bool, progress: ReportProgress
+):
+    if not project_keys and not category:
+        raise ValueError("project_keys or category is required")
+    jira_api = init_jira_api("project")
+
+    print(f"Step 1: 取得專案基本資訊")
+    progress.stage("fetching_project")
+    if project_keys:
+        projects = jira_api.get_projects(keys=project_keys)
     else:
-        print("[WARN] 無 Worklog 資料，建立空的 Summary_ByMonth")
-        summary_df = pd.DataFrame(columns=['worklog_owner', 'total_time_spent_hr'])
-    
-    print("Step 6: [結束] 統計每位 worklog_owner 的總工時")
-
-    # Step 3: 改欄位名稱 & 移除多餘欄位
-    df.rename(columns={
-        'worklog_groups.Executive Unit': 'worklog_owner_EU',
-        'worklog_groups.Job Level': 'worklog_owner_level',
-        'worklog_groups.Job Title': 'worklog_owner_title',
-    }, inplace=True)
-
-    columns_to_drop = [
-        'worklog_groups.user_id',
-        'worklog_owner_id',
-        'worklog_month'
-    ]
-    df = df.drop(columns=[col for col in columns_to_drop if col in df.columns])
-
-    # Step 4: 確保 worklog_start_date 是 datetime
-    if 'worklog_start_date' in df.columns:
-        df['worklog_start_date'] = pd.to_datetime(df['worklog_start_date'], errors='coerce').dt.date
-    else:
-        df['worklog_start_date'] = pd.NaT
+        projects = jira_api.get_projects(category=category)
+    project_info = {project["project_key"]: project for project in projects}
+    print(f"[INFO] 共 {len(projects)} 個專案：{', '.join(project_info)}")
 
-    # Step 5: 將 Parent_Key 與 Worklog_Type 移到最後
-    project_cols = [c for c in df.columns if c.startswith('project_')]
-    # other_cols = [c for c in df.columns if c not in project_cols + ['Parent_Key', 'Worklog_Type']]
-    other_cols = [c for c in df.columns if c not in project_cols]
-    # final_cols = project_cols + other_cols + ['Parent_Key', 'Worklog_Type']
-    final_cols = project_cols + other_cols
-    df_final = df[[c for c in final_cols if c in df.columns]] 
+    print("Step 2~3: 同時取得各專案的 Issues 與 Worklogs（同時累計每人每月工時）")
+    progress.stage("fetching_issues")
+
+    def new_table():
+        # 沒有 worklog 的 issue 也保留一列
+        return None if summary_only else WorklogTable(
+            issue_columns=["issues_name", "issues_key", "issues_team", "issues_status"], keep_empty_issues=True
+        )
+
+    # combined 時所有專案寫入同一組 table / summary（key 為 None）
+    groups = [None] if combined else list(project_info)
+    tables = {group: new_table() for group in groups}
+    summaries = {group: OwnerMonthSummary() for group in groups}
+
+    def on_issue_ready(issue):
+        group = None if combined else issue["project_key"]
+        worklogs = issue.pop("worklogs")
+        summaries[group].add_issue(issue, worklogs)
+        if tables[group] is not None:
+            tables[group].append_issue(issue, worklogs)
+
+    def project_pages(project_key):
+        for page in jira_api.iter_issue_pages_from_project_id(project_key):
+            for issue in page:
+                issue["project_key"] = project_key
+            yield page
+
+    # 各專案的 search/jql 同時分頁，依專案順序交給同一個 fetcher
+    pages = iter_pages_in_order(
+        [lambda project_key=project_key: project_pages(project_key) for project_key in project_info],
+        max_workers=DEFAULT_PROJECT_SEARCHES,
+    )
+    fetcher = WorklogFetcher(jira_api, max_workers=get_jira_concurrency())
+    issues, user_data = fetcher.fetch_pages(
+        pages, on_issue_done=lambda issue: progress.add_issues(), on_issue_ready=on_issue_ready
+    )
+    print(f"[INFO] 已取得 {len(issues)} 筆 issue，{len(user_data)} 位 worklog 使用者")
+    print(f"[INFO] 使用者查詢共送出 {fetcher.user_calls} 次 Jira 請求")
+
+    progress.stage("building_dataframe")
+    workbooks = {}
+    for group in groups:
+        if combined:
+            label = category or "_".join(project_info)
+            if len(label) > 100:
+                label = f"{next(iter(project_info))}_{len(project_info)}_projects"
+        else:
+            label = project_info[group]["project_name"]
+        filename = f"jiraReport_{label}_summary.xlsx" if summary_only else f"jiraReport_{label}.xlsx"
+        workbooks[filename] = project_report_sheets(summaries.pop(group), tables.pop(group), user_data, project_info)
 
     print("Step 7: 輸出檔案並存入GCS")
-    filename = f"jiraReport_{project_name}.xlsx"
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df_final.to_excel(writer, sheet_name="Worklogs_Detail", index=False)
-        summary_df.to_excel(writer, sheet_name="Worklogs_Summary", index=False)
+    progress.stage("uploading")
     client = storage.Client()
     bucket = client.bucket(GCS_BUCKET)
-    blob = bucket.blob(filename)
-    blob.upload_from_string(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    filenames = upload_workbooks(bucket, workbooks)
+    print(f"[SUCCESS] 輸出 {len(filenames)} 個檔案")
+    return {
+        "message": "Report generated",
+        "filenames": filenames,
+        "projects": list(project_info),
+        "user_calls": fetcher.user_calls,
+    }
+
+# -----------------------------------
+# 背景 job API：立即回傳 job_id，報表在背景產生
+#     進度與結果以 GET /jobs/{job_id} 查詢
+# -----------------------------------
+class MonthlyReportRequest(BaseModel):
+    start_date: str
+    end_date: str
+    force: bool = False
+    run_id: str = None
+
+    @validator("start_date", "end_date")
+    def check_date_format(cls, value):
+        datetime.strptime(value, "%Y-%m-%d")
+        return value
+
+    @validator("run_id")
+    def check_run_id(cls, value):
+        return validate_run_id(value) if value is not None else value
+
+class BackfillReportRequest(BaseModel):
+    start_month: str
+    end_month: str
+    force: bool = False
+    run_id: str = None
+
+    @validator("start_month", "end_month")
+    def check_month_format(cls, value):
+        datetime.strptime(value, "%Y-%m")
+        return value
+
+    @validator("run_id")
+    def check_run_id(cls, value):
+        return validate_run_id(value) if value is not None else value
+
+class ProjectReportRequest(BaseModel):
+    project_key: str
+    summary_only: bool = False
+
+class ProjectBatchReportRequest(BaseModel):
+    project_keys: list[str] = None
+    category: str = None
+    combined: bool = False
+    summary_only: bool = False
+
+def job_response(job: dict) -> dict:
+    return {"job_id": job["job_id"], "status": job["status"], "status_url": f"/jobs/{job['job_id']}"}
+
+@app.post("/reports/monthly", status_code=202)
+def post_monthlyReportJob(request: MonthlyReportRequest):
+    params = {
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "force": request.force,
+        "run_id": request.run_id,
+    }
+    job = get_job_manager().submit(
+        "monthly",
+        params,
+        lambda progress: generate_report(
+            request.start_date, request.end_date, progress, force=request.force, run_id=request.run_id
+        ),
     )
-    print(f"[SUCCESS] 輸出檔案")
-    return {"message": "Report generated", "filename": filename}
+    return job_response(job)
+
+@app.post("/reports/monthly/auto", status_code=202)
+def post_monthlyReportAutoJob(force: bool = False):
+    start_date, end_date = previous_month_range()
+    params = {"start_date": start_date, "end_date": end_date, "force": force}
+    job = get_job_manager().submit(
+        "monthly", params, lambda progress: generate_report(start_date, end_date, progress, force=force)
+    )
+    return job_response(job)
+
+@app.post("/reports/projects", status_code=202)
+def post_projectReportJob(request: ProjectReportRequest):
+    params = {"project_key": request.project_key, "summary_only": request.summary_only}
+    job = get_job_manager().submit(
+        "project",
+        params,
+        lambda progress: generate_project_report(request.project_key, progress, request.summary_only),
+    )
+    return job_response(job)
+
+@app.post("/reports/monthly/backfill", status_code=202)
+def post_monthlyBackfillJob(request: BackfillReportRequest):
+    try:
+        month_ranges(request.start_month, request.end_month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = {
+        "start_month": request.start_month,
+        "end_month": request.end_month,
+        "force": request.force,
+        "run_id": request.run_id,
+    }
+    job = get_job_manager().submit(
+        "monthly_backfill",
+        params,
+        lambda progress: generate_backfill_report(
+            request.start_month, request.end_month, progress, force=request.force, run_id=request.run_id
+        ),
+    )
+    return job_response(job)
+
+@app.post("/reports/projects/batch", status_code=202)
+def post_projectBatchReportJob(request: ProjectBatchReportRequest):
+    if not request.project_keys and not request.category:
+        raise HTTPException(status_code=400, detail="project_keys or category is required")
+    params = {
+        "project_keys": request.project_keys,
+        "category": request.category,
+        "combined": request.combined,
+        "summary_only": request.summary_only,
+    }
+    job = get_job_manager().submit(
+        "project_batch",
+        params,
+        lambda progress: generate_project_batch_report(
+            request.project_keys, request.category, request.combined, request.summary_only, progress
+        ),
+    )
+    return job_response(job)
+
+@app.post("/reports/monthly/rollup", status_code=202)
+def post_monthlyRollupJob(request: MonthlyReportRequest):
+    params = {"start_date": request.start_date, "end_date": request.end_date, "force": request.force}
+    job = get_job_manager().submit(
+        "monthly_rollup",
+        params,
+        lambda progress: generate_rollup_report(request.start_date, request.end_date, progress, force=request.force),
+    )
+    return job_response(job)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# -----------------------------------
+# GET API: 查詢快取命中統計（本 worker）
+# -----------------------------------
+@app.get("/cache/stats")
+def get_cacheStats():
+    cache = get_jira_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+# -----------------------------------
+# GET API: 查詢 Jira 請求與限流統計（本 worker）
+# -----------------------------------
+@app.get("/jira/stats")
+def get_jiraStats():
+    return get_jira_session().stats()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,121 @@
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+import xlsxwriter
+
+from report_upload import DEFAULT_UPLOAD_WORKERS
+
+
+# Excel 單一工作表的列數上限（含標題列）
+EXCEL_MAX_ROWS = 1048576
+# Excel 工作表名稱的長度上限
+SHEET_NAME_MAX_LENGTH = 31
+# 每次轉換成 Python 值的列數
+EXCEL_CHUNK_ROWS = 10000
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def write_workbook(path: str, sheets: dict, max_rows: int = EXCEL_MAX_ROWS) -> None:
+    """
+    Write {sheet name: DataFrame} to an .xlsx file with xlsxwriter's
+    constant_memory mode: rows are flushed to disk as soon as the next row
+    starts, so memory use does not grow with the number of rows.
+    A DataFrame with more rows than fit in one sheet continues on
+    "<name>_2", "<name>_3", ... with the header repeated.
+    Cells look like pandas' to_excel output (bold bordered header, dates
+    as yyyy-mm-dd, missing values left empty).
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "remove_timezone": True})
+    try:
+        formats = {
+            "header": workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"}),
+            "date": workbook.add_format({"num_format": "yyyy-mm-dd"}),
+            "datetime": workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"}),
+        }
+        for name, df in sheets.items():
+            write_sheets(workbook, name, df, formats, max_rows)
+    finally:
+        workbook.close()
+
+
+def write_sheets(workbook, name: str, df: pd.DataFrame, formats: dict, max_rows: int) -> None:
+    rows_per_sheet = max_rows - 1
+    header = [str(column) for column in df.columns]
+    # 只有日期（時間皆為 00:00）的 datetime 欄位以 yyyy-mm-dd 顯示
+    date_columns = {number for number, column in enumerate(df.columns) if is_date_column(df[column])}
+    sheet_count = max(1, math.ceil(len(df) / rows_per_sheet))
+    for index in range(sheet_count):
+        sheet_name = name if index == 0 else sheet_name_with_suffix(name, index + 1)
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, header, formats["header"])
+
+        start = index * rows_per_sheet
+        stop = min(start + rows_per_sheet, len(df))
+        row_number = 1
+        for chunk_start in range(start, stop, EXCEL_CHUNK_ROWS):
+            chunk = df.iloc[chunk_start:min(chunk_start + EXCEL_CHUNK_ROWS, stop)]
+            # 逐欄轉成 Python 值（numpy 數值 → int / float），再逐列寫出
+            columns = [chunk[column].tolist() for column in chunk.columns]
+            for row in zip(*columns):
+                for col_number, value in enumerate(row):
+                    write_cell(worksheet, row_number, col_number, value, formats, col_number in date_columns)
+                row_number += 1
+
+
+def write_cell(worksheet, row: int, col: int, value, formats: dict, as_date: bool = False) -> None:
+    if value is None or value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+        return
+    if isinstance(value, bool):
+        worksheet.write_boolean(row, col, value)
+    elif isinstance(value, (int, float)):
+        worksheet.write_number(row, col, value)
+    elif isinstance(value, datetime):
+        worksheet.write_datetime(row, col, value, formats["date"] if as_date else formats["datetime"])
+    elif isinstance(value, date):
+        worksheet.write_datetime(row, col, value, formats["date"])
+    elif isinstance(value, str):
+        worksheet.write_string(row, col, value)
+    else:
+        worksheet.write_string(row, col, str(value))
+
+
+def is_date_column(series: pd.Series) -> bool:
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        return False
+    values = series.dropna()
+    return bool((values == values.dt.normalize()).all())
+
+
+def sheet_name_with_suffix(name: str, number: int) -> str:
+    suffix = f"_{number}"
+    return name[:SHEET_NAME_MAX_LENGTH - len(suffix)] + suffix
+
+
+def upload_workbook(bucket, filename: str, sheets: dict) -> None:
+    """
+    Write the workbook to a temporary file and upload it from disk, so the
+    finished .xlsx never has to be held in memory.
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_workbook(path, sheets)
+        bucket.blob(filename).upload_from_filename(path, content_type=XLSX_CONTENT_TYPE)
+    finally:
+        os.remove(path)
+
+
+def upload_workbooks(bucket, workbooks: dict, max_workers: int = DEFAULT_UPLOAD_WORKERS) -> list[str]:
+    """
+    Upload {filename: sheets} workbooks, max_workers at a time.
+    Returns the filenames in the given order.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(workbooks) or 1))) as executor:
+        futures = [executor.submit(upload_workbook, bucket, filename, sheets) for filename, sheets in workbooks.items()]
+        for future in futures:
+            future.result()
+    return list(workbooks)
@@ -0,0 +1,332 @@
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import storage
+
+
+DEFAULT_JOB_WORKERS = 2
+# 完成的 job 狀態檔保留秒數（僅本地目錄；GCS 請設定 lifecycle rule）
+DEFAULT_JOB_RETENTION = 7 * 24 * 3600
+# 計數類進度（issues / calls）寫回狀態檔的最短間隔秒數
+PROGRESS_FLUSH_SECONDS = 1.0
+# GCS 同一個 object 每秒最多更新約一次，進度寫回間隔放寬
+GCS_PROGRESS_FLUSH_SECONDS = 5.0
+# 狀態存在 GCS 時，執行中的 job 每隔幾秒更新 heartbeat_at；超過 JOB_STALE_SECONDS 未更新視為 instance 已結束
+JOB_HEARTBEAT_SECONDS = 30.0
+JOB_STALE_SECONDS = 3 * JOB_HEARTBEAT_SECONDS
+# job 結束狀態（succeeded / failed）寫入失敗時的重試次數與第一次等待秒數（每次加倍）
+FINAL_WRITE_ATTEMPTS = 5
+FINAL_WRITE_RETRY_SECONDS = 1.0
+
+
+class ReportProgress:
+    """
+    Progress sink passed to the report functions.
+    This base class ignores every update; it is used when a report runs
+    synchronously inside a request.
+    """
+
+    def stage(self, name: str) -> None:
+        pass
+
+    def add_issues(self, count: int = 1) -> None:
+        pass
+
+
+class JobProgress(ReportProgress):
+    """
+    Writes the progress of a running job back to its status file.
+    Stage changes are written immediately; issue / call counters at most
+    once per PROGRESS_FLUSH_SECONDS.
+    Progress writes are best-effort: a failed write (e.g. GCS 429 on a
+    quickly rewritten object) is logged and the report keeps running.
+    """
+
+    def __init__(self, manager, job_id: str) -> None:
+        self.manager = manager
+        self.job_id = job_id
+        self.issues_processed = 0
+        self._calls_at_start = manager.count_calls()
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> None:
+        with self._lock:
+            self._flush(stage=name)
+
+    def add_issues(self, count: int = 1) -> None:
+        with self._lock:
+            self.issues_processed += count
+            if time.monotonic() - self._flushed_at >= self.manager.store.flush_seconds:
+                self._flush()
+
+    def calls_made(self) -> int:
+        return self.manager.count_calls() - self._calls_at_start
+
+    def _flush(self, **fields) -> None:
+        self._flushed_at = time.monotonic()
+        try:
+            self.manager._update(
+                self.job_id,
+                issues_processed=self.issues_processed,
+                jira_calls=self.calls_made(),
+                **fields,
+            )
+        except Exception as e:
+            print(f"[WARN] 報表 job 進度寫入失敗：{self.job_id} {e}")
+
+
+def open_job_store(path: str):
+    """
+    LocalJobStore for a directory, GCSJobStore for "gs://bucket/prefix".
+    """
+    if path.startswith("gs://"):
+        bucket_name, _, prefix = path[len("gs://"):].partition("/")
+        return GCSJobStore(storage.Client().bucket(bucket_name), prefix.strip("/") or "jira_jobs")
+    return LocalJobStore(path)
+
+
+class LocalJobStore:
+    """
+    One JSON file per job in a directory shared by the gunicorn workers of
+    one instance. A job is alive while the worker process that owns it is.
+    """
+
+    flush_seconds = PROGRESS_FLUSH_SECONDS
+    heartbeat = False
+
+    def __init__(self, directory: str, retention: float = DEFAULT_JOB_RETENTION) -> None:
+        self.directory = directory
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def read(self, job_id: str):
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write(self, job: dict) -> None:
+        path = self._path(job["job_id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def is_alive(self, job: dict) -> bool:
+        return pid_alive(job["pid"])
+
+    def cleanup(self) -> None:
+        cutoff = time.time() - self.retention
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class GCSJobStore:
+    """
+    One <prefix>/<job_id>.json object per job, shared by every Cloud Run
+    instance. Process IDs mean nothing across instances, so running jobs
+    refresh heartbeat_at instead and a job whose heartbeat is older than
+    JOB_STALE_SECONDS is considered lost.
+    """
+
+    flush_seconds = GCS_PROGRESS_FLUSH_SECONDS
+    heartbeat = True
+
+    def __init__(self, bucket, prefix: str) -> None:
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def read(self, job_id: str):
+        blob = self.bucket.get_blob(f"{self.prefix}/{job_id}.json")
+        if blob is None:
+            return None
+        try:
+            return json.loads(blob.download_as_bytes())
+        except json.JSONDecodeError:
+            return None
+
+    def write(self, job: dict) -> None:
+        self.bucket.blob(f"{self.prefix}/{job['job_id']}.json").upload_from_string(
+            json.dumps(job, ensure_ascii=False, default=str), content_type="application/json"
+        )
+
+    def is_alive(self, job: dict) -> bool:
+        return time.time() - (job.get("heartbeat_at") or job["created_at"]) < JOB_STALE_SECONDS
+
+    def cleanup(self) -> None:
+        pass
+
+
+class ReportJobManager:
+    """
+    Runs report generation in a background thread pool so the HTTP request
+    that starts a report returns immediately with a job ID.
+    Job status is kept in a store shared by all workers (LocalJobStore for
+    the gunicorn workers of one instance, GCSJobStore across Cloud Run
+    instances), so GET /jobs/{id} works whichever worker answers.
+    count_calls() should return the number of Jira requests sent so far by
+    this worker; jira_calls of a job is the difference since it started
+    (jobs running at the same time in one worker are counted together).
+    """
+
+    def __init__(self, store, max_workers: int = DEFAULT_JOB_WORKERS, count_calls=None) -> None:
+        self.store = store
+        self.count_calls = count_calls or (lambda: 0)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._lock = threading.Lock()
+        # 這個 worker 尚未結束的 job（heartbeat 用）
+        self._active = set()
+        if store.heartbeat:
+            threading.Thread(target=self._heartbeat, name="report-job-heartbeat", daemon=True).start()
+
+    def submit(self, job_type: str, params: dict, run) -> dict:
+        """
+        Queue run(progress) and return the new job's status.
+        run must return a dict containing at least "filename".
+        """
+        self.store.cleanup()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "type": job_type,
+            "params": params,
+            "status": "queued",
+            "stage": None,
+            "issues_processed": 0,
+            "jira_calls": 0,
+            "filename": None,
+            "result": None,
+            "error": None,
+            "pid": os.getpid(),
+            "created_at": time.time(),
+            "heartbeat_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._active.add(job_id)
+        self.store.write(job)
+        self._executor.submit(self._run, job_id, run)
+        print(f"[INFO] 報表 job 已排入佇列：{job_id} ({job_type} {params})")
+        return job
+
+    def get(self, job_id: str):
+        """
+        Status of a job, or None if it does not exist.
+        A job left queued / running by a worker that no longer exists is
+        reported as failed.
+        """
+        job = self._read(job_id)
+        if job is None:
+            return None
+        if job["status"] in ("queued", "running") and not self.store.is_alive(job):
+            job = self._update(job_id, status="failed", error="worker exited before the job finished")
+        return job
+
+    def _run(self, job_id: str, run) -> None:
+        try:
+            self._run_job(job_id, run)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _run_job(self, job_id: str, run) -> None:
+        progress = JobProgress(self, job_id)
+        try:
+            self._update(job_id, status="running", started_at=time.time())
+        except Exception as e:
+            print(f"[WARN] 報表 job 狀態寫入失敗：{job_id} {e}")
+        try:
+            result = run(progress)
+        except Exception as e:
+            print(f"[ERROR] 報表 job 失敗：{job_id} {e}")
+            traceback.print_exc()
+            self._finish(
+                job_id,
+                status="failed",
+                error=str(e),
+                issues_processed=progress.issues_processed,
+                jira_calls=progress.calls_made(),
+                finished_at=time.time(),
+            )
+            return
+        print(f"[SUCCESS] 報表 job 完成：{job_id} {result.get('filename')}")
+        self._finish(
+            job_id,
+            status="succeeded",
+            stage="done",
+            filename=result.get("filename"),
+            result=result,
+            issues_processed=progress.issues_processed,
+            jira_calls=progress.calls_made(),
+            finished_at=time.time(),
+        )
+
+    # -------------------- 狀態檔 --------------------
+
+    def _read(self, job_id: str):
+        # job_id 來自 URL，只接受 uuid hex，避免讀到目錄 / prefix 外的檔案
+        if not job_id.isalnum():
+            return None
+        return self.store.read(job_id)
+
+    def _update(self, job_id: str, **fields) -> dict:
+        # 同一個 job 只會由建立它的 worker 更新，process 內的 lock 即可
+        with self._lock:
+            job = self.store.read(job_id) or {"job_id": job_id}
+            job.update(fields, heartbeat_at=time.time())
+            self.store.write(job)
+            return job
+
+    def _finish(self, job_id: str, **fields) -> None:
+        # 結束狀態沒寫入的 job 會一直停在 running，直到被判定 worker 已結束，因此失敗時重試
+        delay = FINAL_WRITE_RETRY_SECONDS
+        for attempt in range(1, FINAL_WRITE_ATTEMPTS + 1):
+            try:
+                self._update(job_id, **fields)
+                return
+            except Exception as e:
+                if attempt == FINAL_WRITE_ATTEMPTS:
+                    print(f"[ERROR] 報表 job 結束狀態寫入失敗：{job_id} {e}")
+                    return
+                print(f"[WARN] 報表 job 結束狀態寫入失敗，{delay:.0f} 秒後重試：{job_id} {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                job_ids = list(self._active)
+            for job_id in job_ids:
+                try:
+                    self._update(job_id)
+                except Exception as e:
+                    print(f"[WARN] 報表 job heartbeat 失敗：{job_id} {e}")
+
+
+def pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
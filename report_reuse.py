@@ -0,0 +1,186 @@
+import gzip
+import json
+import math
+import time
+from datetime import date, datetime, timezone
+
+from worklog_store import to_text
+
+
+# GCS metadata 格式版本；報表欄位或產生方式改變時遞增，讓舊檔不再被沿用
+REPORT_FORMAT_VERSION = "1"
+# 報表內容索引（worklog ID、issue 欄位）存放的 prefix
+REPORT_INDEX_PREFIX = "_report_index"
+# 報表中來自 issue 的欄位（DataFrame 欄位名稱 -> parse_issue 欄位名稱）
+INDEX_ISSUE_COLUMNS = {
+    "project_key": "project_key",
+    "issues_name": "issues_name",
+    "issues_team": "issues_team",
+    "issues_status": "issues_status",
+    "Parent_Key": "customfield_10142",
+    "Worklog_Type": "customfield_10139",
+}
+
+
+def is_closed_period(end_date: str) -> bool:
+    """
+    True when the report period (end_date exclusive) has fully ended.
+    """
+    return datetime.strptime(end_date, "%Y-%m-%d").date() <= date.today()
+
+
+def current_watermark() -> int:
+    """
+    Jira change watermark (UNIX ms) to record for a report whose data is
+    about to be fetched; anything changed after it invalidates the report.
+    """
+    return int(time.time() * 1000)
+
+
+def report_metadata(row_count: int, watermark: int, index_name: str = None) -> dict:
+    metadata = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "row_count": str(row_count),
+        "worklog_watermark": str(watermark),
+        "format_version": REPORT_FORMAT_VERSION,
+    }
+    if index_name:
+        metadata["report_index"] = index_name
+    return metadata
+
+
+def issue_fingerprint(values: list) -> str:
+    """
+    Comparable form of an issue's report fields; custom field objects are
+    compared as text, as the worklog store keeps them.
+    """
+    normalized = []
+    for value in values:
+        value = to_text(value)
+        if isinstance(value, float) and math.isnan(value):
+            value = None
+        normalized.append(value)
+    return json.dumps(normalized, ensure_ascii=False)
+
+
+class ReportIndex:
+    """
+    What a report was built from: the IDs of its worklogs and the report
+    fields of its issues. Saved next to the report so that a later
+    /worklog/deleted entry or issue update only invalidates the report when
+    it touches one of them.
+    complete is False when a worklog ID is unknown (e.g. replayed from an
+    older checkpoint); such an index is not saved.
+    """
+
+    def __init__(self, worklog_ids=(), issues: dict = None) -> None:
+        self.worklog_ids = {str(worklog_id) for worklog_id in worklog_ids}
+        self.issues = dict(issues or {})
+        self.complete = True
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Index of report rows with a worklog_id column (one row per worklog).
+        """
+        index = cls()
+        worklog_ids = df["worklog_id"]
+        if worklog_ids.isna().any():
+            index.complete = False
+        index.worklog_ids = {str(worklog_id) for worklog_id in worklog_ids.dropna()}
+        issues = df.drop_duplicates("issues_key")
+        for key, *values in zip(issues["issues_key"], *(issues[column] for column in INDEX_ISSUE_COLUMNS)):
+            index.issues[key] = issue_fingerprint(values)
+        return index
+
+    def add_issue(self, issue: dict, worklogs: list) -> None:
+        """
+        Add a parsed issue and its worklogs of the period, for reports that
+        do not keep one row per worklog.
+        """
+        if not worklogs:
+            return
+        for worklog in worklogs:
+            if worklog.get("worklog_id") is None:
+                self.complete = False
+            else:
+                self.worklog_ids.add(str(worklog["worklog_id"]))
+        self.issues[issue["issues_key"]] = issue_fingerprint([issue.get(name) for name in INDEX_ISSUE_COLUMNS.values()])
+
+    def has_worklog(self, worklog_id) -> bool:
+        return str(worklog_id) in self.worklog_ids
+
+    def issue_changed(self, issue: dict) -> bool:
+        """
+        Whether a parsed issue (parse_issue) differs from the report, or
+        was not in it.
+        """
+        fingerprint = issue_fingerprint([issue.get(name) for name in INDEX_ISSUE_COLUMNS.values()])
+        return self.issues.get(issue["issues_key"]) != fingerprint
+
+    def to_bytes(self) -> bytes:
+        data = {"worklog_ids": sorted(self.worklog_ids), "issues": self.issues}
+        return gzip.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        data = json.loads(gzip.decompress(data))
+        return cls(data["worklog_ids"], data["issues"])
+
+
+def save_report_index(bucket, filename: str, index: ReportIndex, watermark: int):
+    """
+    Upload the index of a report about to be uploaded as filename; returns
+    the object name to record in the report's metadata, or None when the
+    index is incomplete. Each report version gets its own object, so a
+    failed upload never pairs a report with another version's index.
+    """
+    if not index.complete:
+        return None
+    name = f"{REPORT_INDEX_PREFIX}/{filename}.{watermark}.json.gz"
+    bucket.blob(name).upload_from_string(index.to_bytes(), content_type="application/gzip")
+    return name
+
+
+def delete_old_report_indexes(bucket, filename: str, keep: str = None) -> None:
+    """
+    Remove the indexes of earlier versions of a report once it is replaced.
+    """
+    for blob in bucket.list_blobs(prefix=f"{REPORT_INDEX_PREFIX}/{filename}."):
+        if blob.name != keep:
+            blob.delete()
+
+
+def load_report_index(bucket, metadata: dict):
+    name = metadata.get("report_index")
+    if not name:
+        return None
+    blob = bucket.get_blob(name)
+    if blob is None:
+        return None
+    return ReportIndex.from_bytes(blob.download_as_bytes())
+
+
+def find_reusable_report(bucket, filename: str, jira_api, start_date: str, end_date: str):
+    """
+    Returns the metadata of an existing report in GCS that is still
+    current: the period is closed, the file was written with the current
+    format, and Jira reports no change since its watermark.
+    Returns None when the report has to be generated.
+    """
+    if not is_closed_period(end_date):
+        return None
+    blob = bucket.get_blob(filename)
+    if blob is None or not blob.metadata:
+        return None
+    metadata = blob.metadata
+    if metadata.get("format_version") != REPORT_FORMAT_VERSION or "worklog_watermark" not in metadata:
+        return None
+
+    watermark = int(metadata["worklog_watermark"])
+    index = load_report_index(bucket, metadata)
+    if jira_api.has_changes_since(watermark, start_date, end_date, index):
+        print(f"[INFO] {filename} 產生後 Jira 有異動，重新產生報表")
+        return None
+    print(f"[INFO] {filename} 產生後 Jira 無異動，沿用既有報表（{metadata.get('generated_at')}）")
+    return metadata
@@ -0,0 +1,55 @@
+import codecs
+import gzip
+
+import pandas as pd
+
+
+# 每次轉成 CSV 的列數
+CSV_CHUNK_ROWS = 50000
+# resumable upload 每次送出的大小（必須是 256 KiB 的倍數）
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+# 同時上傳的報表檔案數量
+DEFAULT_UPLOAD_WORKERS = 4
+
+
+def csv_object_name(filename: str, compress: bool = False) -> str:
+    return f"{filename}.gz" if compress else filename
+
+
+def upload_csv(
+    bucket,
+    filename: str,
+    df: pd.DataFrame,
+    metadata: dict = None,
+    compress: bool = False,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> str:
+    """
+    Stream a DataFrame to GCS as a UTF-8 CSV with BOM (readable by Excel).
+    Rows are encoded chunk_rows at a time and written into a resumable
+    upload, so memory use does not grow with the size of the file.
+    With compress=True the object is gzip-compressed, stored as
+    "<filename>.gz" with Content-Encoding: gzip (GCS serves it decompressed
+    to clients that do not accept gzip).
+    Returns the object name.
+    """
+    name = csv_object_name(filename, compress)
+    blob = bucket.blob(name)
+    if metadata:
+        blob.metadata = metadata
+    if compress:
+        blob.content_encoding = "gzip"
+
+    with blob.open("wb", content_type=CSV_CONTENT_TYPE, chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True) as stream:
+        out = gzip.GzipFile(fileobj=stream, mode="wb") if compress else stream
+        try:
+            out.write(codecs.BOM_UTF8)
+            # 空的 DataFrame 也要寫出標題列
+            for start in range(0, max(len(df), 1), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                out.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+        finally:
+            if compress:
+                out.close()
+    return name
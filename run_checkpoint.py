@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from google.cloud import storage
+
+
+# checkpoint 保留秒數，超過後視為放棄的 run 並刪除（僅本地目錄；GCS 請設定 lifecycle rule）
+DEFAULT_CHECKPOINT_RETENTION = 7 * 24 * 3600
+# 寫入 GCS 時累積多少行才寫出一個 segment（每個搜尋頁一定會寫出）
+GCS_FLUSH_LINES = 500
+CHECKPOINT_KINDS = ("pages", "worklogs", "users")
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class CheckpointMismatchError(ValueError):
+    """
+    A run_id was reused with different report parameters.
+    """
+
+
+def validate_run_id(run_id: str) -> str:
+    """
+    run_id becomes part of a path / object name, so only letters, digits,
+    "-" and "_" are accepted.
+    """
+    if not RUN_ID_PATTERN.match(run_id or ""):
+        raise ValueError("run_id must be 1-64 letters, digits, '-' or '_'")
+    return run_id
+
+
+def open_checkpoint_store(path: str):
+    """
+    LocalCheckpointStore for a directory, GCSCheckpointStore for
+    "gs://bucket/prefix".
+    """
+    if path.startswith("gs://"):
+        bucket_name, _, prefix = path[len("gs://"):].partition("/")
+        return GCSCheckpointStore(storage.Client().bucket(bucket_name), prefix.strip("/") or "jira_checkpoints")
+    return LocalCheckpointStore(path)
+
+
+class LocalCheckpointStore:
+    """
+    One directory per run with append-only <kind>.jsonl files; every line
+    is flushed as soon as it is written.
+    """
+
+    flush_lines = 1
+
+    def __init__(self, directory: str, retention: float = DEFAULT_CHECKPOINT_RETENTION) -> None:
+        self.directory = directory
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cleanup()
+
+    def read_meta(self, run_id: str):
+        try:
+            with open(os.path.join(self.directory, run_id, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write_meta(self, run_id: str, meta: dict) -> None:
+        os.makedirs(os.path.join(self.directory, run_id), exist_ok=True)
+        with open(os.path.join(self.directory, run_id, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def read_lines(self, run_id: str, kind: str) -> list[str]:
+        try:
+            with open(os.path.join(self.directory, run_id, f"{kind}.jsonl"), encoding="utf-8") as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def append_lines(self, run_id: str, kind: str, lines: list[str]) -> None:
+        with self._lock:
+            with open(os.path.join(self.directory, run_id, f"{kind}.jsonl"), "a", encoding="utf-8") as f:
+                f.write("".join(f"{line}\n" for line in lines))
+                f.flush()
+
+    def delete(self, run_id: str) -> None:
+        shutil.rmtree(os.path.join(self.directory, run_id), ignore_errors=True)
+
+    def _cleanup(self) -> None:
+        cutoff = time.time() - self.retention
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+class GCSCheckpointStore:
+    """
+    GCS objects cannot be appended to, so each flush writes a new
+    <prefix>/<run_id>/<kind>-<seq>.jsonl segment; reading concatenates the
+    segments in order.
+    """
+
+    flush_lines = GCS_FLUSH_LINES
+
+    def __init__(self, bucket, prefix: str) -> None:
+        self.bucket = bucket
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._next_segment = {}
+
+    def read_meta(self, run_id: str):
+        blob = self.bucket.get_blob(f"{self.prefix}/{run_id}/meta.json")
+        if blob is None:
+            return None
+        return json.loads(blob.download_as_bytes())
+
+    def write_meta(self, run_id: str, meta: dict) -> None:
+        self.bucket.blob(f"{self.prefix}/{run_id}/meta.json").upload_from_string(
+            json.dumps(meta, ensure_ascii=False), content_type="application/json"
+        )
+
+    def read_lines(self, run_id: str, kind: str) -> list[str]:
+        blobs = sorted(
+            self.bucket.list_blobs(prefix=f"{self.prefix}/{run_id}/{kind}-"), key=lambda blob: blob.name
+        )
+        with self._lock:
+            self._next_segment[(run_id, kind)] = len(blobs)
+        lines = []
+        for blob in blobs:
+            lines.extend(blob.download_as_bytes().decode("utf-8").splitlines())
+        return lines
+
+    def append_lines(self, run_id: str, kind: str, lines: list[str]) -> None:
+        with self._lock:
+            segment = self._next_segment.get((run_id, kind), 0)
+            self._next_segment[(run_id, kind)] = segment + 1
+        self.bucket.blob(f"{self.prefix}/{run_id}/{kind}-{segment:06d}.jsonl").upload_from_string(
+            "".join(f"{line}\n" for line in lines), content_type="application/x-ndjson"
+        )
+
+    def delete(self, run_id: str) -> None:
+        for blob in self.bucket.list_blobs(prefix=f"{self.prefix}/{run_id}/"):
+            blob.delete()
+
+
+class RunCheckpoint:
+    """
+    Persistent progress of one report run, identified by run_id: the
+    search pages already read (with the cursor of the next page), the
+    worklogs fetched per issue and the users resolved.
+    A run started again with the same run_id replays what was saved and
+    only asks Jira for the rest. A run_id can only be reused with the same
+    parameters; state is saved by the first run and read back by later ones
+    as checkpoint.state.
+    """
+
+    def __init__(self, store, run_id: str, params: dict, state: dict = None) -> None:
+        self.store = store
+        self.run_id = validate_run_id(run_id)
+        meta = store.read_meta(run_id)
+        if meta is not None and meta.get("params") != params:
+            raise CheckpointMismatchError(
+                f"run_id {run_id} was started with different parameters: {meta.get('params')}"
+            )
+        if meta is None:
+            meta = {"params": params, "state": state, "created_at": time.time()}
+            store.write_meta(run_id, meta)
+        self.state = meta.get("state")
+        # 第一次執行的時間（UNIX 秒），續跑時報表的異動水位沿用這個時間點
+        self.started_at = meta["created_at"]
+
+        self._lock = threading.Lock()
+        self._buffers = {kind: [] for kind in CHECKPOINT_KINDS}
+        self.pages = [(record["issues"], record["next_page_token"]) for record in self._read("pages")]
+        self.worklogs = {record["issue"]: record["worklogs"] for record in self._read("worklogs")}
+        self.users = {record["user_id"]: record["data"] for record in self._read("users")}
+        if self.pages:
+            print(
+                f"[INFO] 從 checkpoint 繼續 run {run_id}：{len(self.pages)} 頁 search、"
+                f"{len(self.worklogs)} 個 issue 的 worklogs、{len(self.users)} 位使用者"
+            )
+
+    def _read(self, kind: str) -> list[dict]:
+        records = []
+        for line in self.store.read_lines(self.run_id, kind):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 中斷時寫到一半的最後一行
+                continue
+        return records
+
+    def iter_pages(self, make_pages):
+        """
+        Yield the saved search pages, then continue the search with
+        make_pages(next_page_token), which must yield (issues, next token)
+        pairs; every new page is saved before it is handed on.
+        """
+        for issues, _ in self.pages:
+            yield issues
+        if self.pages and self.pages[-1][1] is None:
+            return
+        next_page_token = self.pages[-1][1] if self.pages else None
+        for issues, next_page_token in make_pages(next_page_token):
+            # 在 issue 被後續步驟修改前寫入
+            self._append("pages", {"issues": issues, "next_page_token": next_page_token})
+            # 每個搜尋頁都是一個 checkpoint：連同累積的 worklogs / users 一起寫出
+            self.flush()
+            yield issues
+
+    def get_worklogs(self, issue_key: str, load) -> list:
+        if issue_key in self.worklogs:
+            return self.worklogs[issue_key]
+        worklogs = load()
+        self._append("worklogs", {"issue": issue_key, "worklogs": worklogs})
+        return worklogs
+
+    def get_user(self, user_id: str, load) -> dict:
+        if user_id in self.users:
+            return self.users[user_id]
+        data = load()
+        self._append("users", {"user_id": user_id, "data": data})
+        return data
+
+    def _append(self, kind: str, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._buffers[kind].append(line)
+            if len(self._buffers[kind]) < self.store.flush_lines:
+                return
+            lines, self._buffers[kind] = self._buffers[kind], []
+        self.store.append_lines(self.run_id, kind, lines)
+
+    def flush(self) -> None:
+        for kind in CHECKPOINT_KINDS:
+            with self._lock:
+                lines, self._buffers[kind] = self._buffers[kind], []
+            if lines:
+                self.store.append_lines(self.run_id, kind, lines)
+
+    def delete(self) -> None:
+        """
+        Called once the report is uploaded; the run cannot be resumed
+        afterwards.
+        """
+        self.store.delete(self.run_id)
+
+
+class CheckpointedJiraAPI:
+    """
+    Wraps a Jira API object so that the worklog and user lookups made by
+    WorklogFetcher go through a RunCheckpoint; everything else is passed
+    through.
+    """
+
+    def __init__(self, jira_api, checkpoint: RunCheckpoint) -> None:
+        self.jira_api = jira_api
+        self.checkpoint = checkpoint
+
+    def __getattr__(self, name):
+        return getattr(self.jira_api, name)
+
+    def get_worklog_from_issue_id(self, issue_id: str, **kwargs) -> list[dict]:
+        return self.checkpoint.get_worklogs(
+            issue_id, lambda: self.jira_api.get_worklog_from_issue_id(issue_id, **kwargs)
+        )
+
+    def get_user_group_info_from_user_id(self, user_id: str) -> dict:
+        return self.checkpoint.get_user(user_id, lambda: self.jira_api.get_user_group_info_from_user_id(user_id))
@@ -0,0 +1,100 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesces identical reports that are requested while one is already
+    being generated, so they share one Jira crawl and one upload.
+    Within a worker, callers of the same key wait on the running call's
+    future. Across the gunicorn workers of an instance, a file lock per key
+    serializes the runs and the leader's result is saved next to the lock:
+    a caller that waited for the lock reuses that result if it was produced
+    after the caller arrived, and runs the report itself otherwise (e.g.
+    when the leader failed).
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, report_type: str, params: dict, run, on_wait=None) -> dict:
+        """
+        Returns run()'s result (a JSON-serializable dict), or the result of
+        an identical call that was in flight.
+        on_wait() is called when this caller has to wait for another one.
+        """
+        key = report_key(report_type, params)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            print(f"[INFO] 相同報表正在產生中，等待結果：{report_type} {params}")
+            if on_wait is not None:
+                on_wait()
+            return future.result()
+
+        try:
+            result = self._run_locked(key, report_type, params, run, on_wait)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _run_locked(self, key: str, report_type: str, params: dict, run, on_wait) -> dict:
+        requested_at = time.time()
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        result_path = os.path.join(self.directory, f"{key}.json")
+        with open(lock_path, "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print(f"[INFO] 其他 worker 正在產生相同報表，等待結果：{report_type} {params}")
+                if on_wait is not None:
+                    on_wait()
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                shared = read_result(result_path)
+                if shared is not None and shared["finished_at"] >= requested_at:
+                    print(f"[INFO] 沿用其他 worker 產生的報表：{shared['result'].get('filename')}")
+                    return shared["result"]
+            try:
+                result = run()
+                write_result(result_path, {"finished_at": time.time(), "result": result})
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def report_key(report_type: str, params: dict) -> str:
+    payload = json.dumps({"type": report_type, "params": params}, sort_keys=True, ensure_ascii=False)
+    return f"{report_type}-{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]}"
+
+
+def read_result(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_result(path: str, data: dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
@@ -0,0 +1,76 @@
+"""
+Reports over a Jira with no issues (empty project, empty months) against
+the benchmark Jira stub, with GCS replaced by the in-memory bucket.
+"""
+import pytest
+from fastapi import HTTPException
+from google.cloud import storage
+
+from jira_stub import StubConfig, start_stub
+from run_benchmark import MemoryStorageClient
+
+
+BUCKET = "test-reports"
+
+
+@pytest.fixture(scope="module")
+def main_module(tmp_path_factory):
+    server = start_stub(StubConfig(issues=0, latency_ms=0))
+    work_dir = tmp_path_factory.mktemp("jira")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(storage, "Client", MemoryStorageClient)
+        mp.setenv("JIRA_DOMAIN", f"http://127.0.0.1:{server.server_address[1]}")
+        mp.setenv("GCS_BUCKET", BUCKET)
+        mp.setenv("GCP_PROJECT_NUM", "0")
+        mp.setenv("JIRA_EMAIL_SECRET_NAME", "test-email")
+        mp.setenv("JIRA_TOKEN_SECRET_NAME", "test-token")
+        mp.setenv("JIRA_CACHE_PATH", "")
+        mp.setenv("JIRA_LOCK_PATH", str(work_dir / "locks"))
+        mp.setenv("JIRA_JOBS_PATH", str(work_dir / "jobs"))
+        mp.setenv("JIRA_CHECKPOINT_PATH", str(work_dir / "checkpoints"))
+        import main
+
+        mp.setattr(main, "access_secret", lambda secret_name, version="latest": "test")
+        yield main
+    server.shutdown()
+
+
+@pytest.fixture
+def bucket():
+    bucket = MemoryStorageClient().bucket(BUCKET)
+    bucket.objects.clear()
+    return bucket
+
+
+def test_project_report_without_issues(main_module, bucket):
+    result = main_module.post_reportsByProjects("P0")
+    assert result["filename"] in bucket.objects
+
+
+def test_project_summary_report_without_issues(main_module, bucket):
+    result = main_module.post_reportsByProjects("P0", summary_only=True)
+    assert result["filename"] in bucket.objects
+
+
+def test_monthly_report_for_empty_month(main_module, bucket):
+    result = main_module.post_monthlyReports("2024-06-01", "2024-07-01", force=True)
+    data = bucket.objects[result["filename"]][0].decode("utf-8-sig")
+    assert data.splitlines()[0].startswith("project_name,")
+    assert len(data.splitlines()) == 1
+
+
+def test_backfill_over_empty_months(main_module, bucket):
+    result = main_module.get_monthlyBackfill("2024-05", "2024-06", force=True)
+    assert result["months_generated"] == 2
+    assert all(report["filename"] in bucket.objects for report in result["reports"])
+
+
+def test_rollup_for_empty_month(main_module, bucket):
+    result = main_module.get_monthlyRollup("2024-06-01", "2024-07-01", force=True)
+    assert result["filename"] in bucket.objects
+
+
+def test_invalid_date_is_rejected(main_module):
+    with pytest.raises(HTTPException) as excinfo:
+        main_module.post_monthlyReports("2024-06", "2024-07-01")
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,25 @@
+import pytest
+
+from jira_api_monthly_report import JiraMonthlyAPI
+from jira_stub import StubConfig, day, start_stub
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = start_stub(StubConfig(issues=200, latency_ms=0))
+    yield server
+    server.shutdown()
+
+
+def test_worklogs_by_date_range_reads_every_updated_page(stub):
+    jira_api = JiraMonthlyAPI(f"http://127.0.0.1:{stub.server_address[1]}", "test", "test")
+    stub.stats.reset()
+    worklogs = jira_api.get_worklogs_by_date_range("2024-03-01", "2024-06-01")
+
+    expected = {
+        worklog_id for worklog_id, worklog in stub.dataset.worklogs_by_id.items()
+        if "2024-03-01" <= day(worklog) < "2024-06-01"
+    }
+    assert {worklog["worklog_id"] for worklog in worklogs} == expected
+    # /worklog/updated 跨多頁
+    assert stub.stats.snapshot()["by_endpoint"]["/rest/api/3/worklog/updated"] > 1
@@ -0,0 +1,40 @@
+import pytest
+
+from jira_api_project_report import JiraProjectAPI
+from jira_fetcher import WorklogFetcher
+from jira_stub import StubConfig, start_stub
+
+
+GROUP_MEMBER = "/rest/api/3/group/member"
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = start_stub(StubConfig(issues=30, latency_ms=0))
+    yield server
+    server.shutdown()
+
+
+def project_api(stub):
+    return JiraProjectAPI(f"http://127.0.0.1:{stub.server_address[1]}", "test", "test")
+
+
+def test_user_calls_count_the_requests_of_user_lookups(stub):
+    jira_api = project_api(stub)
+    stub.stats.reset()
+    fetcher = WorklogFetcher(jira_api, max_workers=4)
+    _, user_data = fetcher.fetch_pages(jira_api.iter_issue_pages_from_project_id("P0"))
+
+    assert user_data
+    # 只計入使用者查詢（群組成員索引分頁），不含 search/jql 與 worklog 請求
+    assert fetcher.user_calls == stub.stats.snapshot()["by_endpoint"][GROUP_MEMBER]
+
+
+def test_user_calls_are_zero_once_the_group_index_is_built(stub):
+    jira_api = project_api(stub)
+    WorklogFetcher(jira_api).fetch_pages(jira_api.iter_issue_pages_from_project_id("P0"))
+
+    fetcher = WorklogFetcher(jira_api)
+    _, user_data = fetcher.fetch_pages(jira_api.iter_issue_pages_from_project_id("P1"))
+    assert user_data
+    assert fetcher.user_calls == 0
@@ -0,0 +1,44 @@
+from jira_api_monthly_report import JiraMonthlyAPI
+from jira_api_project_report import JiraProjectAPI
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class ProjectSearchSession:
+    """
+    /project/search that, like Jira, only includes projectCategory when
+    it is expanded.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def get(self, url, headers=None, auth=None, params=None):
+        self.queries.append(dict(params))
+        values = []
+        for key in params.get("keys", ["P0", "P1"]):
+            project = {"key": key, "name": f"Project {key}"}
+            if params.get("expand") == "projectCategory":
+                project["projectCategory"] = {"id": "1", "name": "Delivery"}
+            values.append(project)
+        return FakeResponse({"values": values, "isLast": True})
+
+
+def test_both_apis_read_project_categories():
+    monthly_session = ProjectSearchSession()
+    project_session = ProjectSearchSession()
+    monthly = JiraMonthlyAPI("http://jira", "test", "test", session=monthly_session)
+    project = JiraProjectAPI("http://jira", "test", "test", session=project_session)
+
+    by_keys = monthly.get_projects_by_keys(["P0", "P1"])
+    assert list(by_keys.values()) == project.get_projects(keys=["P0", "P1"])
+    assert by_keys["P0"] == {"project_name": "Project P0", "project_key": "P0", "project_category": "Delivery"}
+    assert monthly_session.queries == project_session.queries
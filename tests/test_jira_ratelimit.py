@@ -0,0 +1,101 @@
+import time
+
+import jira_ratelimit
+from jira_ratelimit import AdaptiveRateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+OK = FakeResponse(200)
+THROTTLED = FakeResponse(429, {"Retry-After": "0"})
+
+
+def send(limiter, count):
+    for _ in range(count):
+        limiter.acquire()
+        limiter.release()
+
+
+def test_429_halves_rate_and_concurrency_once_per_window():
+    limiter = AdaptiveRateLimiter(rate=10, max_concurrency=8)
+    assert limiter.on_response(THROTTLED, 0) == 0
+    # 同時送出的請求一起收到 429，只降速一次
+    limiter.on_response(THROTTLED, 0)
+
+    stats = limiter.stats()
+    assert stats["rate_limit"] == 5
+    assert stats["concurrency_limit"] == 4
+    assert stats["throttled_responses"] == 2
+
+
+def test_first_429_starts_from_the_rate_actually_sent():
+    limiter = AdaptiveRateLimiter(max_concurrency=8)
+    assert limiter.stats()["rate_limit"] is None
+    send(limiter, 20)
+    limiter.on_response(THROTTLED, 0)
+    assert limiter.stats()["rate_limit"] == 10
+
+
+def test_recovery_is_fast_up_to_the_throttled_level_then_slow():
+    limiter = AdaptiveRateLimiter(rate=10, max_concurrency=8)
+    limiter.on_response(THROTTLED, 0)
+    # 5 -> 9 (RECOVERY_RATIO)：每個成功回應 +INCREASE_STEP
+    for _ in range(8):
+        limiter.on_response(OK, 0)
+    assert limiter.stats()["rate_limit"] == 9
+    limiter.on_response(OK, 0)
+    assert limiter.stats()["rate_limit"] == round(9 + 1 / 9, 3)
+
+
+def test_recovery_is_capped_by_the_configured_limits():
+    limiter = AdaptiveRateLimiter(rate=10, max_concurrency=8)
+    limiter.on_response(THROTTLED, 0)
+    for _ in range(200):
+        limiter.on_response(OK, 0)
+    stats = limiter.stats()
+    assert stats["rate_limit"] == 10
+    assert stats["concurrency_limit"] == 8
+
+
+def test_near_limit_only_stops_growth():
+    limiter = AdaptiveRateLimiter(rate=10, max_concurrency=8)
+    limiter.on_response(THROTTLED, 0)
+    limiter.on_response(FakeResponse(200, {"X-RateLimit-NearLimit": "true"}), 0)
+    assert limiter.stats()["rate_limit"] == 5
+
+
+def test_server_errors_back_off_without_slowing_down():
+    limiter = AdaptiveRateLimiter(rate=10, max_concurrency=8)
+    assert limiter.on_response(FakeResponse(500), 0) is not None
+    stats = limiter.stats()
+    assert stats["rate_limit"] == 10
+    assert stats["server_errors"] == 1
+
+
+def test_retry_after_pauses_every_caller_and_is_counted_once():
+    limiter = AdaptiveRateLimiter(max_concurrency=8)
+    send(limiter, 20)
+    limiter.on_response(FakeResponse(429, {"Retry-After": "0.2"}), 0)
+    limiter.on_response(FakeResponse(429, {"Retry-After": "0.2"}), 0)
+
+    started = time.monotonic()
+    send(limiter, 1)
+    assert time.monotonic() - started >= 0.15
+    assert 0.15 <= limiter.stats()["throttled_seconds"] < 0.3
+
+
+def test_uncapped_limiter_returns_to_uncapped_after_recovery(monkeypatch):
+    monkeypatch.setattr(jira_ratelimit, "RATE_WINDOW_SECONDS", 0.05)
+    limiter = AdaptiveRateLimiter(max_concurrency=8)
+    send(limiter, 20)
+    limiter.on_response(THROTTLED, 0)
+    assert limiter.stats()["rate_limit"] is not None
+
+    # 暫停結束超過一個時間窗，且速率上限遠高於實際送出的速率
+    time.sleep(0.1)
+    limiter.on_response(OK, 0)
+    assert limiter.stats()["rate_limit"] is None
@@ -0,0 +1,51 @@
+import threading
+
+import jira_search
+from jira_search import iter_pages_in_order
+
+
+def counting_source(name, pages, produced):
+    def make_pages():
+        for i in range(pages):
+            produced[name] += 1
+            yield f"{name}{i}"
+    return make_pages
+
+
+def test_pages_come_out_source_by_source():
+    produced = {"a": 0, "b": 0, "c": 0}
+    sources = [counting_source(name, 5, produced) for name in produced]
+    pages = list(iter_pages_in_order(sources, max_workers=2))
+    assert pages == [f"{name}{i}" for name in "abc" for i in range(5)]
+
+
+def test_later_sources_buffer_a_bounded_number_of_pages():
+    produced = {"a": 0, "b": 0}
+    release = threading.Event()
+
+    def slow_first():
+        release.wait(5)
+        yield "a0"
+
+    pages = iter_pages_in_order([slow_first, counting_source("b", 50, produced)])
+    first = threading.Thread(target=lambda: next(pages))
+    first.start()
+    # b 在 a 完成前最多多讀取一頁（佇列滿時卡在下一個 put）
+    for _ in range(100):
+        if produced["b"] >= jira_search.SEARCH_BUFFER_PAGES + 1:
+            break
+        threading.Event().wait(0.01)
+    assert produced["b"] == jira_search.SEARCH_BUFFER_PAGES + 1
+    release.set()
+    first.join()
+    assert list(pages) == [f"b{i}" for i in range(50)]
+
+
+def test_stopping_early_releases_blocked_sources():
+    produced = {"a": 0}
+    pages = iter_pages_in_order([counting_source("a", 1000, produced)])
+    assert next(pages) == "a0"
+    pages.close()
+    threading.Event().wait(0.3)
+    assert produced["a"] <= jira_search.SEARCH_BUFFER_PAGES + 2
+    assert not [t for t in threading.enumerate() if t.name.startswith("jira-search")]
@@ -0,0 +1,103 @@
+"""
+Job status shared through GCS between managers that do not share a
+process (different Cloud Run instances), with the in-memory bucket of the
+benchmark.
+"""
+import threading
+import time
+
+import report_jobs
+from report_jobs import GCSJobStore, ReportJobManager
+from run_benchmark import MemoryBucket
+
+
+def wait_for(manager, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not reach {status}: {job}")
+
+
+def test_job_status_is_visible_from_another_instance():
+    bucket = MemoryBucket()
+    owner = ReportJobManager(GCSJobStore(bucket, "jobs"))
+    other = ReportJobManager(GCSJobStore(bucket, "jobs"))
+
+    job = owner.submit("monthly", {"start_date": "2024-06-01"}, lambda progress: {"filename": "report.csv"})
+
+    done = wait_for(other, job["job_id"], "succeeded")
+    assert done["filename"] == "report.csv"
+    assert other.get("0" * 32) is None
+
+
+def test_job_without_heartbeat_is_reported_failed(monkeypatch):
+    bucket = MemoryBucket()
+    owner = ReportJobManager(GCSJobStore(bucket, "jobs"))
+    other = ReportJobManager(GCSJobStore(bucket, "jobs"))
+    release = threading.Event()
+
+    def run(progress):
+        release.wait(5)
+        return {"filename": "report.csv"}
+
+    job = owner.submit("monthly", {}, run)
+    try:
+        wait_for(other, job["job_id"], "running")
+        # 擁有 job 的 instance 超過 JOB_STALE_SECONDS 沒有更新 heartbeat
+        monkeypatch.setattr(report_jobs, "JOB_STALE_SECONDS", 0)
+        failed = other.get(job["job_id"])
+        assert failed["status"] == "failed"
+        assert failed["error"] == "worker exited before the job finished"
+    finally:
+        release.set()
+
+
+class FlakyJobStore(GCSJobStore):
+    """
+    GCSJobStore whose writes fail while fail_writes > 0 (like a GCS 429
+    on an object rewritten too quickly).
+    """
+
+    def __init__(self, bucket, prefix):
+        super().__init__(bucket, prefix)
+        self.fail_writes = 0
+
+    def write(self, job):
+        if self.fail_writes > 0:
+            self.fail_writes -= 1
+            raise RuntimeError("429 Too Many Requests")
+        super().write(job)
+
+
+def test_failed_progress_writes_do_not_fail_the_job():
+    store = FlakyJobStore(MemoryBucket(), "jobs")
+    manager = ReportJobManager(store)
+
+    def run(progress):
+        store.fail_writes = 2
+        progress.stage("fetching_issues")
+        progress.stage("uploading")
+        return {"filename": "report.csv"}
+
+    job = manager.submit("monthly", {}, run)
+    done = wait_for(manager, job["job_id"], "succeeded")
+    assert done["filename"] == "report.csv"
+
+
+def test_final_status_write_is_retried(monkeypatch):
+    monkeypatch.setattr(report_jobs, "FINAL_WRITE_RETRY_SECONDS", 0.01)
+    store = FlakyJobStore(MemoryBucket(), "jobs")
+    manager = ReportJobManager(store)
+
+    def run(progress):
+        # run 結束後的前兩次寫入（succeeded）失敗
+        store.fail_writes = 2
+        return {"filename": "report.csv"}
+
+    job = manager.submit("monthly", {}, run)
+    done = wait_for(manager, job["job_id"], "succeeded")
+    assert done["filename"] == "report.csv"
+    assert store.fail_writes == 0
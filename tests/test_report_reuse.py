@@ -0,0 +1,101 @@
+"""
+has_changes_since with and without the index of the existing report.
+"""
+import pandas as pd
+import pytest
+
+from jira_api_monthly_report import JiraMonthlyAPI
+from report_reuse import ReportIndex
+
+
+ISSUE = {
+    "issues_key": "P1-1",
+    "project_key": "P1",
+    "issues_name": "Migration",
+    "issues_team": "Data",
+    "issues_status": None,
+    "customfield_10142": None,
+    "customfield_10139": "Delivery",
+}
+
+
+def report_frame():
+    return pd.DataFrame({
+        "project_key": ["P1", "P1"],
+        "issues_name": ["Migration", "Migration"],
+        "issues_key": ["P1-1", "P1-1"],
+        "issues_team": ["Data", "Data"],
+        "issues_status": [None, None],
+        "worklog_id": ["100", "101"],
+        "Parent_Key": [None, None],
+        "Worklog_Type": ["Delivery", "Delivery"],
+    })
+
+
+def worklog(worklog_id, started):
+    return {"worklog_id": worklog_id, "started": f"{started}T09:00:00.000+0800"}
+
+
+@pytest.fixture
+def jira_api():
+    api = JiraMonthlyAPI("http://jira.invalid", "user", "token")
+    api.updated = []
+    api.deleted = []
+    api.updated_issues = []
+    api.get_updated_worklog_ids = lambda since: ([w["worklog_id"] for w in api.updated], since)
+    api.get_worklogs_by_ids = lambda ids: [w for w in api.updated if w["worklog_id"] in ids]
+    api.get_deleted_worklog_ids = lambda since: (api.deleted, since)
+    api.get_issues_by_jql = lambda jql: api.updated_issues
+    return api
+
+
+def has_changes(api, index):
+    return api.has_changes_since(0, "2024-06-01", "2024-07-01", index)
+
+
+def test_index_round_trip():
+    index = ReportIndex.from_frame(report_frame())
+    restored = ReportIndex.from_bytes(index.to_bytes())
+    assert restored.worklog_ids == {"100", "101"}
+    assert not restored.issue_changed(ISSUE)
+
+
+def test_deleted_worklog_outside_the_report_is_ignored(jira_api):
+    jira_api.deleted = [999]
+    assert not has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_deleted_worklog_of_the_report_is_a_change(jira_api):
+    jira_api.deleted = [101]
+    assert has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_worklog_moved_out_of_the_period_is_a_change(jira_api):
+    jira_api.updated = [worklog("100", "2024-08-02")]
+    assert has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_worklog_of_another_period_is_ignored(jira_api):
+    jira_api.updated = [worklog("555", "2024-08-02")]
+    assert not has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_issue_update_without_report_field_change_is_ignored(jira_api):
+    jira_api.updated_issues = [dict(ISSUE)]
+    assert not has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_issue_rename_is_a_change(jira_api):
+    jira_api.updated_issues = [dict(ISSUE, issues_name="Migration phase 2")]
+    assert has_changes(jira_api, ReportIndex.from_frame(report_frame()))
+
+
+def test_without_index_any_deletion_is_a_change(jira_api):
+    jira_api.deleted = [999]
+    assert has_changes(jira_api, None)
+
+
+def test_index_with_unknown_worklog_ids_is_incomplete():
+    df = report_frame()
+    df.loc[0, "worklog_id"] = None
+    assert not ReportIndex.from_frame(df).complete
@@ -0,0 +1,81 @@
+"""
+A monthly run interrupted after a few search pages and resumed with the
+same run_id, against the benchmark Jira stub.
+"""
+import pytest
+
+import jira_stub
+import main
+from jira_api_monthly_report import JiraMonthlyAPI
+from jira_stub import StubConfig, start_stub
+from report_jobs import ReportProgress
+from run_benchmark import MemoryBucket
+from run_checkpoint import GCSCheckpointStore, LocalCheckpointStore, RunCheckpoint
+
+
+START_DATE, END_DATE = "2024-01-01", "2025-03-01"
+PARAMS = {"report": "monthly", "start_date": START_DATE, "end_date": END_DATE}
+SEARCH = "/rest/api/3/search/jql"
+PAGE_SIZE = 20
+PAGES_BEFORE_FAILURE = 3
+
+
+class InterruptedRun(Exception):
+    pass
+
+
+class InterruptingAPI(JiraMonthlyAPI):
+    """
+    Search pages stop with an error after PAGES_BEFORE_FAILURE pages, like
+    a run killed part-way.
+    """
+
+    def iter_active_issue_pages(self, *args, **kwargs):
+        for count, page in enumerate(super().iter_active_issue_pages(*args, **kwargs)):
+            if count == PAGES_BEFORE_FAILURE:
+                raise InterruptedRun()
+            yield page
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with pytest.MonkeyPatch.context() as mp:
+        # 小的 search 頁，讓報表跨多頁
+        mp.setattr(jira_stub, "SEARCH_PAGE_LIMIT", PAGE_SIZE)
+        server = start_stub(StubConfig(issues=120, latency_ms=0))
+        yield server
+        server.shutdown()
+
+
+@pytest.fixture(params=["local", "gcs"])
+def checkpoint_store(request, tmp_path):
+    if request.param == "local":
+        return LocalCheckpointStore(str(tmp_path / "checkpoints"))
+    return GCSCheckpointStore(MemoryBucket(), "checkpoints")
+
+
+def build_csv(jira_api, checkpoint=None) -> str:
+    df = main.build_report_df_from_jira(jira_api, START_DATE, END_DATE, ReportProgress(), checkpoint=checkpoint)
+    return df.to_csv(index=False)
+
+
+def test_resumed_run_skips_saved_pages_and_matches_a_full_run(stub, checkpoint_store):
+    domain = f"http://127.0.0.1:{stub.server_address[1]}"
+    stub.stats.reset()
+    expected = build_csv(JiraMonthlyAPI(domain, "test", "test"))
+    full_pages = stub.stats.snapshot()["by_endpoint"][SEARCH]
+    assert full_pages > PAGES_BEFORE_FAILURE + 1
+
+    with pytest.raises(InterruptedRun):
+        build_csv(InterruptingAPI(domain, "test", "test"), RunCheckpoint(checkpoint_store, "run-1", PARAMS))
+
+    stub.stats.reset()
+    checkpoint = RunCheckpoint(checkpoint_store, "run-1", PARAMS)
+    assert len(checkpoint.pages) == PAGES_BEFORE_FAILURE
+    assert build_csv(JiraMonthlyAPI(domain, "test", "test"), checkpoint) == expected
+
+    by_endpoint = stub.stats.snapshot()["by_endpoint"]
+    # 已存下的 search 頁不再查詢，從 cursor 接續
+    assert by_endpoint[SEARCH] == full_pages - PAGES_BEFORE_FAILURE
+    # 已存下的使用者不再查詢群組成員
+    assert "/rest/api/3/group/member" not in by_endpoint
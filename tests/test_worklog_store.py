@@ -0,0 +1,110 @@
+"""
+WorklogStore.sync against an in-memory Jira whose worklogs, deletions,
+issues and projects the tests change between syncs.
+"""
+import pytest
+
+import worklog_store
+from worklog_store import WorklogStore
+
+
+class FakeJira:
+    def __init__(self):
+        # /worklog/updated 的時間為 UNIX 毫秒（2024-07）
+        self.clock = 1_720_000_000_000
+        self.worklogs = {}
+        self.deleted = {}
+        self.issues = {
+            "100": {
+                "issue_id": "100", "issues_key": "P0-1", "issues_name": "Issue 1", "project_key": "P0",
+                "issues_team": None, "issues_status": None, "customfield_10142": None,
+                "customfield_10139": None, "created": "2024-01-01T00:00:00.000+0800",
+            },
+        }
+        self.projects = {"P0": {"project_name": "Project 0", "project_key": "P0", "project_category": "Delivery"}}
+        self.updated_since = []
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def add_worklog(self, worklog_id, started, hours, issue_id="100"):
+        self.worklogs[worklog_id] = {
+            "issue_id": issue_id, "worklog_id": worklog_id, "owner": "User A", "owner_id": "acc-a",
+            "started": f"{started}T09:00:00.000+0800", "time_spent_hr": hours, "updated": self.tick(),
+        }
+
+    def delete_worklog(self, worklog_id):
+        del self.worklogs[worklog_id]
+        self.deleted[worklog_id] = self.tick()
+
+    def get_updated_worklog_ids(self, since, on_ids=None):
+        self.updated_since.append(since)
+        changed = [w for w in self.worklogs.values() if w["updated"] >= since]
+        return [w["worklog_id"] for w in changed], max([w["updated"] for w in changed], default=since)
+
+    def get_deleted_worklog_ids(self, since):
+        changed = {worklog_id: at for worklog_id, at in self.deleted.items() if at >= since}
+        return list(changed), max(changed.values(), default=since)
+
+    def get_worklogs_by_ids(self, worklog_ids):
+        return [
+            {name: value for name, value in self.worklogs[worklog_id].items() if name != "updated"}
+            for worklog_id in worklog_ids
+        ]
+
+    def get_issues_by_jql(self, jql):
+        return list(self.issues.values())
+
+    def get_issues_by_ids(self, issue_ids):
+        return [self.issues[issue_id] for issue_id in issue_ids]
+
+    def get_projects_by_keys(self, project_keys):
+        return {key: dict(self.projects[key]) for key in project_keys if key in self.projects}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WorklogStore(str(tmp_path / "worklogs.sqlite"))
+
+
+def test_sync_refreshes_renamed_projects(store, monkeypatch):
+    jira = FakeJira()
+    jira.add_worklog("1", "2024-06-03", 1.0)
+    store.sync(jira, "2024-06-01")
+    jira.projects["P0"].update(project_name="Project Zero", project_category="Internal")
+
+    # 尚未超過 PROJECT_REFRESH_SECONDS：沿用 store 內的 project 資訊
+    assert store.sync(jira, "2024-06-01")["projects_refreshed"] == 0
+    assert store.get_report_df("2024-06-01", "2024-07-01")["project_name"].tolist() == ["Project 0"]
+
+    monkeypatch.setattr(worklog_store, "PROJECT_REFRESH_SECONDS", -1)
+    assert store.sync(jira, "2024-06-01")["projects_refreshed"] == 1
+    df = store.get_report_df("2024-06-01", "2024-07-01")
+    assert df["project_name"].tolist() == ["Project Zero"]
+    assert df["project_category"].tolist() == ["Internal"]
+
+
+def test_sync_applies_updates_and_deletions_since_the_watermark(store):
+    jira = FakeJira()
+    jira.add_worklog("1", "2024-06-03", 1.0)
+    jira.add_worklog("2", "2024-06-04", 2.0)
+    jira.add_worklog("3", "2024-05-20", 4.0)
+    first = store.sync(jira, "2024-06-01")
+    assert first["backfill"]
+    watermark = jira.clock
+
+    jira.add_worklog("1", "2024-06-05", 1.5)
+    jira.add_worklog("4", "2024-06-10", 3.0)
+    jira.delete_worklog("2")
+    second = store.sync(jira, "2024-06-01")
+
+    # 第二次只向 Jira 查詢水位之後的異動
+    assert not second["backfill"]
+    assert jira.updated_since[-1] == watermark
+    assert second["worklogs_deleted"] == 1
+
+    df = store.get_report_df("2024-06-01", "2024-07-01")
+    assert df["worklog_id"].tolist() == ["1", "4"]
+    assert df["worklog_time_spent_hr"].tolist() == [1.5, 3.0]
+    assert df["worklog_start_date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-06-05", "2024-06-10"]
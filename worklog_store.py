@@ -0,0 +1,282 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from dateutil.parser import isoparse
+
+from jira_api_monthly_report import WORKLOG_LIST_BATCH_SIZE, to_started_window, started_date
+
+
+# 使用者群組資訊超過此秒數會重新向 Jira 查詢
+USER_REFRESH_SECONDS = 24 * 3600
+# project 名稱 / 類別超過此秒數會在同步時重新向 Jira 查詢
+PROJECT_REFRESH_SECONDS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS worklogs (
+    worklog_id TEXT PRIMARY KEY,
+    issue_id TEXT NOT NULL,
+    owner TEXT,
+    owner_id TEXT,
+    start_date TEXT NOT NULL,
+    time_spent_hr REAL
+);
+CREATE INDEX IF NOT EXISTS idx_worklogs_start_date ON worklogs (start_date);
+CREATE TABLE IF NOT EXISTS issues (
+    issue_id TEXT PRIMARY KEY,
+    issues_key TEXT,
+    issues_name TEXT,
+    project_key TEXT,
+    issues_team TEXT,
+    issues_status TEXT,
+    customfield_10142 TEXT,
+    customfield_10139 TEXT,
+    created_ts REAL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    project_key TEXT PRIMARY KEY,
+    project_name TEXT,
+    project_category TEXT,
+    fetched_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    labels TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class WorklogStore:
+    """
+    Persistent local copy of Jira worklogs, issues, projects and users (SQLite).
+    The store is kept current from saved watermarks using /worklog/updated
+    and /worklog/deleted, so a report only costs the Jira calls for what
+    changed since the last sync.
+    All gunicorn workers of an instance can share the same file; syncs are
+    serialized with a file lock.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 舊版 store 的 projects 沒有 fetched_at，補上後全部視為過期，下次同步時更新
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+            if "fetched_at" not in columns:
+                conn.execute("ALTER TABLE projects ADD COLUMN fetched_at REAL NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _sync_lock(self):
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _get_state(self) -> dict:
+        rows = self._connect().execute("SELECT name, value FROM sync_state").fetchall()
+        return dict(rows)
+
+    def _set_state(self, conn: sqlite3.Connection, **values) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+            [(name, str(value)) for name, value in values.items()],
+        )
+
+    # -------------------- 同步 --------------------
+
+    def sync(self, jira_api, since_date: str, max_workers: int = 8) -> dict:
+        """
+        Bring the store up to date for reports starting on since_date.
+        The first sync (or a since_date earlier than anything synced so far)
+        loads every worklog updated since since_date; later syncs only ask
+        Jira for changes after the saved watermark.
+        Returns sync statistics.
+        """
+        with self._sync_lock():
+            state = self._get_state()
+            covered_since = state.get("covered_since")
+            backfill = covered_since is None or since_date < covered_since
+            if backfill:
+                since = to_started_window(since_date)["startedAfter"]
+            else:
+                since = int(state["updated_watermark"])
+            print(f"[INFO] worklog store 同步中 (since={since}, backfill={backfill})")
+
+            # Step 1: 新增 / 更新的 worklogs
+            worklog_ids, updated_until = jira_api.get_updated_worklog_ids(since)
+            batches = [
+                worklog_ids[i:i + WORKLOG_LIST_BATCH_SIZE]
+                for i in range(0, len(worklog_ids), WORKLOG_LIST_BATCH_SIZE)
+            ]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                worklogs = [wl for batch in executor.map(jira_api.get_worklogs_by_ids, batches) for wl in batch]
+
+            # Step 2: 已刪除的 worklogs
+            deleted_ids = []
+            deleted_until = updated_until
+            if state.get("deleted_watermark"):
+                deleted_ids, deleted_until = jira_api.get_deleted_worklog_ids(int(state["deleted_watermark"]))
+
+            # Step 3: 補上 / 更新 issue 資訊
+            issues = {}
+            if not backfill:
+                # 期間內有 worklog 的 issue 若欄位被修改，也一併更新
+                updated_since = datetime.fromtimestamp(since / 1000, tz=timezone.utc) - timedelta(days=1)
+                jql = (
+                    f'updated >= "{updated_since.strftime("%Y/%m/%d %H:%M")}" '
+                    f'AND worklogDate >= "{covered_since}"'
+                )
+                issues.update((issue["issue_id"], issue) for issue in jira_api.get_issues_by_jql(jql))
+            missing_issue_ids = sorted({str(wl["issue_id"]) for wl in worklogs} - set(issues))
+            issues.update((issue["issue_id"], issue) for issue in jira_api.get_issues_by_ids(missing_issue_ids))
+
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO worklogs VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            str(wl["worklog_id"]), str(wl["issue_id"]), wl["owner"], wl["owner_id"],
+                            started_date(wl["started"]), wl["time_spent_hr"],
+                        )
+                        for wl in worklogs
+                    ],
+                )
+                conn.executemany(
+                    "DELETE FROM worklogs WHERE worklog_id = ?",
+                    [(str(worklog_id),) for worklog_id in deleted_ids],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            str(issue["issue_id"]), issue["issues_key"], issue["issues_name"],
+                            issue["project_key"], issue["issues_team"], issue["issues_status"],
+                            to_text(issue["customfield_10142"]), to_text(issue["customfield_10139"]),
+                            isoparse(issue["created"]).timestamp() if issue.get("created") else None,
+                        )
+                        for issue in issues.values()
+                    ],
+                )
+
+            # Step 4: 補上尚未出現過的 project，並更新超過 PROJECT_REFRESH_SECONDS 的 project 資訊（改名 / 改類別）
+            now = time.time()
+            fetched_at = dict(conn.execute("SELECT project_key, fetched_at FROM projects").fetchall())
+            project_keys = {issue["project_key"] for issue in issues.values()} | set(fetched_at)
+            refresh_keys = sorted(
+                key for key in project_keys
+                if key not in fetched_at or now - fetched_at[key] > PROJECT_REFRESH_SECONDS
+            )
+            projects = list(jira_api.get_projects_by_keys(refresh_keys).values()) if refresh_keys else []
+
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?)",
+                    [(p["project_key"], p["project_name"], p["project_category"], now) for p in projects],
+                )
+                new_state = {
+                    "updated_watermark": max(updated_until, int(state.get("updated_watermark", 0))),
+                    "deleted_watermark": deleted_until,
+                    "covered_since": since_date if backfill else covered_since,
+                }
+                self._set_state(conn, **new_state)
+
+            stats = {
+                "worklogs_updated": len(worklogs),
+                "worklogs_deleted": len(deleted_ids),
+                "issues_refreshed": len(issues),
+                "projects_refreshed": len(projects),
+                "backfill": backfill,
+            }
+            print(f"[INFO] worklog store 同步完成：{stats}")
+            return stats
+
+    # -------------------- 查詢 --------------------
+
+    def get_report_df(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Worklogs with start_date <= started < end_date, in the same columns
+        and order as WorklogTable.to_frame + filter_df_by_date.
+        """
+        query = """
+            SELECT p.project_name, i.project_key, p.project_category,
+                   i.issues_name, i.issues_key, i.issues_team, i.issues_status,
+                   w.owner AS worklog_owner, w.owner_id AS worklog_owner_id,
+                   w.start_date AS worklog_start_date, w.time_spent_hr AS worklog_time_spent_hr, w.worklog_id,
+                   i.customfield_10142 AS Parent_Key, i.customfield_10139 AS Worklog_Type
+            FROM worklogs w
+            JOIN issues i ON w.issue_id = i.issue_id
+            LEFT JOIN projects p ON i.project_key = p.project_key
+            WHERE w.start_date >= ? AND w.start_date < ?
+            ORDER BY i.created_ts, i.issues_key, CAST(w.worklog_id AS INTEGER)
+        """
+        df = pd.read_sql_query(query, self._connect(), params=(start_date, end_date))
+        df["worklog_start_date"] = pd.to_datetime(df["worklog_start_date"], format="%Y-%m-%d")
+
+        # 與 WorklogTable.to_frame 相同：project 依第一次出現的順序排列
+        project_order = df.groupby("project_key", sort=False).ngroup()
+        df = df.iloc[project_order.argsort(kind="stable")].reset_index(drop=True)
+        return df
+
+    def get_user_data(self, jira_api, user_ids, max_workers: int = 8) -> dict:
+        """
+        Group info for the given users, keyed by user ID in the given order.
+        Users that are unknown or older than USER_REFRESH_SECONDS are looked
+        up again.
+        """
+        user_ids = list(dict.fromkeys(u for u in user_ids if u))
+        conn = self._connect()
+        cached = {}
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT user_id, labels, fetched_at FROM users WHERE user_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            cached.update((row[0], row[1:]) for row in rows)
+
+        now = time.time()
+        stale = [u for u in user_ids if u not in cached or now - cached[u][1] > USER_REFRESH_SECONDS]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = dict(zip(stale, executor.map(jira_api.get_user_group_info_from_user_id, stale)))
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?)",
+                [(u, json.dumps(labels), now) for u, labels in resolved.items()],
+            )
+
+        return {u: resolved[u] if u in resolved else json.loads(cached[u][0]) for u in user_ids}
+
+
+def to_text(value):
+    """
+    Store scalar custom field values as-is and anything else as text.
+    """
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
@@ -0,0 +1,107 @@
+import pandas as pd
+
+from jira_api_monthly_report import user_data_to_df
+
+
+class HoursAccumulator:
+    """
+    Running sums of worklog hours per key.
+    Uses compensated (Kahan) summation, as pandas' groupby sum does, so the
+    totals match a pivot over the detail rows.
+    """
+
+    def __init__(self) -> None:
+        self._sums = {}
+        self._counts = {}
+
+    def __len__(self) -> int:
+        return len(self._sums)
+
+    def add(self, key, hours) -> None:
+        if hours is None:
+            return
+        total, compensation = self._sums.get(key, (0.0, 0.0))
+        y = hours - compensation
+        t = total + y
+        self._sums[key] = (t, (t - total) - y)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def items(self):
+        """
+        (key, total hours, worklog count) in insertion order.
+        """
+        for key, (total, _) in self._sums.items():
+            yield key, total, self._counts[key]
+
+
+class OwnerMonthSummary:
+    """
+    Worklog owner x month totals, kept up to date as issues stream in
+    (see WorklogFetcher.fetch_pages on_issue_ready), so Worklogs_Summary
+    needs no detail DataFrame.
+    """
+
+    def __init__(self) -> None:
+        self._hours = HoursAccumulator()
+
+    def add_issue(self, issue: dict, worklogs: list) -> None:
+        for worklog in worklogs:
+            owner = worklog.get("owner")
+            if owner is not None and worklog.get("started"):
+                # started 前 7 碼即當地時間的年月（YYYY-MM）
+                self._hours.add((owner, worklog["started"][:7]), worklog.get("time_spent_hr"))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Same layout as the former pivot_table: worklog_owner, one column per
+        month (ascending, 0 when no worklog), total_time_spent_hr, sorted by
+        total descending.
+        """
+        if not len(self._hours):
+            return pd.DataFrame(columns=["worklog_owner", "total_time_spent_hr"])
+        totals = {}
+        for (owner, month), hours, _ in self._hours.items():
+            totals.setdefault(owner, {})[month] = hours
+        owners = sorted(totals)
+        months = sorted({month for by_month in totals.values() for month in by_month})
+
+        summary_df = pd.DataFrame({"worklog_owner": owners})
+        for month in months:
+            summary_df[month] = [totals[owner].get(month, 0) for owner in owners]
+        summary_df["total_time_spent_hr"] = summary_df.iloc[:, 1:].sum(axis=1)
+        return summary_df.sort_values(by="total_time_spent_hr", ascending=False)
+
+
+class OwnerTeamRollup:
+    """
+    Hours per worklog owner and issue team, accumulated while issues stream
+    in, for reports that do not need one row per worklog.
+    """
+
+    def __init__(self) -> None:
+        self._hours = HoursAccumulator()
+
+    def add_issue(self, issue: dict, worklogs: list) -> None:
+        team = issue.get("issues_team")
+        for worklog in worklogs:
+            self._hours.add((worklog.get("owner_id"), worklog.get("owner"), team), worklog.get("time_spent_hr"))
+
+    def to_frame(self, user_data: dict) -> pd.DataFrame:
+        """
+        One row per (owner, team) with total hours and worklog count, plus
+        the owner's group labels, sorted by owner then team.
+        """
+        rows = [
+            {
+                "worklog_owner": owner,
+                "worklog_owner_id": owner_id,
+                "issues_team": team,
+                "worklog_time_spent_hr": hours,
+                "worklog_count": count,
+            }
+            for (owner_id, owner, team), hours, count in self._hours.items()
+        ]
+        columns = ["worklog_owner", "worklog_owner_id", "issues_team", "worklog_time_spent_hr", "worklog_count"]
+        df = pd.DataFrame(rows, columns=columns)
+        df = pd.merge(df, user_data_to_df(user_data), on="worklog_owner_id", how="left")
+        return df.sort_values(by=["worklog_owner", "issues_team"], na_position="last", kind="stable").reset_index(drop=True)
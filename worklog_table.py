@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from jira_api_monthly_report import started_to_datetime
+
+
+PROJECT_COLUMNS = ["project_name", "project_key", "project_category"]
+# parse_worklog 欄位 -> 報表欄位
+WORKLOG_COLUMNS = {
+    "owner": "worklog_owner",
+    "owner_id": "worklog_owner_id",
+    "started": "worklog_start_date",
+    "time_spent_hr": "worklog_time_spent_hr",
+    # 只用於報表沿用的索引，輸出前移除
+    "worklog_id": "worklog_id",
+}
+# 重複值多的欄位以 categorical 儲存
+CATEGORICAL_COLUMNS = [
+    "project_name", "project_key", "project_category", "issues_team", "issues_status", "worklog_owner"
+]
+
+
+class WorklogTable:
+    """
+    Column-oriented accumulator for report rows (one row per worklog).
+    Issues are appended as their worklogs arrive and each value goes
+    straight into a per-column list, so no per-row dict and no
+    json_normalize / explode pass is needed; to_frame builds the final
+    DataFrame in one step with categorical dtypes for the repetitive
+    columns.
+    Columns come out as PROJECT_COLUMNS, issue_columns, the worklog
+    columns, then extra_columns (source field -> output name).
+    """
+
+    def __init__(self, issue_columns: list, extra_columns: dict = None, keep_empty_issues: bool = False) -> None:
+        self.issue_columns = list(issue_columns)
+        self.extra_columns = dict(extra_columns or {})
+        # True 時沒有 worklog 的 issue 也保留一列（worklog 欄位為空），與 explode 的結果相同
+        self.keep_empty_issues = keep_empty_issues
+        self._project_keys = []
+        self._issue_values = {name: [] for name in [*self.issue_columns, *self.extra_columns]}
+        self._worklog_values = {name: [] for name in WORKLOG_COLUMNS}
+        # project 依第一次出現的順序編號
+        self._project_order = {}
+        self._project_codes = []
+
+    def __len__(self) -> int:
+        return len(self._project_keys)
+
+    def project_keys(self) -> list:
+        """
+        Project keys in order of first appearance.
+        """
+        return list(self._project_order)
+
+    def append_issue(self, issue: dict, worklogs: list, project_key: str = None) -> None:
+        """
+        Add one row per worklog of the issue; project_key defaults to
+        issue["project_key"].
+        """
+        count = len(worklogs)
+        if count == 0:
+            if not self.keep_empty_issues:
+                return
+            count = 1
+        project_key = project_key if project_key is not None else issue.get("project_key")
+        code = self._project_order.setdefault(project_key, len(self._project_order))
+
+        self._project_keys.extend([project_key] * count)
+        self._project_codes.extend([code] * count)
+        for name, values in self._issue_values.items():
+            values.extend([issue.get(name)] * count)
+        if worklogs:
+            for name, values in self._worklog_values.items():
+                values.extend([worklog.get(name) for worklog in worklogs])
+        else:
+            for values in self._worklog_values.values():
+                values.append(None)
+
+    def to_frame(self, project_info: dict, group_projects: bool = True) -> pd.DataFrame:
+        """
+        Build the report DataFrame.
+        project_info maps project_key to its project_name / project_category;
+        rows are grouped by project in order of first appearance (stable
+        within a project).
+        With group_projects=False rows stay in issue order, e.g. to split
+        them by month first and group each part with group_rows_by_project.
+        """
+        data = {}
+        for name in PROJECT_COLUMNS:
+            if name == "project_key":
+                data[name] = self._project_keys
+                continue
+            lookup = {key: (project_info.get(key) or {}).get(name) for key in self._project_order}
+            data[name] = [lookup[key] for key in self._project_keys]
+        for name in self.issue_columns:
+            data[name] = self._issue_values[name]
+        for name, column in WORKLOG_COLUMNS.items():
+            data[column] = self._worklog_values[name]
+        for name, column in self.extra_columns.items():
+            data[column] = self._issue_values[name]
+
+        df = pd.DataFrame(data)
+        if df.empty:
+            # 空 list 會被推斷為 float64，文字欄位需維持 object 才能依 worklog_owner_id 合併使用者資料
+            df = df.astype({name: object for name in df.columns if name != "worklog_time_spent_hr"})
+        df["worklog_time_spent_hr"] = df["worklog_time_spent_hr"].astype("float64")
+        # started 字串一次轉成 datetime64，只保留當地日期
+        df["worklog_start_date"] = started_to_datetime(df["worklog_start_date"]).dt.normalize()
+        for name in CATEGORICAL_COLUMNS:
+            if name in df.columns:
+                df[name] = df[name].astype("category")
+
+        if group_projects and len(self._project_order) > 1:
+            order = np.argsort(np.asarray(self._project_codes), kind="stable")
+            df = df.iloc[order].reset_index(drop=True)
+        return df
+
+
+def group_rows_by_project(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stable-sort rows by the order in which each project_key first appears,
+    as WorklogTable.to_frame does.
+    """
+    codes, _ = pd.factorize(np.asarray(df["project_key"], dtype=object), use_na_sentinel=False)
+    if len(codes) and codes.max() > 0:
+        df = df.iloc[np.argsort(codes, kind="stable")]
+    return df.reset_index(drop=True)